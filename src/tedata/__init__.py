@@ -2,13 +2,12 @@ import pandas as pd
 import sys
 import datetime
 import os
+import types
+import importlib
 from .logger_setup import setup_logger
 
 
-print("THIS IS MY FORKED VERSION 🚀")
-
-# Set plotly as the default plotting backend for pandas
-pd.options.plotting.backend = "plotly"
+print("THIS IS MY FORKED VERSION 🚀", file=sys.stderr)
 
 # Version of the tedata package
 __version__ = "0.3.51"
@@ -19,33 +18,93 @@ disable_logging = os.environ.get('TEDATA_DISABLE_LOGGING', '').lower() in ('true
 # Setup logger with disable option
 logger = setup_logger(disable_logging=disable_logging)
 
-# Then import modules
-from .base import *
-from .utils import *
-from .scraper import *
-from .search import *
-from .scrape_chart import *
-
-# Only log if logging is enabled
-if not disable_logging:
-    ## Check browser installation
-    firefox, chrome = check_browser_installed()
-    logger.debug(f"""
-    New initialization of the tedata package:
-    Version: {__version__}
-    Python: {sys.version}
-    System: {sys.platform}
-    Location: {os.path.dirname(__file__)}
-    Time: {datetime.datetime.now()}
-    User: {os.getlogin()}
-    Browsers:
-    - Firefox: {firefox}
-    - Chrome: {chrome}
-    """)
-    logger.info(f"tedata package initialized successfully!")
-else:
-    # Still check browser installation but don't log it
-    firefox, chrome = check_browser_installed()
+# Then import modules. Only the modules that work without a browser are imported here, so that "import tedata" stays light for code that
+# only reads stored data (tedata.get, SeriesStore, load_archive etc). The scraping modules (selenium, bs4 & plotly) are imported the first
+# time one of their names is used, e.g tedata.scrape_chart or tedata.search_TE, see __getattr__ below.
+from .ids import *
+from .export import *
+from .jobqueue import *
+from .sharding import *
+from .ratelimit import *
+from .cache import *
+from .singleflight import *
+from .store import *
+from .vintages import *
+from .archive import *
+from .batch import *
+from .async_scrape import *
+from .access import *
+from .timing import *
+from .profiling import *
+
+_scraping_loaded = False
+
+def _load_scraping():
+    """Import the scraping modules into the package namespace, set plotly as the pandas plotting backend and check the browsers."""
+    global _scraping_loaded, firefox, chrome
+    if _scraping_loaded:
+        return
+    _scraping_loaded = True
+    try:
+        modules = [importlib.import_module(f"{__name__}.{name}") for name in ("base", "utils", "scraper", "search", "scrape_chart")]
+    except Exception:
+        _scraping_loaded = False
+        raise
+    for module in modules:
+        globals().update({name: value for name, value in vars(module).items() if not name.startswith("_")})
+    globals().update({"base": modules[0], "utils": modules[1], "scraper": modules[2], "search": modules[3]})
+
+    # Set plotly as the default plotting backend for pandas
+    pd.options.plotting.backend = "plotly"
+
+    # Only log if logging is enabled
+    if not disable_logging:
+        ## Check browser installation
+        firefox, chrome = check_browser_installed()
+        logger.debug(f"""
+        New initialization of the tedata package:
+        Version: {__version__}
+        Python: {sys.version}
+        System: {sys.platform}
+        Location: {os.path.dirname(__file__)}
+        Time: {datetime.datetime.now()}
+        User: {os.getlogin()}
+        Browsers:
+        - Firefox: {firefox}
+        - Chrome: {chrome}
+        """)
+        logger.info(f"tedata package initialized successfully!")
+    else:
+        # Still check browser installation but don't log it
+        firefox, chrome = check_browser_installed()
+
+def __getattr__(name: str):
+    """Load the scraping modules on first use of one of their names (PEP 562). "from tedata import *" asks for __all__ and so loads them too."""
+    if name == "__all__":
+        _load_scraping()
+        return [key for key in globals() if not key.startswith("_")]
+    if name.startswith("_"):
+        raise AttributeError(f"module 'tedata' has no attribute '{name}'")
+    if name in ("base", "utils", "scraper", "search"):   # Submodules imported by each other, e.g "from . import scraper" in utils.
+        return importlib.import_module(f"{__name__}.{name}")
+    _load_scraping()
+    if name in globals():
+        return globals()[name]
+    raise AttributeError(f"module 'tedata' has no attribute '{name}'")
+
+def __dir__():
+    _load_scraping()
+    return sorted(globals())
+
+class _Package(types.ModuleType):
+    def __setattr__(self, name, value):
+        # Importing the scrape_chart module (e.g lazily, from tedata.get) binds it to the package attribute of the same name.
+        # Keep tedata.scrape_chart the function, as it was when everything was imported by this file.
+        if name == "scrape_chart" and isinstance(value, types.ModuleType):
+            value = value.scrape_chart
+        super().__setattr__(name, value)
+
+sys.modules[__name__].__class__ = _Package
 
 # Add this to your /src/tedata/__init__.py file
 
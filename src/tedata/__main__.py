@@ -1,27 +1,57 @@
-import os 
+import os
+import sys
+import json
+import tempfile
 
 ##### Get the directory where this file is housed ########################
 wd = os.path.dirname(__file__)
 fdel= os.path.sep
 
 import argparse
-from . import scrape_chart
-import pandas as pd
+from .batch import scrape_many
+from .export import write_series, write_workbook, default_filename, EXPORT_FORMATS
+from .store import SeriesStore
+
+def read_entries(urls: list = None, input_file: str = None) -> list:
+    """Collect URLs/ids from the command line, a file or stdin. Blank lines and lines starting with '#' are skipped.
+    Use '-' as input_file to read from stdin. If no URLs and no input file are given, stdin is read if it is not a terminal."""
+    entries = list(urls or [])
+    lines = []
+    if input_file == "-" or (input_file is None and not entries and not sys.stdin.isatty()):
+        lines = sys.stdin.read().splitlines()
+    elif input_file is not None:
+        with open(input_file, "r") as f:
+            lines = f.read().splitlines()
+    for line in lines:
+        line = line.strip().split(",")[0].strip()  # Allow csv files with the URL or id in the first column.
+        if line and not line.startswith("#"):
+            entries.append(line)
+    return entries
 
 def main():
     # Create parser
     parser = argparse.ArgumentParser(
-        description='Scrape data from Trading Economics charts'
+        description='Scrape data from Trading Economics charts. Scrape one URL, or many URLs/ids from a file or stdin. '
+        'One JSON line per finished series is written to stdout, everything else is written to stderr.'
     )
-    
+
     # Add arguments
     parser.add_argument(
         'url',
         type=str,
-        help='URL of Trading Economics chart to scrape'
+        nargs='*',
+        help='URL(s) or id(s) e.g "united-states/gdp" of Trading Economics chart(s) to scrape'
     )
-    
+
     # Optional arguments
+    parser.add_argument(
+        '--input',
+        '-i',
+        type=str,
+        default=None,
+        help='File with one URL or id per line. Use "-" to read from stdin.'
+    )
+
     parser.add_argument(
         '--head',
         '-he',
@@ -32,38 +62,124 @@ def main():
     parser.add_argument(
         '--method',
         '-m',
-        choices=["path", "tooltips", "mixed", "highcharts_api"],
-        help='Scraping method to use: "path", "tooltips" or "mixed". If not specified, default method "highcharts_api" will be used.'
+        choices=["path", "tooltips", "mixed", "highcharts_api", "auto"],
+        default="highcharts_api",
+        help='Scraping method to use: "path", "tooltips", "mixed", "highcharts_api" or "auto" (try each until one works). If not specified, default method "highcharts_api" will be used.'
+    )
+
+    parser.add_argument(
+        '--workers',
+        '-w',
+        type=int,
+        default=1,
+        help='Number of worker processes, each with its own re-used browser. Default is 1 (a single browser re-used for all entries).'
+    )
+
+    parser.add_argument(
+        '--format',
+        '-f',
+        choices=EXPORT_FORMATS,
+        default="xlsx",
+        help='Output file format. Default is xlsx. "parquet" and "arrow" embed the metadata in the file and need pyarrow.'
+    )
+
+    parser.add_argument(
+        '--out-dir',
+        '-o',
+        type=str,
+        default=os.getcwd(),
+        help='Directory to save output files to. Default is the current working directory.'
+    )
+
+    parser.add_argument(
+        '--workbook',
+        type=str,
+        default=None,
+        help='Write all scraped series into this one .xlsx workbook (wide "Data" sheet + "Metadata" sheet) instead of one file per series.'
+    )
+
+    parser.add_argument(
+        '--no-plot',
+        action='store_true',
+        help='Do not plot the series. Plotting only happens when a single URL is scraped.'
     )
 
     # Parse arguments
     args = parser.parse_args()
-    
+    entries = read_entries(args.url, args.input)
+    if len(entries) == 0:
+        parser.error("No URLs or ids supplied.")
+
+    # Keep stdout clean for the JSON lines: anything printed to stdout by tedata or by the worker processes goes to stderr.
+    sys.stdout.flush()
+    json_out = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def emit(line: dict):
+        json_out.write(json.dumps(line, default=str) + "\n")
+        json_out.flush()
+
+    failures = 0
+    last_result = None
+    workbook_store, workbook_dir = None, None
+    workbook_lines = []   # Result lines of the series going into the workbook, emitted once the workbook has been written.
+    if args.workbook is not None:
+        # Series are put in a temporary SeriesStore as they arrive and the workbook is streamed from it at the end, so memory use doesn't
+        # grow with the number of series.
+        workbook_dir = tempfile.TemporaryDirectory(prefix="tedata_workbook_")
+        workbook_store = SeriesStore(os.path.join(workbook_dir.name, "workbook.db"))
     try:
-        # Run scraper
-        result = scrape_chart(url=args.url, use_existing_driver = False, headless=args.head, method=args.method)
-        
-        if result is not None:
-            # Create output filename from URL
-            filename = args.url.split('/')[-2] + '_' + args.url.split('/')[-1] + '.xlsx'
-            
-            # Create Excel writer
-            with pd.ExcelWriter(filename) as writer:
-                # Save series data
-                result.series.to_excel(writer, sheet_name='Data')
-                # Save metadata
-                result.series_metadata.to_excel(writer, sheet_name='Metadata')
-            
-            print(f"\n\nData saved to {filename}")
-            result.plot_series()  #Plot the data in an interactive html plotly chart.
-        else:
-            print("Error: Scraping failed")
-            
-    except Exception as e:
-        print(f"Error: {str(e)}")
-
-    result.close()
-    del result
+        for id, result in scrape_many(entries, workers=args.workers, method=args.method, headless=args.head, return_when="as_completed"):
+            line = {"id": id, "url": result["url"], "ok": result["error"] is None, "error": result["error"], "path": None,
+                    "timings": result["timings"]}
+            if result["error"] is None:
+                try:
+                    if args.workbook is not None:
+                        line["path"] = args.workbook
+                    else:
+                        line["path"] = write_series(result["series"], result["metadata"], filename=default_filename(id),
+                                                    out_dir=args.out_dir, format=args.format)
+                    line.update({"length": len(result["series"]),
+                                 "start_date": result["series"].index[0].strftime("%Y-%m-%d"),
+                                 "end_date": result["series"].index[-1].strftime("%Y-%m-%d")})
+                    if workbook_store is not None:
+                        workbook_store.put(id, result["series"], result["metadata"])
+                    last_result = result if len(entries) == 1 else None
+                except Exception as e:
+                    line.update({"ok": False, "error": f"Error saving data: {str(e)}"})
+            if args.workbook is not None and line["ok"]:
+                workbook_lines.append(line)
+                continue
+            if not line["ok"]:
+                failures += 1
+            emit(line)
+    except KeyboardInterrupt:
+        print("Interrupted.", file=sys.stderr)
+    finally:
+        if workbook_lines:
+            try:
+                write_workbook(args.workbook, workbook_store)
+                print(f"{len(workbook_lines)} series written to {args.workbook}", file=sys.stderr)
+            except Exception as e:
+                print(f"Error writing workbook {args.workbook}: {str(e)}", file=sys.stderr)
+                for line in workbook_lines:
+                    line.update({"ok": False, "error": f"Error writing workbook: {str(e)}"})
+                last_result = None
+        if workbook_store is not None:
+            workbook_store.close()
+            workbook_dir.cleanup()
+        for line in workbook_lines:
+            if not line["ok"]:
+                failures += 1
+            emit(line)
+        json_out.close()
+
+    if len(entries) == 1 and last_result is not None and not args.no_plot:
+        from .utils import plot_multi_series
+        metadata = last_result["metadata"].to_dict() if last_result["metadata"] is not None else None
+        plot_multi_series(series_list=[last_result["series"]], metadata=metadata)  #Plot the data in an interactive html plotly chart.
+
+    sys.exit(1 if failures else 0)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
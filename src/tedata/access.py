@@ -0,0 +1,132 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports. This module must stay importable without selenium, selenium is only imported if a series has to be scraped.
+from .ids import normalize_id
+from .cache import ttl_for
+from .store import SeriesStore
+from .singleflight import SingleFlight
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.access')
+
+HOT_SIZE = 512   # Number of series kept in memory by get, per process.
+
+_stores = {}
+_hot = OrderedDict()
+_lock = threading.Lock()
+# Coalesces concurrent gets of the same series. get owns the scraper of the call, so nothing is kept once it is done.
+_get_flight = SingleFlight(linger=0)
+
+def _get_store(store=None) -> SeriesStore:
+    """SeriesStore for a path (or the default store if None), opened once per process."""
+    if isinstance(store, SeriesStore):
+        return store
+    path = os.path.abspath(store) if store is not None else None
+    with _lock:
+        if path not in _stores:
+            _stores[path] = SeriesStore(path)
+        return _stores[path]
+
+def _load(store: SeriesStore, id: str) -> dict:
+    """Read a whole series from the store into the in-memory cache. None if the id is not stored."""
+    updated_at = store.updated_at(id)
+    if updated_at is None:
+        return None
+    metadata = store.metadata(id) or {}
+    entry = {"series": store.get(id), "frequency": metadata.get("frequency"), "updated_at": updated_at}
+    _remember(store, id, entry)
+    return entry
+
+def _remember(store: SeriesStore, id: str, entry: dict):
+    with _lock:
+        _hot[(store.path, id)] = entry
+        _hot.move_to_end((store.path, id))
+        while len(_hot) > HOT_SIZE:
+            _hot.popitem(last=False)
+
+def _is_fresh(entry: dict, max_age: float = None) -> bool:
+    max_age = ttl_for(entry["frequency"]) if max_age is None else max_age
+    return time.time() - entry["updated_at"] <= max_age
+
+def _quit_driver(scraped):
+    """Quit the browser of a scraper returned by scrape_chart, get only needs its series."""
+    driver = getattr(scraped, "driver", None)
+    if driver is None:
+        return
+    scraped.driver = None
+    try:
+        driver.quit()
+    except Exception as e:
+        logger.debug(f"get: error quitting the webdriver: {str(e)}")
+
+def _scrape(id: str, **scrape_kwargs) -> tuple:
+    """Scrape a series for get. Returns (series, metadata), or None if scraping failed. The browser is quit afterwards unless it was
+    supplied by the caller (scraper, driver or use_existing_driver in scrape_kwargs)."""
+    from .scrape_chart import scrape_chart
+
+    scraped = scrape_chart(id=id, **scrape_kwargs)
+    series, metadata = getattr(scraped, "series", None), getattr(scraped, "series_metadata", None)
+    if not any(scrape_kwargs.get(key) for key in ("scraper", "driver", "use_existing_driver")):
+        _quit_driver(scraped)
+    return (series, metadata) if series is not None else None
+
+def get(id: str, start=None, end=None, max_age: float = None, scrape: bool = True, store=None, **scrape_kwargs) -> pd.Series:
+    """Get a series from the local store, scraping it only if it is missing or stale. Series are read from the SeriesStore (and kept in
+    memory for repeated lookups), so serving stored data needs no browser, and tedata's scraping modules are only imported when a series
+    actually has to be scraped. Scraped series are written to the store. Concurrent gets of the same missing series share one scrape.
+
+    **Parameters**
+    - id (str): URL or id of the series e.g "united-states/gdp".
+    - start, end (str or pd.Timestamp): Only return the points between start and end (inclusive). Default is the whole series.
+    - max_age (float): Maximum age in seconds of the stored series, counted from when it was last written to the store. Default None uses
+    a time-to-live based on the frequency of the series (see tedata.cache.DEFAULT_TTLS). Use float("inf") to accept any stored copy.
+    - scrape (bool): Scrape the series if it is missing or stale. With False the stored copy is returned however old it is, or None if
+    there is none; no browser is ever started.
+    - store (SeriesStore or str): Store, or path of the store file, to use. Default is the default SeriesStore ('<cache_dir>/series_store.db').
+    - scrape_kwargs: Passed to scrape_chart when scraping (method, headless, wait_time etc).
+
+    **Returns**
+    - pd.Series, or None if the series is not stored and could not be scraped.
+    """
+    id = normalize_id(id)
+    store = _get_store(store)
+    with _lock:
+        entry = _hot.get((store.path, id))
+    if entry is None or not _is_fresh(entry, max_age):
+        if entry is None or store.updated_at(id) != entry["updated_at"]:   # Not cached yet, or written to since it was cached.
+            entry = _load(store, id)
+        if scrape and (entry is None or not _is_fresh(entry, max_age)):
+            logger.info(f"get: {'no stored copy' if entry is None else 'stored copy is stale'} of {id}, scraping it.")
+            # A stale stored copy must be scraped afresh: served from the series cache it would be re-stamped as new by store.put.
+            scrape_kwargs.setdefault("use_cache", entry is None)
+            scrape_kwargs.setdefault("max_age", max_age)
+            key = (store.path, id, scrape_kwargs.get("method", "highcharts_api"), scrape_kwargs["use_cache"], scrape_kwargs["max_age"])
+            scraped = _get_flight.do(key, _scrape, id, **scrape_kwargs)
+            if scraped is not None:
+                store.put(id, *scraped)
+                entry = _load(store, id)
+            elif entry is not None:
+                logger.info(f"get: scraping {id} failed, returning the stale stored copy.")
+        if entry is None:
+            return None
+
+    series = entry["series"]
+    if start is not None or end is not None:
+        series = series.loc[start:end]
+    return series.copy()
+
+def get_many(ids, start=None, end=None, max_age: float = None, scrape: bool = True, store=None, **scrape_kwargs) -> pd.DataFrame:
+    """get for several series. Returns a wide DataFrame with a column per id, aligned on dates. Series that could not be found or scraped
+    give a column of NaN."""
+    ids = list(dict.fromkeys(normalize_id(id) for id in ids))
+    series = {id: get(id, start=start, end=end, max_age=max_age, scrape=scrape, store=store, **scrape_kwargs) for id in ids}
+    frame = pd.concat({id: s for id, s in series.items() if s is not None}, axis=1) if any(s is not None for s in series.values()) else pd.DataFrame()
+    return frame.reindex(columns=ids).sort_index()
@@ -0,0 +1,150 @@
+import os
+import json
+import struct
+import tempfile
+import numpy as np
+import pandas as pd
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports. This module must stay importable without selenium.
+from .ids import normalize_id
+from .export import metadata_to_dict, iter_series_entries
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.archive')
+
+# File layout: header | int64 dates of all series | float64 values of all series | JSON index.
+# Header: magic, number of points, byte offset of the index, byte length of the index.
+ARCHIVE_MAGIC = b"TEDARCH1"
+_HEADER = struct.Struct("<8sQQQ")
+
+def write_archive(path: str, series, metadata: dict = None) -> str:
+    """Pack many series into one archive file that load_archive memory maps. Series are written one at a time so memory use does not
+    grow with the number of series.
+
+    **Parameters**
+    - path (str): Path of the archive file (e.g "macro.tedarch"). Overwritten if it exists.
+    - series: Series to pack, see tedata.export.iter_series_entries for the accepted inputs.
+    - metadata (dict): Optional dict of id -> metadata (pd.Series or dict) for series given without metadata.
+
+    **Returns**
+    - path (str): Path of the archive written.
+    """
+    index = {"ids": [], "offsets": [], "lengths": [], "names": [], "metadata": []}
+    seen, n_points = set(), 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f, tempfile.TemporaryFile() as values_file:
+        f.write(_HEADER.pack(ARCHIVE_MAGIC, 0, 0, 0))
+        for id, data, meta in iter_series_entries(series, metadata):
+            if id in seen:
+                logger.info(f"write_archive: duplicate id {id} skipped.")
+                continue
+            seen.add(id)
+            data = data[~data.index.duplicated(keep="last")].sort_index()
+            f.write(np.ascontiguousarray(pd.DatetimeIndex(data.index).asi8, dtype="<i8").tobytes())
+            values_file.write(np.ascontiguousarray(data.to_numpy(dtype="float64"), dtype="<f8").tobytes())
+            index["ids"].append(id)
+            index["offsets"].append(n_points)
+            index["lengths"].append(len(data))
+            index["names"].append(None if data.name is None else str(data.name))
+            index["metadata"].append(metadata_to_dict(meta))
+            n_points += len(data)
+
+        values_file.seek(0)
+        while True:
+            chunk = values_file.read(16 * 1024 ** 2)
+            if not chunk:
+                break
+            f.write(chunk)
+        index_offset = f.tell()
+        index_bytes = json.dumps(index, default=str).encode("utf-8")
+        f.write(index_bytes)
+        f.seek(0)
+        f.write(_HEADER.pack(ARCHIVE_MAGIC, n_points, index_offset, len(index_bytes)))
+    os.replace(tmp_path, path)
+    logger.info(f"write_archive: {len(index['ids'])} series, {n_points} points written to {path}")
+    return path
+
+######## Memory mapped archive ##############################
+class SeriesArchive:
+    """Read only view of an archive written by write_archive. Opening only reads the small index, the dates and values are memory mapped,
+    so opening takes milliseconds however many series the archive holds. archive[id] returns a pd.Series whose values are a view of the
+    memory map (no copy), pages are loaded from disk as they are used.
+
+    **Init Parameters:**
+    - path (str): Path of the archive file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, n_points, index_offset, index_len = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != ARCHIVE_MAGIC:
+                raise ValueError(f"{path} is not a tedata archive.")
+            f.seek(index_offset)
+            index = json.loads(f.read(index_len).decode("utf-8"))
+        self.n_points = n_points
+        self._positions = {id: i for i, id in enumerate(index["ids"])}
+        self._index = index
+        if n_points > 0:
+            self.dates = np.memmap(path, dtype="<i8", mode="r", offset=_HEADER.size, shape=(n_points,))
+            self.values = np.memmap(path, dtype="<f8", mode="r", offset=_HEADER.size + 8 * n_points, shape=(n_points,))
+        else:
+            self.dates, self.values = np.empty(0, dtype="<i8"), np.empty(0, dtype="<f8")
+
+    def __getitem__(self, id: str) -> pd.Series:
+        pos = self._positions.get(id)
+        if pos is None:
+            pos = self._positions.get(normalize_id(id))
+            if pos is None:
+                raise KeyError(id)
+        start = self._index["offsets"][pos]
+        stop = start + self._index["lengths"][pos]
+        index = pd.DatetimeIndex(self.dates[start:stop].view("datetime64[ns]"), copy=False)
+        return pd.Series(self.values[start:stop], index=index, name=self._index["names"][pos], copy=False)
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._positions or normalize_id(id) in self._positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self):
+        return iter(self._index["ids"])
+
+    def ids(self) -> list:
+        """Ids of the series in the archive, in the order they were written."""
+        return list(self._index["ids"])
+
+    def get(self, id: str, default=None) -> pd.Series:
+        try:
+            return self[id]
+        except KeyError:
+            return default
+
+    def metadata(self, id: str) -> dict:
+        """Metadata stored for a series."""
+        pos = self._positions.get(id, self._positions.get(normalize_id(id)))
+        if pos is None:
+            raise KeyError(id)
+        return self._index["metadata"][pos]
+
+    def to_frame(self, ids=None) -> pd.DataFrame:
+        """Wide DataFrame of several series (all by default), one column per id, aligned on the union of their dates. This copies the data."""
+        ids = self.ids() if ids is None else list(ids)
+        return pd.concat({id: self[id] for id in ids}, axis=1).sort_index()
+
+def load_archive(path: str) -> SeriesArchive:
+    """Open an archive written by write_archive. Use archive[id] to get a series (a view of the memory map, no copy).
+
+    **Example:**
+    ```
+    ted.write_archive("macro.tedarch", ted.scrape_many(ids))
+    archive = ted.load_archive("macro.tedarch")
+    gdp = archive["united-states/gdp"]
+    ```
+    """
+    return SeriesArchive(path)
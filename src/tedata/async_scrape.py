@@ -0,0 +1,195 @@
+import os
+import time
+import asyncio
+import concurrent.futures
+from typing import Literal, Iterable
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports
+from .ids import normalize_id
+from .batch import ScraperPool, _blank_result, _scrape_with, _unique_ids
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.async_scrape')
+
+######## asyncio API for scraping, selenium work runs on a dedicated thread pool ##############################
+class AsyncScraper:
+    """asyncio front end for tedata. Selenium calls are blocking, so they are run on a dedicated thread pool executor with one
+    pooled webdriver per thread. Concurrency is bounded by a semaphore so that at most 'max_concurrency' browsers are working at once.
+    Cancelling a scrape task quits the webdriver that is running it, which aborts the blocking selenium call in the worker thread.
+    That webdriver is then dropped from the pool and a fresh one is made for the next job.
+
+    **Init Parameters:**
+    - max_concurrency (int): Maximum number of simultaneous scrapes (and browsers).
+    - headless (bool): Whether to run the browsers in headless mode.
+    - browser (str): Browser to use. Only 'firefox' is supported at the moment.
+
+    **Example:**
+    ```
+    async with AsyncScraper(max_concurrency=3) as ascraper:
+        result = await ascraper.scrape("united-states/gdp")
+        async for id, result in ascraper.iter_scrape(["australia/gdp", "japan/gdp"]):
+            print(id, result["error"])
+    ```
+    """
+
+    def __init__(self, max_concurrency: int = 4, headless: bool = True, browser: str = "firefox"):
+        self.max_concurrency = max_concurrency
+        self.pool = ScraperPool(size=max_concurrency, headless=headless, browser=browser)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="tedata-async")
+        self._semaphore = None   # Created lazily so that it binds to the running event loop.
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _job(self, id: str, job: dict, job_kwargs: dict) -> dict:
+        """Blocking scrape job, run on the executor. 'job' is shared with the event loop so that the scraper in use can be
+        found and quit if the task is cancelled."""
+        result = _blank_result(id)
+        timer = time.perf_counter()
+        scraper = None
+        discard = False
+        try:
+            scraper = self.pool.acquire()
+            job["scraper"] = scraper
+            result["timings"]["driver_ready"] = round(time.perf_counter() - timer, 4)
+            if job.get("cancelled"):
+                raise asyncio.CancelledError()
+            _scrape_with(scraper, result, **job_kwargs)
+        except BaseException as e:
+            discard = True
+            result["error"] = "Cancelled" if job.get("cancelled") else str(e)
+            logger.info(f"AsyncScraper: error scraping {id}: {result['error']}")
+        finally:
+            if scraper is not None:
+                self.pool.release(scraper, discard=discard or job.get("cancelled", False))
+            result["timings"]["total"] = round(time.perf_counter() - timer, 4)
+        return result
+
+    async def scrape(self, id: str,
+                     method: Literal["path", "tooltips", "mixed", "highcharts_api", "auto"] = "highcharts_api",
+                     start_date: str = None,
+                     end_date: str = None,
+                     wait_time: int = 5) -> dict:
+        """Scrape a single series without blocking the event loop. Waits for a free slot if 'max_concurrency' scrapes are already running.
+
+        **Parameters**
+        - id (str): URL or id ("country/indicator") of the chart to scrape.
+        - method, start_date, end_date, wait_time: Passed to scrape_chart.
+
+        **Returns**
+        - result dict with keys "id", "url", "series", "metadata", "timings" & "error". See scrape_many.
+        """
+        id = normalize_id(id)
+        job_kwargs = {"method": method, "start_date": start_date, "end_date": end_date, "wait_time": wait_time}
+        loop = asyncio.get_running_loop()
+        async with self.semaphore:
+            job = {}
+            future = loop.run_in_executor(self.executor, self._job, id, job, job_kwargs)
+            try:
+                return await future
+            except asyncio.CancelledError:
+                job["cancelled"] = True
+                scraper = job.get("scraper")
+                if scraper is not None and getattr(scraper, "driver", None) is not None:
+                    logger.info(f"AsyncScraper: scrape of {id} cancelled, quitting its webdriver.")
+                    # Quitting the driver makes the blocking selenium call in the worker thread fail straight away.
+                    await loop.run_in_executor(None, _quit_driver, scraper)
+                raise
+
+    async def scrape_many(self, ids: Iterable[str], **kwargs) -> dict:
+        """Scrape many series concurrently (bounded by max_concurrency). Returns dict of id -> result.
+        Keyword arguments are passed to the scrape method."""
+        unique_ids = _unique_ids(ids)
+        results = await asyncio.gather(*[self.scrape(id, **kwargs) for id in unique_ids])
+        return dict(zip(unique_ids, results))
+
+    async def iter_scrape(self, ids: Iterable[str], **kwargs):
+        """Async generator that yields (id, result) tuples as each series finishes. Keyword arguments are passed to the scrape method.
+        Pending scrapes are cancelled if the consumer stops iterating early."""
+        unique_ids = _unique_ids(ids)
+        tasks = {asyncio.ensure_future(self.scrape(id, **kwargs)): id for id in unique_ids}
+        try:
+            for next_done in asyncio.as_completed(list(tasks.keys())):
+                result = await next_done
+                yield result["id"], result
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks.keys(), return_exceptions=True)
+
+    async def close(self):
+        """Close the pool of webdrivers and shut down the executor."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.pool.close)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+def _quit_driver(scraper):
+    try:
+        scraper.driver.quit()
+    except Exception as e:
+        logger.debug(f"Error quitting driver of cancelled scrape: {str(e)}")
+
+## Convenience functions ########################################
+async def scrape_chart_async(url: str = None,
+                             id: str = None,
+                             country: str = "united-states",
+                             indicator: str = None,
+                             method: Literal["path", "tooltips", "mixed", "highcharts_api", "auto"] = "highcharts_api",
+                             start_date: str = None,
+                             end_date: str = None,
+                             wait_time: int = 5,
+                             async_scraper: AsyncScraper = None,
+                             headless: bool = True) -> dict:
+    """asyncio version of scrape_chart. The chart is specified in the same ways as for scrape_chart (url, id or country + indicator).
+    The scrape runs on the thread pool of the supplied AsyncScraper, or a temporary one with a single browser if none is supplied.
+    Supply an AsyncScraper to re-use its webdrivers across calls.
+
+    **Returns**
+    - result dict with keys "id", "url", "series", "metadata", "timings" & "error". See scrape_many.
+    """
+    if url is None:
+        if indicator is not None:
+            url = f"{country}/{indicator}"
+        elif id is not None:
+            url = id
+        else:
+            raise ValueError("No URL, id or indicator supplied.")
+
+    kwargs = {"method": method, "start_date": start_date, "end_date": end_date, "wait_time": wait_time}
+    if async_scraper is not None:
+        return await async_scraper.scrape(url, **kwargs)
+    async with AsyncScraper(max_concurrency=1, headless=headless) as temp_scraper:
+        return await temp_scraper.scrape(url, **kwargs)
+
+async def scrape_many_async(ids: Iterable[str], max_concurrency: int = 4, headless: bool = True, **kwargs) -> dict:
+    """asyncio version of scrape_many. Scrapes the series with at most 'max_concurrency' browsers working at once and returns
+    dict of id -> result. Keyword arguments (method, start_date, end_date, wait_time) are passed to scrape_chart."""
+    async with AsyncScraper(max_concurrency=max_concurrency, headless=headless) as async_scraper:
+        return await async_scraper.scrape_many(ids, **kwargs)
+
+async def iter_scrape_async(ids: Iterable[str], max_concurrency: int = 4, headless: bool = True, **kwargs):
+    """Async generator version of scrape_many_async that yields (id, result) tuples as each series finishes.
+
+    **Example:**
+    ```
+    async for id, result in ted.iter_scrape_async(ids, max_concurrency=4):
+        print(id, result["error"])
+    ```
+    """
+    async with AsyncScraper(max_concurrency=max_concurrency, headless=headless) as async_scraper:
+        async for id, result in async_scraper.iter_scrape(ids, **kwargs):
+            yield id, result
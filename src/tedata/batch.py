@@ -0,0 +1,340 @@
+import os
+import time
+import datetime
+import concurrent.futures
+import multiprocessing
+import queue
+import threading
+from multiprocessing import util as mp_util
+from typing import Literal, Iterable
+import pandas as pd
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports
+from .ids import normalize_id, id_to_url
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.batch')
+
+## Worker process state ########################################
+# Each worker process owns one long-lived TE_Scraper (and thus one webdriver) that is re-used for every URL sent to that process.
+_worker_scraper = None
+_worker_options = {"headless": True, "browser": "firefox"}
+
+def _init_worker(headless: bool = True, browser: str = "firefox"):
+    """Initializer for the worker processes of the pool. The webdriver is created lazily on the first job."""
+    global _worker_options
+    _worker_options = {"headless": headless, "browser": browser}
+    # atexit handlers are not run in pool worker processes, multiprocessing finalizers are.
+    mp_util.Finalize(None, _close_worker_scraper, exitpriority=10)
+
+def _get_worker_scraper():
+    """Return the TE_Scraper owned by this process, creating it (and a new webdriver) if needed."""
+    global _worker_scraper
+    if _worker_scraper is None or getattr(_worker_scraper, "driver", None) is None:
+        from .scraper import TE_Scraper
+        _worker_scraper = TE_Scraper(browser=_worker_options["browser"], headless=_worker_options["headless"])
+        logger.info(f"Worker process {os.getpid()} created a new TE_Scraper.")
+    return _worker_scraper
+
+def _close_worker_scraper():
+    """Close the TE_Scraper owned by this process, if any."""
+    global _worker_scraper
+    if _worker_scraper is not None:
+        try:
+            _worker_scraper.close()
+        except Exception as e:
+            logger.debug(f"Error closing worker scraper: {str(e)}")
+        _worker_scraper = None
+
+def _blank_result(id: str) -> dict:
+    return {"id": id, "url": id_to_url(id), "series": None, "metadata": None, "method": None, "timings": {}, "error": None}
+
+def _scrape_with(scraper, result: dict, method: str = "highcharts_api", start_date: str = None, end_date: str = None, wait_time: int = 5) -> dict:
+    """Scrape the series for result["url"] using the supplied TE_Scraper and fill in the result dict. Exceptions are left for the caller
+    to handle as the caller owns the scraper and must decide whether or not to discard it."""
+    from .scrape_chart import scrape_chart
+
+    scraped = scrape_chart(url=result["url"], scraper=scraper, method=method, start_date=start_date,
+                           end_date=end_date, wait_time=wait_time)
+    if scraped is None or getattr(scraped, "series", None) is None:
+        result["error"] = "Scraping failed, no series returned."
+    else:
+        result["series"] = scraped.series.copy()
+        result["metadata"] = scraped.series_metadata.copy() if hasattr(scraped, "series_metadata") else None
+        result["method"] = getattr(scraped, "method", method)  # The method that worked, when method is "auto".
+        result["timings"].update(getattr(scraped, "timings", {}))  # Stage timings of the scrape, see tedata.timing.
+    return result
+
+def _scrape_one(id: str, method: str = "highcharts_api", start_date: str = None, end_date: str = None, wait_time: int = 5) -> dict:
+    """Scrape a single series using the TE_Scraper owned by the current process. Returns a plain result dict
+    that can be sent back to the parent process."""
+
+    result = _blank_result(id)
+    timer = time.perf_counter()
+    try:
+        scraper = _get_worker_scraper()
+        result["timings"]["driver_ready"] = round(time.perf_counter() - timer, 4)
+        _scrape_with(scraper, result, method=method, start_date=start_date, end_date=end_date, wait_time=wait_time)
+    except Exception as e:
+        logger.info(f"Error scraping {id} in worker process {os.getpid()}: {str(e)}")
+        result["error"] = str(e)
+        _close_worker_scraper()  # The driver may be dead, a fresh one will be made for the next job.
+    result["timings"]["total"] = round(time.perf_counter() - timer, 4)
+    return result
+
+def _unique_ids(ids: Iterable[str]) -> list:
+    """Normalize ids and drop duplicates while keeping the order given."""
+    return list(dict.fromkeys(normalize_id(id) for id in ids))
+
+## Batch scraping API ########################################
+def scrape_many(ids: Iterable[str],
+                workers: int = 4,
+                method: Literal["path", "tooltips", "mixed", "highcharts_api", "auto"] = "highcharts_api",
+                return_when: Literal["all", "as_completed"] = "all",
+                start_date: str = None,
+                end_date: str = None,
+                headless: bool = True,
+                wait_time: int = 5,
+                browser: str = "firefox"):
+    """Scrape many series from Trading Economics in parallel. The work is spread across a pool of worker processes,
+    each of which owns one long-lived webdriver that is re-used for every chart sent to it. This avoids the cost of starting
+    a browser for every series.
+
+    **Parameters**
+    - ids (Iterable[str]): URLs or ids ("country/indicator") of the charts to scrape. Duplicates are dropped.
+    - workers (int): Number of worker processes (each runs its own browser). Use 1 to scrape sequentially in the current process.
+    - method (str): Scraping method passed to scrape_chart. Default is 'highcharts_api'.
+    - return_when (str): "all" (default) to wait for every series and return a dict. "as_completed" to return a generator
+    that yields (id, result) tuples as each series finishes.
+    - start_date, end_date (str): Passed to scrape_chart. Use "YYYY-MM-DD" format.
+    - headless (bool): Whether to run the browsers in headless mode.
+    - wait_time (int): Extra wait time after each page load, passed to scrape_chart.
+    - browser (str): Browser to use. Only 'firefox' is supported at the moment.
+
+    **Returns**
+    - dict of id -> result, or a generator of (id, result) tuples if return_when = "as_completed". Each result is a dict with keys:
+    "id", "url", "series" (pd.Series or None), "metadata" (pd.Series or None), "method" (method used, str or None), "timings" (dict, seconds)
+    and "error" (str or None).
+
+    **Example:**
+    ```
+    results = ted.scrape_many(["united-states/business-confidence", "australia/business-confidence"], workers=2)
+    results["australia/business-confidence"]["series"]
+    ```
+    """
+    if return_when not in ("all", "as_completed"):
+        raise ValueError("return_when must be either 'all' or 'as_completed'.")
+    unique_ids = _unique_ids(ids)
+    job_kwargs = {"method": method, "start_date": start_date, "end_date": end_date, "wait_time": wait_time}
+    logger.info(f"scrape_many: {len(unique_ids)} series to scrape using {workers} worker(s), method: {method}, time: {datetime.datetime.now()}")
+
+    if workers <= 1:
+        results = _run_in_process(unique_ids, job_kwargs, headless=headless, browser=browser)
+    else:
+        results = _run_in_pool(unique_ids, job_kwargs, workers=workers, headless=headless, browser=browser)
+
+    if return_when == "as_completed":
+        return results
+    return {id: result for id, result in results}
+
+def scrape_panel(countries: Iterable[str],
+                 indicator: str,
+                 method: Literal["path", "tooltips", "mixed", "highcharts_api", "auto"] = "highcharts_api",
+                 workers: int = 4,
+                 resample: str = None,
+                 agg: str = "last",
+                 start_date: str = None,
+                 end_date: str = None,
+                 headless: bool = True,
+                 wait_time: int = 5) -> tuple:
+    """Get the same indicator for many countries as a wide DataFrame with one column per country. The series are scraped concurrently
+    with scrape_many and aligned on a common DatetimeIndex in a single step.
+
+    **Parameters**
+    - countries (Iterable[str]): Countries as they appear in Trading Economics URLs e.g ["united-states", "australia"]. Spaces are
+    converted to dashes, so "united kingdom" also works.
+    - indicator (str): The indicator part of the URL e.g "business-confidence".
+    - method (str): Scraping method passed to scrape_chart. Default is 'highcharts_api'.
+    - workers (int): Number of worker processes (browsers) to use.
+    - resample (str): Optional pandas resample rule e.g "MS" or "QS" to put all series on a common frequency. Default None keeps the
+    union of all dates.
+    - agg (str): Aggregation used when resampling e.g "last", "mean" or "first". Default is "last".
+    - start_date, end_date (str): Passed to scrape_chart. Use "YYYY-MM-DD" format.
+    - headless (bool): Whether to run the browsers in headless mode.
+    - wait_time (int): Extra wait time after each page load, passed to scrape_chart.
+
+    **Returns**
+    - (data, metadata) tuple. data is a DataFrame with a DatetimeIndex and one column per country. metadata is a DataFrame with one
+    row per country holding the series metadata and an "error" column for countries that failed.
+
+    **Example:**
+    ```
+    data, meta = ted.scrape_panel(["united-states", "australia", "germany"], "business-confidence", resample="MS")
+    ```
+    """
+    indicator = normalize_id(indicator).split("/")[-1]
+    country_ids = {}
+    for country in countries:
+        country_key = "-".join(str(country).strip().lower().split())
+        country_ids[normalize_id(f"{country_key}/{indicator}")] = country_key
+
+    results = scrape_many(list(country_ids.keys()), workers=workers, method=method, start_date=start_date, end_date=end_date,
+                          headless=headless, wait_time=wait_time, return_when="all")
+
+    columns = {}
+    meta_rows = {}
+    for id, country in country_ids.items():
+        result = results.get(id, _blank_result(id))
+        row = result["metadata"].to_dict() if result["metadata"] is not None else {"id": id}
+        row["error"] = result["error"]
+        meta_rows[country] = row
+        if result["error"] is None and result["series"] is not None:
+            series = result["series"]
+            columns[country] = series[~series.index.duplicated(keep="last")]   # Spliced series can repeat dates.
+
+    # A single concat aligns all of the series on the union of their dates at once.
+    data = pd.concat(columns, axis=1).astype(float) if columns else pd.DataFrame(dtype=float)
+    data = data.reindex(columns=list(country_ids.values()))
+    data.index = pd.DatetimeIndex(data.index, name="date")
+    data = data.sort_index()
+    if resample is not None:
+        data = data.resample(resample).agg(agg)
+    metadata = pd.DataFrame.from_dict(meta_rows, orient="index")
+    metadata.index.rename("country", inplace=True)
+    logger.info(f"scrape_panel: {len(columns)} of {len(country_ids)} series scraped for indicator {indicator}.")
+    return data, metadata
+
+def _run_in_process(ids: list, job_kwargs: dict, headless: bool = True, browser: str = "firefox"):
+    """Generator that scrapes the ids one after another in the current process with a single re-used webdriver."""
+    global _worker_options
+    _worker_options = {"headless": headless, "browser": browser}
+    try:
+        for id in ids:
+            yield id, _scrape_one(id, **job_kwargs)
+    finally:
+        _close_worker_scraper()
+
+def _run_in_pool(ids: list, job_kwargs: dict, workers: int = 4, headless: bool = True, browser: str = "firefox"):
+    """Generator that scrapes the ids on a pool of worker processes and yields results as they finish."""
+    workers = min(workers, max(len(ids), 1))
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(headless, browser),
+                                                      mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = {executor.submit(_scrape_one, id, **job_kwargs): id for id in ids}
+        for future in concurrent.futures.as_completed(futures):
+            id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:   # e.g BrokenProcessPool if a worker died.
+                logger.info(f"Worker failed for {id}: {str(e)}")
+                result = _blank_result(id)
+                result["error"] = str(e)
+            logger.info(f"scrape_many: finished {id}, error: {result['error']}")
+            yield id, result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+## Thread-safe pool of scrapers ########################################
+class ScraperPool:
+    """Thread-safe pool of TE_Scraper objects, each holding its own webdriver. Scrapers are created lazily up to 'size' and handed out
+    to one thread at a time. This is used for in-process concurrency such as the asyncio API, where a process pool is not suitable.
+
+    **Init Parameters:**
+    - size (int): Maximum number of scrapers (browsers) in the pool.
+    - headless (bool): Whether to run the browsers in headless mode.
+    - browser (str): Browser to use. Only 'firefox' is supported at the moment.
+
+    **Example:**
+    ```
+    with ScraperPool(size=2) as pool:
+        scraper = pool.acquire()
+        try:
+            scrape_chart(id="united-states/gdp", scraper=scraper)
+        finally:
+            pool.release(scraper)
+    ```
+    """
+
+    def __init__(self, size: int = 4, headless: bool = True, browser: str = "firefox"):
+        if size < 1:
+            raise ValueError("ScraperPool size must be at least 1.")
+        self.size = size
+        self.headless = headless
+        self.browser = browser
+        self._idle = queue.LifoQueue()   # Most recently used first, keeps the number of warm browsers low.
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._in_use = set()
+        self.closed = False
+
+    def acquire(self, timeout: float = None):
+        """Get a scraper from the pool, creating one if no idle scraper is available. Blocks if all scrapers are in use.
+
+        **Parameters:**
+        - timeout (float): Maximum time to wait for a free scraper, in seconds. None waits forever.
+
+        **Returns:**
+        - TE_Scraper object. Hand it back with release() when done.
+        """
+        if self.closed:
+            raise RuntimeError("ScraperPool is closed.")
+        if not self._slots.acquire(timeout=timeout if timeout is not None else -1):
+            raise TimeoutError(f"No free scraper in pool after {timeout} s.")
+        try:
+            try:
+                scraper = self._idle.get_nowait()
+            except queue.Empty:
+                from .scraper import TE_Scraper
+                scraper = TE_Scraper(browser=self.browser, headless=self.headless)
+                logger.info(f"ScraperPool: created new TE_Scraper, pool size: {self.size}")
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_use.add(scraper)
+        return scraper
+
+    def release(self, scraper, discard: bool = False):
+        """Return a scraper to the pool.
+
+        **Parameters:**
+        - scraper (TE_Scraper): Scraper obtained from acquire().
+        - discard (bool): If True, or if the scraper's driver is gone, the scraper is closed rather than re-used.
+        """
+        with self._lock:
+            self._in_use.discard(scraper)
+        if discard or self.closed or getattr(scraper, "driver", None) is None:
+            _close_quietly(scraper)
+        else:
+            self._idle.put(scraper)
+        self._slots.release()
+
+    def close(self):
+        """Close all scrapers in the pool. Scrapers that are in use are closed too, which aborts their current webdriver command."""
+        self.closed = True
+        with self._lock:
+            in_use = list(self._in_use)
+        for scraper in in_use:
+            _close_quietly(scraper)
+        while True:
+            try:
+                _close_quietly(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        logger.info("ScraperPool closed.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+def _close_quietly(scraper):
+    try:
+        scraper.close()
+    except Exception as e:
+        logger.debug(f"Error closing scraper: {str(e)}")
@@ -0,0 +1,390 @@
+import os
+import time
+import json
+import pickle
+import sqlite3
+import threading
+import pandas as pd
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports. This module must stay importable without selenium.
+from .ids import normalize_id
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.cache')
+
+CACHE_DIR_ENV = "TEDATA_CACHE_DIR"
+
+## Standalone functions  ########################################
+def cache_dir() -> str:
+    """Directory for tedata's persistent caches: TEDATA_CACHE_DIR if set, otherwise ~/.tedata. Created if it does not exist."""
+    path = os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".tedata")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+######## SQLite backed stores ##############################
+class _Transaction:
+    """Context manager for an immediate (write locked) SQLite transaction. Taking the write lock up front makes read-modify-write
+    sequences (e.g JobQueue.lease) atomic across processes."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+
+class SQLiteStore:
+    """Base class for small persistent tables kept in a SQLite file in the cache directory. Safe to use from several threads and
+    processes at once. Sub-classes create their tables in _create_tables.
+
+    **Init Parameters:**
+    - path (str): Path of the SQLite file. Default is '<cache_dir>/<default_filename>'.
+    """
+    default_filename = "tedata_cache.db"
+    wal = True   # Use SQLite's write-ahead log journal. Needs shared memory, so sub-classes may turn it off for network filesystems.
+
+    def __init__(self, path: str = None):
+        self.path = os.path.abspath(path) if path else f"{cache_dir()}{fdel}{self.default_filename}"
+        self._local = threading.local()
+        with self._transaction() as conn:
+            self._create_tables(conn)
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        pass
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """SQLite connection for the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            if self.wal:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self.conn)
+
+    def close(self):
+        """Close the connection of the current thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+class MethodMemory(SQLiteStore):
+    """Remembers which scraping methods worked for each indicator and how long they took, so that scrape_chart(method="auto") can go
+    straight to the fastest method known to work for an id on later runs.
+
+    **Init Parameters:**
+    - path (str): Path of the SQLite file. Default is '<cache_dir>/method_memory.db'.
+    """
+    default_filename = "method_memory.db"
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("""CREATE TABLE IF NOT EXISTS method_stats (
+            id TEXT NOT NULL,
+            method TEXT NOT NULL,
+            successes INTEGER NOT NULL DEFAULT 0,
+            failures INTEGER NOT NULL DEFAULT 0,
+            last_ok INTEGER NOT NULL,
+            avg_elapsed REAL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (id, method))""")
+
+    def record(self, id: str, method: str, ok: bool, elapsed: float = None):
+        """Record an attempt to scrape 'id' with 'method'. The average time is a moving average over successful attempts."""
+        id = normalize_id(id)
+        with self._transaction() as conn:
+            row = conn.execute("SELECT avg_elapsed FROM method_stats WHERE id = ? AND method = ?", (id, method)).fetchone()
+            avg = row["avg_elapsed"] if row is not None else None
+            if ok and elapsed is not None:
+                avg = elapsed if avg is None else 0.7 * avg + 0.3 * elapsed
+            conn.execute("""INSERT INTO method_stats (id, method, successes, failures, last_ok, avg_elapsed, updated_at)
+                         VALUES (?, ?, ?, ?, ?, ?, ?)
+                         ON CONFLICT(id, method) DO UPDATE SET successes = successes + excluded.successes,
+                         failures = failures + excluded.failures, last_ok = excluded.last_ok,
+                         avg_elapsed = excluded.avg_elapsed, updated_at = excluded.updated_at""",
+                         (id, method, int(ok), int(not ok), int(ok), avg, time.time()))
+
+    def stats(self, id: str) -> dict:
+        """Recorded stats of each method for an id, {method: {"successes", "failures", "last_ok", "avg_elapsed"}}."""
+        rows = self.conn.execute("SELECT * FROM method_stats WHERE id = ?", (normalize_id(id),))
+        return {row["method"]: {"successes": row["successes"], "failures": row["failures"], "last_ok": bool(row["last_ok"]),
+                                "avg_elapsed": row["avg_elapsed"]} for row in rows}
+
+    def best_order(self, id: str, order) -> list:
+        """Order in which to try the methods in 'order' for an id: methods that worked last time, fastest first, then methods not yet
+        tried (in the given order), then methods that failed last time."""
+        stats = self.stats(id)
+        good = sorted((m for m in order if m in stats and stats[m]["last_ok"]), key=lambda m: stats[m]["avg_elapsed"] or float("inf"))
+        untried = [m for m in order if m not in stats]
+        bad = [m for m in order if m in stats and not stats[m]["last_ok"]]
+        return good + untried + bad
+
+## Series cache ########################################
+# Default time-to-live of cached series by data frequency, in seconds. Keys are the leading letters of pandas frequency strings
+# as returned by pd.infer_freq ("MS", "W-SUN", "QS-OCT" etc).
+DEFAULT_TTLS = {"B": 3600, "D": 3600, "W": 6 * 3600, "M": 24 * 3600, "BM": 24 * 3600, "Q": 2 * 24 * 3600, "BQ": 2 * 24 * 3600,
+                "Y": 7 * 24 * 3600, "BY": 7 * 24 * 3600, "A": 7 * 24 * 3600, "BA": 7 * 24 * 3600}
+DEFAULT_TTL = 6 * 3600  # Unknown or irregular frequency.
+
+def ttl_for(frequency: str, ttls: dict = None) -> float:
+    """Time-to-live in seconds for a series with the given pandas frequency string."""
+    ttls = ttls or DEFAULT_TTLS
+    if frequency:
+        frequency = str(frequency).upper()
+        for key in sorted(ttls, key=len, reverse=True):
+            if frequency.startswith(key):
+                return ttls[key]
+    return DEFAULT_TTL
+
+class SeriesCache(SQLiteStore):
+    """On-disk cache of scraped series and their metadata keyed by the normalized id ("country/indicator"). Entries expire after a
+    time-to-live that depends on the frequency of the series (e.g monthly data is kept for a day, weekly data for 6 hours). The total size
+    of the cache is capped; the least recently used entries are evicted when it is exceeded. Safe to share between processes.
+
+    **Init Parameters:**
+    - path (str): Path of the SQLite file. Default is '<cache_dir>/series_cache.db'.
+    - max_bytes (int): Size cap of the cached data in bytes. Default is 512 MB.
+    - ttls (dict): Time-to-live by frequency, see DEFAULT_TTLS.
+    """
+    default_filename = "series_cache.db"
+
+    def __init__(self, path: str = None, max_bytes: int = 512 * 1024 ** 2, ttls: dict = None):
+        self.max_bytes = max_bytes
+        self.ttls = ttls or DEFAULT_TTLS
+        super().__init__(path)
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("""CREATE TABLE IF NOT EXISTS series_cache (
+            id TEXT PRIMARY KEY,
+            frequency TEXT,
+            method TEXT,
+            fetched_at REAL NOT NULL,
+            last_access REAL NOT NULL,
+            size INTEGER NOT NULL,
+            payload BLOB NOT NULL)""")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_series_cache_access ON series_cache (last_access)")
+
+    def get(self, id: str, max_age: float = None, allow_stale: bool = False) -> dict:
+        """Cached series for an id.
+
+        **Parameters:**
+        - id (str): URL or id of the series.
+        - max_age (float): Maximum age in seconds, overrides the time-to-live for the series' frequency.
+        - allow_stale (bool): Return the entry even if it has expired, e.g as the base for an incremental update.
+
+        **Returns:**
+        - dict with keys "series" (pd.Series), "metadata" (pd.Series), "method", "frequency", "fetched_at" (epoch seconds), "age" (seconds)
+        and "stale" (bool), or None if there is no usable entry.
+        """
+        id = normalize_id(id)
+        row = self.conn.execute("SELECT frequency, method, fetched_at, payload FROM series_cache WHERE id = ?", (id,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        age = now - row["fetched_at"]
+        stale = age > (max_age if max_age is not None else ttl_for(row["frequency"], self.ttls))
+        if stale and not allow_stale:
+            logger.debug(f"SeriesCache: entry for {id} expired, age: {age:.0f} s.")
+            return None
+        try:
+            entry = pickle.loads(row["payload"])
+        except Exception as e:
+            logger.info(f"SeriesCache: dropping unreadable entry for {id}: {str(e)}")
+            self.delete(id)
+            return None
+        with self._transaction() as conn:
+            conn.execute("UPDATE series_cache SET last_access = ? WHERE id = ?", (now, id))
+        entry.update({"method": row["method"], "frequency": row["frequency"], "fetched_at": row["fetched_at"], "age": age, "stale": stale})
+        return entry
+
+    def put(self, id: str, series, metadata=None, method: str = None, fetched_at: float = None):
+        """Store a series and its metadata (pd.Series or dict), then evict least recently used entries if the cache is over its size cap."""
+        id = normalize_id(id)
+        if isinstance(metadata, dict):
+            metadata = pd.Series(metadata)
+        frequency = metadata.get("frequency") if metadata is not None else None
+        payload = pickle.dumps({"series": series, "metadata": metadata}, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("""INSERT OR REPLACE INTO series_cache (id, frequency, method, fetched_at, last_access, size, payload)
+                         VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                         (id, None if frequency is None else str(frequency), method, fetched_at or now, now, len(payload), payload))
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) AS total FROM series_cache").fetchone()["total"]
+        if total <= self.max_bytes:
+            return
+        evicted = 0
+        for row in conn.execute("SELECT id, size FROM series_cache ORDER BY last_access").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM series_cache WHERE id = ?", (row["id"],))
+            total -= row["size"]
+            evicted += 1
+        logger.info(f"SeriesCache: evicted {evicted} least recently used entries.")
+
+    def delete(self, id: str):
+        """Remove the entry for an id."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM series_cache WHERE id = ?", (normalize_id(id),))
+
+    def clear(self):
+        """Remove all entries."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM series_cache")
+
+    def info(self) -> pd.DataFrame:
+        """Table of the cached entries with their frequency, size, fetch & last access times."""
+        df = pd.read_sql_query("SELECT id, frequency, method, fetched_at, last_access, size FROM series_cache ORDER BY id", self.conn)
+        for col in ["fetched_at", "last_access"]:
+            df[col] = pd.to_datetime(df[col], unit="s")
+        return df.set_index("id")
+
+## Metadata cache ########################################
+# Metadata fields that describe the indicator rather than the data, these rarely change.
+STATIC_METADATA_FIELDS = ("units", "original_source", "title", "indicator", "country", "source", "id", "description")
+
+class MetadataCache(SQLiteStore):
+    """Long-lived cache of the static series metadata scraped from the page by TE_Scraper.scrape_metadata (units, source, title,
+    description etc), keyed by the normalized id. With a hit, scrape_chart can skip parsing the full page.
+
+    **Init Parameters:**
+    - path (str): Path of the SQLite file. Default is '<cache_dir>/metadata_cache.db'.
+    - ttl (float): Time-to-live of entries in seconds. Default is 30 days.
+    """
+    default_filename = "metadata_cache.db"
+
+    def __init__(self, path: str = None, ttl: float = 30 * 24 * 3600):
+        self.ttl = ttl
+        super().__init__(path)
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("""CREATE TABLE IF NOT EXISTS metadata_cache (
+            id TEXT PRIMARY KEY,
+            metadata TEXT NOT NULL,
+            fetched_at REAL NOT NULL)""")
+
+    def get(self, id: str, max_age: float = None) -> dict:
+        """Static metadata for an id as a dict, or None if there is no entry younger than max_age (default: the cache's ttl)."""
+        row = self.conn.execute("SELECT metadata, fetched_at FROM metadata_cache WHERE id = ?", (normalize_id(id),)).fetchone()
+        if row is None or time.time() - row["fetched_at"] > (max_age if max_age is not None else self.ttl):
+            return None
+        return json.loads(row["metadata"])
+
+    def put(self, id: str, metadata):
+        """Store the static fields (STATIC_METADATA_FIELDS) of a metadata dict or pd.Series."""
+        if isinstance(metadata, pd.Series):
+            metadata = metadata.to_dict()
+        static = {key: metadata[key] for key in STATIC_METADATA_FIELDS if key in metadata}
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO metadata_cache (id, metadata, fetched_at) VALUES (?, ?, ?)",
+                         (normalize_id(id), json.dumps(static, default=str), time.time()))
+
+    def delete(self, id: str):
+        """Remove the entry for an id."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM metadata_cache WHERE id = ?", (normalize_id(id),))
+
+## Search cache ########################################
+def normalize_query(query: str) -> str:
+    """Normalize a search query for use as a cache key: lower case with single spaces."""
+    return " ".join(str(query).lower().split())
+
+class SearchCache(SQLiteStore):
+    """Cache of Trading Economics search results (the result URLs) keyed by the normalized search query.
+
+    **Init Parameters:**
+    - path (str): Path of the SQLite file. Default is '<cache_dir>/search_cache.db'.
+    - ttl (float): Time-to-live of entries in seconds. Default is 7 days.
+    """
+    default_filename = "search_cache.db"
+
+    def __init__(self, path: str = None, ttl: float = 7 * 24 * 3600):
+        self.ttl = ttl
+        super().__init__(path)
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("""CREATE TABLE IF NOT EXISTS search_cache (
+            query TEXT PRIMARY KEY,
+            results TEXT NOT NULL,
+            fetched_at REAL NOT NULL)""")
+
+    def get(self, query: str, max_age: float = None, allow_stale: bool = False) -> dict:
+        """Cached results for a query.
+
+        **Returns:**
+        - dict with keys "results" (list of URLs), "fetched_at", "age" (seconds) and "stale" (bool), or None if there is no usable entry.
+        """
+        row = self.conn.execute("SELECT results, fetched_at FROM search_cache WHERE query = ?", (normalize_query(query),)).fetchone()
+        if row is None:
+            return None
+        age = time.time() - row["fetched_at"]
+        stale = age > (max_age if max_age is not None else self.ttl)
+        if stale and not allow_stale:
+            return None
+        return {"results": json.loads(row["results"]), "fetched_at": row["fetched_at"], "age": age, "stale": stale}
+
+    def put(self, query: str, results: list):
+        """Store the result URLs of a query."""
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO search_cache (query, results, fetched_at) VALUES (?, ?, ?)",
+                         (normalize_query(query), json.dumps(list(results)), time.time()))
+
+## Frequency cache ########################################
+class FrequencyCache(SQLiteStore):
+    """Per indicator store of the data frequency, weekly anchor day and first point of a series, as determined from the chart tooltips by
+    TE_Scraper.make_x_index. These practically never change, so with a hit only the end point of the series needs to be probed.
+
+    **Init Parameters:**
+    - path (str): Path of the SQLite file. Default is '<cache_dir>/frequency_cache.db'.
+    - ttl (float): Time-to-live of entries in seconds. Default is 90 days.
+    """
+    default_filename = "frequency_cache.db"
+
+    def __init__(self, path: str = None, ttl: float = 90 * 24 * 3600):
+        self.ttl = ttl
+        super().__init__(path)
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("""CREATE TABLE IF NOT EXISTS frequency_cache (
+            id TEXT PRIMARY KEY,
+            frequency TEXT NOT NULL,
+            weekly_anchor TEXT,
+            start_date TEXT NOT NULL,
+            start_value REAL,
+            updated_at REAL NOT NULL)""")
+
+    def get(self, id: str) -> dict:
+        """Stored values for an id, dict with keys "frequency", "weekly_anchor", "start_date" ("YYYY-MM-DD") and "start_value", or None."""
+        row = self.conn.execute("SELECT * FROM frequency_cache WHERE id = ?", (normalize_id(id),)).fetchone()
+        if row is None or time.time() - row["updated_at"] > self.ttl:
+            return None
+        return {"frequency": row["frequency"], "weekly_anchor": row["weekly_anchor"], "start_date": row["start_date"],
+                "start_value": row["start_value"]}
+
+    def put(self, id: str, frequency: str, start_date, start_value: float = None):
+        """Store the frequency (pandas frequency string e.g "MS" or "W-SUN") and the first point of a series."""
+        frequency = str(frequency)
+        weekly_anchor = frequency.split("-", 1)[1] if frequency.startswith("W-") else None
+        start_value = None if start_value is None or pd.isna(start_value) else float(start_value)
+        with self._transaction() as conn:
+            conn.execute("""INSERT OR REPLACE INTO frequency_cache (id, frequency, weekly_anchor, start_date, start_value, updated_at)
+                         VALUES (?, ?, ?, ?, ?, ?)""",
+                         (normalize_id(id), frequency, weekly_anchor, pd.Timestamp(start_date).strftime("%Y-%m-%d"), start_value, time.time()))
@@ -0,0 +1,287 @@
+import os
+import json
+import heapq
+import datetime
+from typing import Literal, Mapping
+import numpy as np
+import pandas as pd
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports
+from .ids import normalize_id
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.export')
+
+ExportFormat = Literal["xlsx", "csv", "parquet", "arrow", "jsonl"]
+EXPORT_FORMATS = ("xlsx", "csv", "parquet", "arrow", "jsonl")
+COLUMNAR_FORMATS = ("parquet", "arrow")   # Metadata is embedded in the file schema for these, no sidecar json file.
+ARROW_METADATA_KEY = b"tedata"
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.feather
+    except ImportError:
+        raise ImportError("pyarrow is needed for the 'parquet' and 'arrow' formats. Install it with: pip install pyarrow")
+    return pyarrow
+
+## Standalone functions  ########################################
+def metadata_to_dict(metadata) -> dict:
+    """Convert series metadata (pd.Series or dict) to a plain dict with JSON serializable values."""
+    if metadata is None:
+        return {}
+    if isinstance(metadata, pd.Series):
+        metadata = metadata.to_dict()
+    clean = {}
+    for key, value in metadata.items():
+        if isinstance(value, (pd.Timestamp, pd.Timedelta)):
+            value = str(value)
+        elif hasattr(value, "item"):  # numpy scalars
+            value = value.item()
+        if isinstance(value, float) and value != value:  # NaN
+            value = None
+        clean[str(key)] = value
+    return clean
+
+def iter_series_entries(series, metadata: dict = None):
+    """Yield (id, series, metadata) tuples from any of the ways tedata holds many series:
+    a dict of id -> pd.Series, a dict of id -> result as returned by scrape_many, a SeriesStore or SeriesArchive (anything with ids(), get(id)
+    and metadata(id)), or an iterable of (id, series) or (id, series, metadata) tuples. Failed scrape_many results are skipped.
+    'metadata' is an optional dict of id -> metadata for series given without metadata."""
+    metadata = metadata or {}
+    if all(hasattr(series, attr) for attr in ("ids", "get", "metadata")) and not isinstance(series, Mapping):
+        for id in series.ids():
+            yield id, series.get(id), series.metadata(id)
+        return
+    items = series.items() if isinstance(series, Mapping) else series
+    for item in items:
+        if len(item) == 2:
+            id, data = item
+            meta = metadata.get(id)
+            if isinstance(data, dict):   # scrape_many result.
+                if data.get("error") is not None or data.get("series") is None:
+                    continue
+                data, meta = data["series"], data.get("metadata") if meta is None else meta
+        else:
+            id, data, meta = item
+        yield normalize_id(id), data, meta
+
+def default_filename(series_id: str) -> str:
+    """Make a filename like 'united-states_business-confidence' from an id or URL."""
+    parts = series_id.strip("/").split("/")
+    return "_".join(parts[-2:])
+
+def series_to_table(series: pd.Series, metadata=None):
+    """Convert a series to a pyarrow Table with a 'date' timestamp column and one value column. The metadata is stored as JSON in the
+    schema metadata under the b"tedata" key, next to the pandas metadata that restores the DatetimeIndex on reading."""
+    pa = _import_pyarrow()
+    frame = series.to_frame(name=str(series.name) if series.name is not None else "value")
+    frame.index.name = "date"
+    table = pa.Table.from_pandas(frame, preserve_index=True)
+    schema_meta = dict(table.schema.metadata or {})
+    schema_meta[ARROW_METADATA_KEY] = json.dumps(metadata_to_dict(metadata), default=str).encode("utf-8")
+    return table.replace_schema_metadata(schema_meta)
+
+def table_metadata(table) -> dict:
+    """Get the series metadata dict stored in the schema of a pyarrow Table made by series_to_table."""
+    schema_meta = table.schema.metadata or {}
+    return json.loads(schema_meta[ARROW_METADATA_KEY].decode("utf-8")) if ARROW_METADATA_KEY in schema_meta else {}
+
+def table_to_series(table) -> tuple:
+    """Inverse of series_to_table. Returns (series, metadata dict). A value column named "value" gives an unnamed series."""
+    series = table.to_pandas().iloc[:, 0]
+    if series.name == "value":
+        series.name = None
+    return series, table_metadata(table)
+
+def write_series(series: pd.Series,
+                 metadata=None,
+                 filename: str = None,
+                 out_dir: str = None,
+                 format: ExportFormat = "xlsx") -> str:
+    """Write a scraped series and its metadata to disk.
+
+    **Parameters**
+    - series (pd.Series): The time-series to write.
+    - metadata (pd.Series or dict): Series metadata, e.g the 'series_metadata' attribute of a TE_Scraper.
+    - filename (str): File name without extension. Default is made from the metadata id e.g 'united-states_gdp'.
+    - out_dir (str): Directory to write to. Default is the current working directory.
+    - format (str): One of "xlsx", "csv", "parquet", "arrow" or "jsonl". For "xlsx" the metadata is written to a 'Metadata' sheet,
+    for "parquet" and "arrow" (Arrow IPC / Feather v2 file, uncompressed for memory mapped reads) it is embedded in the file schema.
+    For "csv" and "jsonl" it is written to a '<filename>_metadata.json' file alongside the data file. "parquet" and "arrow" need pyarrow.
+
+    **Returns**
+    - path (str): Path of the data file written.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {format}, use one of {EXPORT_FORMATS}")
+    meta = metadata_to_dict(metadata)
+    if out_dir is None:
+        out_dir = os.getcwd()
+    os.makedirs(out_dir, exist_ok=True)
+    if filename is None:
+        filename = default_filename(meta["id"]) if meta.get("id") else str(series.name or "series").replace(" ", "_")
+    path = f"{out_dir}{fdel}{filename}.{format}"
+
+    if format == "xlsx":
+        with pd.ExcelWriter(path) as writer:
+            series.to_excel(writer, sheet_name='Data')
+            pd.Series(meta, dtype=object).to_excel(writer, sheet_name='Metadata')
+    elif format in COLUMNAR_FORMATS:
+        pa = _import_pyarrow()
+        table = series_to_table(series, meta)
+        if format == "parquet":
+            pa.parquet.write_table(table, path)
+        else:
+            pa.feather.write_feather(table, path, compression="uncompressed")
+    else:
+        if format == "csv":
+            series.to_csv(path)
+        elif format == "jsonl":
+            with open(path, "w", encoding="utf-8") as f:
+                for date, value in series.items():
+                    f.write(json.dumps({"date": pd.Timestamp(date).isoformat(),
+                                        "value": None if pd.isna(value) else float(value)}) + "\n")
+        with open(f"{out_dir}{fdel}{filename}_metadata.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, default=str)
+
+    logger.info(f"Data exported to {path}")
+    return path
+
+def read_series(path: str, as_table: bool = False) -> tuple:
+    """Read a series written by write_series. Parquet and Arrow files are memory mapped, so reading an Arrow file is a zero-copy load
+    of the columns (the conversion to pandas then only copies the date index).
+
+    **Parameters**
+    - path (str): Path of the data file. The format is taken from the file extension.
+    - as_table (bool): For "parquet" and "arrow" files, return the pyarrow Table instead of a pd.Series. Use this to work with the
+    columns without any copy.
+
+    **Returns**
+    - (series, metadata) tuple. series is a pd.Series with a DatetimeIndex (or a pyarrow Table if as_table), metadata is a dict.
+    """
+    format = os.path.splitext(path)[1].lstrip(".").lower()
+    if format == "feather":
+        format = "arrow"
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported file type: {path}, use one of {EXPORT_FORMATS}")
+
+    if format in COLUMNAR_FORMATS:
+        pa = _import_pyarrow()
+        if format == "parquet":
+            table = pa.parquet.read_table(path, memory_map=True)
+        else:
+            with pa.memory_map(path, "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+        if as_table:
+            return table, table_metadata(table)
+        return table_to_series(table)
+
+    if format == "xlsx":
+        series = pd.read_excel(path, sheet_name="Data", index_col=0).iloc[:, 0]
+        metadata = pd.read_excel(path, sheet_name="Metadata", index_col=0).iloc[:, 0].to_dict()
+    else:
+        if format == "csv":
+            series = pd.read_csv(path, index_col=0, parse_dates=True).iloc[:, 0]
+        else:
+            frame = pd.read_json(path, lines=True, convert_dates=["date"])
+            series = frame.set_index("date")["value"].astype(float)
+        meta_path = f"{os.path.splitext(path)[0]}_metadata.json"
+        metadata = {}
+        if os.path.isfile(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+    series.index = pd.DatetimeIndex(series.index)
+    return series, metadata
+
+def _dated_points(series: pd.Series):
+    """(date, value) tuples of a series in date order, dates as integer nanoseconds. Series already in date order (e.g memory mapped
+    SeriesArchive series) are read in place, without a sorted copy."""
+    dates = pd.DatetimeIndex(series.index).asi8
+    values = series.to_numpy(dtype="float64")
+    if not series.index.is_monotonic_increasing:
+        order = np.argsort(dates, kind="stable")
+        dates, values = dates[order], values[order]
+    for i in range(len(dates)):
+        yield int(dates[i]), values[i]
+
+def _with_column(column: int, points):
+    """(date, column, value) tuples for the k-way merge in write_workbook."""
+    for date, value in points:
+        yield date, column, value
+
+def _workbook_columns(series, metadata: dict = None):
+    """(id, points, metadata dict) of each series to write with write_workbook, points being an iterator of (date, value) in date order.
+    The points of a SeriesStore are read through a database cursor (SeriesStore.iter_points), so stored series are never loaded whole."""
+    if hasattr(series, "iter_points") and hasattr(series, "ids"):
+        for id in series.ids():
+            yield id, series.iter_points(id), metadata_to_dict(series.metadata(id))
+        return
+    for id, data, meta in iter_series_entries(series, metadata):
+        yield id, _dated_points(data), metadata_to_dict(meta)
+
+def write_workbook(path: str, series, metadata: dict = None, date_format: str = "yyyy-mm-dd") -> str:
+    """Write many series into one Excel workbook: a wide 'Data' sheet with a date column and one column per series, aligned on dates,
+    and a 'Metadata' sheet with one row per series. The workbook is streamed with openpyxl's write_only mode and the rows of the Data
+    sheet are built one at a time by lazily merging the date ordered points of the series (heapq.merge). Series in a SeriesStore are
+    read through database cursors and SeriesArchive series are memory mapped, so for these memory use stays flat however many series
+    and rows are written; series given in memory (dicts, scrape_many results) are not copied.
+
+    **Parameters**
+    - path (str): Path of the .xlsx file to write.
+    - series: Series to write, see iter_series_entries for the accepted inputs (dict of id -> series, scrape_many results, SeriesStore,
+    SeriesArchive, or (id, series, metadata) tuples).
+    - metadata (dict): Optional dict of id -> metadata for series given without metadata.
+    - date_format (str): Excel number format of the date column.
+
+    **Returns**
+    - path (str): Path of the workbook written.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    ids, metas, columns = [], [], []
+    for col, (id, points, meta) in enumerate(_workbook_columns(series, metadata)):
+        ids.append(id)
+        metas.append(meta)
+        columns.append(_with_column(col, points))
+    workbook = Workbook(write_only=True)
+    data_sheet = workbook.create_sheet("Data")
+    meta_sheet = workbook.create_sheet("Metadata")
+
+    data_sheet.append(["date"] + ids)
+    n_cols = len(ids)
+    row, row_date, n_rows = None, None, 0
+    for date, col, value in heapq.merge(*columns):
+        if date != row_date:
+            if row is not None:
+                data_sheet.append(row)
+                n_rows += 1
+            row_date = date
+            cell = WriteOnlyCell(data_sheet, value=pd.Timestamp(date).to_pydatetime())
+            cell.number_format = date_format
+            row = [cell] + [None] * n_cols
+        row[col + 1] = None if value is None or value != value else float(value)   # Empty cell for NaN.
+    if row is not None:
+        data_sheet.append(row)
+        n_rows += 1
+
+    fields = list(dict.fromkeys(key for meta in metas for key in meta))
+    meta_sheet.append(["id"] + fields)
+    for id, meta in zip(ids, metas):
+        meta_sheet.append([id] + [_excel_value(meta.get(field)) for field in fields])
+
+    workbook.save(path)
+    logger.info(f"write_workbook: {n_cols} series, {n_rows} rows written to {path}")
+    return path
+
+def _excel_value(value):
+    """Metadata values that openpyxl can't write (lists, dicts) are written as JSON text."""
+    if value is None or isinstance(value, (str, int, float, bool, datetime.datetime, datetime.date)):
+        return value
+    return json.dumps(value, default=str)
@@ -0,0 +1,45 @@
+import os
+
+##### Get the directory where this file is housed ########################
+wd = os.path.dirname(__file__)
+fdel= os.path.sep
+
+## This module is deliberately kept free of selenium, bs4 & pandas imports. It is used by the batch, caching and storage
+# modules to build the keys that identify a series, e.g "united-states/business-confidence".
+
+BASE_URL = "https://tradingeconomics.com"
+
+def normalize_id(url_or_id: str, country: str = "united-states") -> str:
+    """Normalize a Trading Economics chart URL or id to the form "country/indicator". This is the key used to identify a series
+    throughout tedata (batch results, caches & local stores).
+
+    **Parameters:**
+    - url_or_id (str): Full URL of the chart e.g 'https://tradingeconomics.com/united-states/business-confidence', an id like
+    'united-states/business-confidence' or just the indicator e.g 'business-confidence'.
+    - country (str): Country to use if only the indicator is supplied. Default is 'united-states'.
+
+    **Returns:**
+    - id (str): The normalized id e.g 'united-states/business-confidence'.
+    """
+    if not isinstance(url_or_id, str) or not url_or_id.strip():
+        raise ValueError(f"Invalid URL or id supplied: {url_or_id!r}")
+
+    id_str = url_or_id.strip().split("#")[0].split("?")[0]
+    if "://" in id_str:
+        id_str = id_str.split("://", 1)[1]
+    if id_str.lower().startswith("www."):
+        id_str = id_str[4:]
+    if id_str.lower().startswith("tradingeconomics.com"):
+        id_str = id_str[len("tradingeconomics.com"):]
+
+    parts = [part for part in id_str.strip("/").lower().split("/") if part]
+    if len(parts) == 0:
+        raise ValueError(f"Invalid URL or id supplied: {url_or_id!r}")
+    elif len(parts) == 1:
+        return f"{country.strip().lower()}/{parts[0]}"
+    else:
+        return "/".join(parts[-2:])
+
+def id_to_url(url_or_id: str, country: str = "united-states") -> str:
+    """Get the full chart URL for an id, URL or indicator. See normalize_id for accepted inputs."""
+    return f"{BASE_URL}/{normalize_id(url_or_id, country=country)}"
@@ -0,0 +1,315 @@
+import os
+import json
+import time
+import socket
+import hashlib
+import sqlite3
+import threading
+import datetime
+import multiprocessing
+from typing import Iterable
+import pandas as pd
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports
+from .ids import normalize_id
+from .cache import SQLiteStore
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.jobqueue')
+
+######## Persistent job queue for large scrape runs ##############################
+class JobQueue(SQLiteStore):
+    """Persistent, resumable job queue for large scrape runs, stored in a SQLite file. Progress survives crashes of the workers
+    (or of the whole machine), so a run of thousands of indicators can be restarted and will carry on where it stopped.
+
+    Jobs are leased to a worker for 'lease_timeout' seconds. A lease that is not completed, failed or extended before it expires
+    (e.g because the worker died) is reclaimed automatically the next time any worker asks for a job. Failed jobs are retried until
+    they have been attempted max_retries + 1 times. Higher priority jobs are handed out first.
+
+    The queue is safe to share between threads and processes on the same machine.
+
+    **Init Parameters:**
+    - path (str): Path of the SQLite file. Created if it does not exist.
+    - wal (bool): Use SQLite's write-ahead log journal. Faster, but it needs shared memory so it must be False if the file is on a
+    network filesystem shared by several hosts. Default is True.
+
+    **Example:**
+    ```
+    queue = JobQueue("crawl.db")
+    queue.enqueue(["united-states/gdp", "australia/gdp"], priority=1)
+    run_worker(queue, out_dir="data")   # Or run_workers("crawl.db", workers=4, out_dir="data")
+    queue.stats()
+    ```
+    """
+    default_filename = "tedata_jobs.db"
+
+    def __init__(self, path: str = "tedata_jobs.db", wal: bool = True):
+        self.wal = wal
+        super().__init__(path)
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            method TEXT,
+            priority INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_retries INTEGER NOT NULL DEFAULT 3,
+            worker TEXT,
+            lease_expires REAL,
+            last_error TEXT,
+            result TEXT,
+            shard INTEGER,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL)""")
+        columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+        if "shard" not in columns:  # Queue files made before sharding was added.
+            conn.execute("ALTER TABLE jobs ADD COLUMN shard INTEGER")
+            for row in conn.execute("SELECT job_id, id FROM jobs").fetchall():
+                conn.execute("UPDATE jobs SET shard = ? WHERE job_id = ?", (shard_key(row["id"]), row["job_id"]))
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_next ON jobs (status, priority DESC, job_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_shard ON jobs (status, shard)")
+
+    def enqueue(self, ids: Iterable[str], priority: int = 0, method: str = None, max_retries: int = 3, requeue_done: bool = False) -> int:
+        """Add series to the queue. Ids already in the queue keep their state unless requeue_done is True, in which case finished
+        and failed jobs are set back to pending.
+
+        **Parameters:**
+        - ids (Iterable[str]): URLs or ids ("country/indicator") to scrape.
+        - priority (int): Higher priority jobs are leased first. Default is 0.
+        - method (str): Scraping method for these jobs. None uses the worker's default method.
+        - max_retries (int): Number of times a failed job is retried.
+        - requeue_done (bool): Set existing done/failed jobs back to pending, e.g for a refresh run.
+
+        **Returns:**
+        - int: Number of jobs that were added or re-queued.
+        """
+        now = time.time()
+        count = 0
+        with self._transaction() as conn:
+            for id in ids:
+                id = normalize_id(id)
+                cur = conn.execute("""INSERT OR IGNORE INTO jobs (id, method, priority, max_retries, shard, created_at, updated_at)
+                                   VALUES (?, ?, ?, ?, ?, ?, ?)""", (id, method, priority, max_retries, shard_key(id), now, now))
+                if cur.rowcount == 0 and requeue_done:
+                    cur = conn.execute("""UPDATE jobs SET status = 'pending', attempts = 0, priority = ?, method = COALESCE(?, method),
+                                       max_retries = ?, worker = NULL, lease_expires = NULL, updated_at = ?
+                                       WHERE id = ? AND status IN ('done', 'failed')""", (priority, method, max_retries, now, id))
+                count += cur.rowcount
+        logger.info(f"JobQueue: {count} job(s) enqueued in {self.path}")
+        return count
+
+    def reclaim_expired(self) -> int:
+        """Put jobs whose lease has expired back to pending (or failed, if out of retries). Returns the number of jobs reclaimed.
+        This is also done automatically on every call to lease()."""
+        with self._transaction() as conn:
+            return self._reclaim_expired(conn, time.time())
+
+    def _reclaim_expired(self, conn: sqlite3.Connection, now: float) -> int:
+        cur = conn.execute("""UPDATE jobs SET
+                           status = CASE WHEN attempts > max_retries THEN 'failed' ELSE 'pending' END,
+                           last_error = 'Lease expired (worker: ' || COALESCE(worker, '?') || ')',
+                           worker = NULL, lease_expires = NULL, updated_at = ?
+                           WHERE status = 'leased' AND lease_expires < ?""", (now, now))
+        if cur.rowcount:
+            logger.info(f"JobQueue: reclaimed {cur.rowcount} expired lease(s).")
+        return cur.rowcount
+
+    def lease(self, worker: str = None, lease_timeout: float = 900) -> dict:
+        """Lease the next job. The job must be completed, failed or have its lease extended within lease_timeout seconds
+        or it will be handed to another worker.
+
+        **Parameters:**
+        - worker (str): Name of the worker taking the job. Default is "hostname:pid".
+        - lease_timeout (float): Lease duration in seconds.
+
+        **Returns:**
+        - dict with keys "job_id", "id", "method", "priority", "attempts", "worker", "lease_expires", or None if there are no pending jobs.
+        """
+        worker = worker or default_worker_name()
+        now = time.time()
+        with self._transaction() as conn:
+            self._reclaim_expired(conn, now)
+            row = conn.execute("""SELECT job_id FROM jobs WHERE status = 'pending'
+                               ORDER BY priority DESC, job_id LIMIT 1""").fetchone()
+            if row is None:
+                return None
+            conn.execute("""UPDATE jobs SET status = 'leased', attempts = attempts + 1, worker = ?, lease_expires = ?, updated_at = ?
+                         WHERE job_id = ?""", (worker, now + lease_timeout, now, row["job_id"]))
+            job = conn.execute("""SELECT job_id, id, method, priority, attempts, worker, lease_expires FROM jobs
+                               WHERE job_id = ?""", (row["job_id"],)).fetchone()
+        return dict(job)
+
+    def extend_lease(self, job: dict, lease_timeout: float = 900) -> bool:
+        """Extend the lease on a job (heartbeat). Returns False if the job is no longer leased to this worker."""
+        now = time.time()
+        with self._transaction() as conn:
+            cur = conn.execute("""UPDATE jobs SET lease_expires = ?, updated_at = ?
+                               WHERE job_id = ? AND status = 'leased' AND worker = ?""",
+                               (now + lease_timeout, now, job["job_id"], job["worker"]))
+        if cur.rowcount:
+            job["lease_expires"] = now + lease_timeout
+        return cur.rowcount == 1
+
+    def complete(self, job: dict, result: dict = None) -> bool:
+        """Mark a leased job as done. 'result' is an optional JSON serializable dict stored with the job (e.g the output path).
+        Returns False if the lease had already been lost to another worker."""
+        with self._transaction() as conn:
+            cur = conn.execute("""UPDATE jobs SET status = 'done', result = ?, last_error = NULL, lease_expires = NULL, updated_at = ?
+                               WHERE job_id = ? AND status = 'leased' AND worker = ?""",
+                               (json.dumps(result, default=str) if result is not None else None, time.time(), job["job_id"], job["worker"]))
+        if cur.rowcount == 0:
+            logger.info(f"JobQueue: could not complete job {job['id']}, lease was lost.")
+        return cur.rowcount == 1
+
+    def fail(self, job: dict, error: str = None) -> str:
+        """Record a failed attempt of a leased job. The job goes back to pending if it has retries left, otherwise it is marked failed.
+
+        **Returns:**
+        - str: The new status of the job, "pending" or "failed", or None if the lease had already been lost.
+        """
+        with self._transaction() as conn:
+            cur = conn.execute("""UPDATE jobs SET
+                               status = CASE WHEN attempts > max_retries THEN 'failed' ELSE 'pending' END,
+                               last_error = ?, worker = NULL, lease_expires = NULL, updated_at = ?
+                               WHERE job_id = ? AND status = 'leased' AND worker = ?""",
+                               (error, time.time(), job["job_id"], job["worker"]))
+            if cur.rowcount == 0:
+                return None
+            status = conn.execute("SELECT status FROM jobs WHERE job_id = ?", (job["job_id"],)).fetchone()["status"]
+        logger.info(f"JobQueue: job {job['id']} failed (attempt {job['attempts']}), new status: {status}, error: {error}")
+        return status
+
+    def reset_failed(self) -> int:
+        """Set all failed jobs back to pending with their attempt counts reset. Returns the number of jobs reset."""
+        with self._transaction() as conn:
+            cur = conn.execute("UPDATE jobs SET status = 'pending', attempts = 0, updated_at = ? WHERE status = 'failed'", (time.time(),))
+        return cur.rowcount
+
+    def stats(self) -> dict:
+        """Number of jobs in each state: pending, leased, done & failed."""
+        counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for row in self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    def jobs(self, status: str = None) -> pd.DataFrame:
+        """Table of the jobs in the queue, optionally only those with the given status."""
+        query = "SELECT * FROM jobs" + (" WHERE status = ?" if status else "") + " ORDER BY job_id"
+        df = pd.read_sql_query(query, self.conn, params=(status,) if status else None)
+        for col in ["lease_expires", "created_at", "updated_at"]:
+            df[col] = pd.to_datetime(df[col], unit="s")
+        return df.set_index("job_id")
+
+def shard_key(id: str) -> int:
+    """Stable 63 bit hash of a normalized id, used to place jobs on the consistent hash ring (see tedata.sharding)."""
+    return int.from_bytes(hashlib.md5(id.encode("utf-8")).digest()[:8], "big") >> 1
+
+def default_worker_name() -> str:
+    """Worker name used for leases, "hostname:pid"."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class _LeaseKeeper(threading.Thread):
+    """Background thread that keeps extending the lease on a job while a long scrape is running."""
+
+    def __init__(self, queue: JobQueue, job: dict, lease_timeout: float):
+        super().__init__(daemon=True)
+        self.queue = JobQueue(queue.path, wal=queue.wal)  # Own connection for this thread.
+        self.job = dict(job)
+        self.lease_timeout = lease_timeout
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(max(self.lease_timeout / 3, 1)):
+            if not self.queue.extend_lease(self.job, self.lease_timeout):
+                break
+        self.queue.close()
+
+    def stop(self):
+        self.stopped.set()
+
+## Workers ########################################
+def run_worker(queue,
+               method: str = "highcharts_api",
+               out_dir: str = None,
+               format: str = "xlsx",
+               handler=None,
+               lease_timeout: float = 900,
+               max_jobs: int = None,
+               headless: bool = True,
+               worker: str = None) -> dict:
+    """Pull jobs from a JobQueue and scrape them one after another with a single re-used webdriver until the queue is empty.
+    Run several of these (in separate processes, see run_workers) to scrape in parallel. Restarting a worker after a crash picks up
+    the remaining jobs.
+
+    **Parameters:**
+    - queue (JobQueue or str): The queue or the path of its SQLite file.
+    - method (str): Scraping method for jobs that don't specify one. Default is 'highcharts_api'.
+    - out_dir (str): Directory to write the scraped series to, using tedata.export.write_series. Default is the current working directory.
+    - format (str): Output file format, see tedata.export.write_series.
+    - handler (callable): Optional function called as handler(result) with the result dict of each successful scrape (see scrape_many)
+    instead of writing files. May return a JSON serializable dict that is stored with the job.
+    - lease_timeout (float): Lease duration in seconds. The lease is extended in the background while a scrape is running.
+    - max_jobs (int): Stop after this many jobs. Default None runs until the queue is empty.
+    - headless (bool): Whether to run the browser in headless mode.
+    - worker (str): Name of this worker. Default is "hostname:pid".
+
+    **Returns:**
+    - dict with the number of jobs "done" and "failed" by this worker.
+    """
+    from . import batch
+    from .export import write_series, default_filename
+
+    if isinstance(queue, str):
+        queue = JobQueue(queue)
+    worker = worker or default_worker_name()
+    batch._worker_options = {"headless": headless, "browser": "firefox"}
+    counts = {"done": 0, "failed": 0}
+    logger.info(f"JobQueue worker {worker} starting, time: {datetime.datetime.now()}")
+
+    try:
+        while max_jobs is None or counts["done"] + counts["failed"] < max_jobs:
+            job = queue.lease(worker=worker, lease_timeout=lease_timeout)
+            if job is None:
+                break
+            keeper = _LeaseKeeper(queue, job, lease_timeout)
+            keeper.start()
+            try:
+                result = batch._scrape_one(job["id"], method=job["method"] or method)
+                if result["error"] is None:
+                    if handler is not None:
+                        stored = handler(result)
+                    else:
+                        stored = {"path": write_series(result["series"], result["metadata"], filename=default_filename(job["id"]),
+                                                       out_dir=out_dir, format=format)}
+            except Exception as e:
+                result = {"error": f"Error handling result: {str(e)}"}
+            finally:
+                keeper.stop()
+
+            if result["error"] is None:
+                queue.complete(job, result=stored)
+                counts["done"] += 1
+            else:
+                queue.fail(job, error=result["error"])
+                counts["failed"] += 1
+    finally:
+        batch._close_worker_scraper()
+    logger.info(f"JobQueue worker {worker} finished: {counts}")
+    return counts
+
+def run_workers(path: str, workers: int = 4, **kwargs) -> list:
+    """Start several run_worker processes on the queue at 'path' and wait for them to finish. Keyword arguments are passed to
+    run_worker (handler must be a picklable, module level function). Returns the exit codes of the worker processes."""
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_worker, args=(path,), kwargs=kwargs, name=f"tedata-worker-{i}") for i in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return [process.exitcode for process in processes]
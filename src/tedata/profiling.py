@@ -0,0 +1,153 @@
+import os
+import time
+import pstats
+import itertools
+import cProfile
+import functools
+import threading
+import tracemalloc
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports. This module must stay importable without selenium.
+from .ids import normalize_id
+from .cache import cache_dir
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.profiling')
+
+# Profiling of single scrapes is set with environment variables so that worker processes (scrape_many, JobQueue) inherit it.
+PROFILE_ENV = "TEDATA_PROFILE"            # "cprofile" or "tracemalloc", unset (default) for no profiling.
+PROFILE_DIR_ENV = "TEDATA_PROFILE_DIR"    # Directory for the profile files, default '<cache_dir>/profiles'.
+PROFILE_TOP_ENV = "TEDATA_PROFILE_TOP"    # Number of entries in the summary put in the scraper's timings, default 15.
+PROFILE_MODES = ("cprofile", "tracemalloc")
+FILE_EXTENSIONS = {"cprofile": ".prof", "tracemalloc": ".tracemalloc"}
+TRACEMALLOC_FRAMES = 10
+
+# cProfile and tracemalloc are process wide, so only one scrape at a time is profiled. Others run as usual.
+_profile_lock = threading.Lock()
+_profile_count = itertools.count(1)   # Numbers the profiles of this process, see profile_path.
+
+## Standalone functions  ########################################
+def configure_profiling(mode: str = None, directory: str = None, top: int = None):
+    """Turn profiling of every scrape_chart call on or off (the same as setting the TEDATA_PROFILE environment variable).
+
+    **Parameters**
+    - mode (str): "cprofile" to write a cProfile .prof file per scrape (open it with pstats or snakeviz), "tracemalloc" to write a
+    tracemalloc snapshot (load it with tracemalloc.Snapshot.load), or None to turn profiling off.
+    - directory (str): Directory to write the profiles to. Default is '<cache_dir>/profiles'.
+    - top (int): Number of entries in the summary put in the 'profile' attribute of the scraper. Default is 15.
+    """
+    for env, value in ((PROFILE_ENV, mode), (PROFILE_DIR_ENV, directory), (PROFILE_TOP_ENV, top)):
+        if value is None:
+            os.environ.pop(env, None)
+        else:
+            os.environ[env] = os.path.abspath(value) if env == PROFILE_DIR_ENV else str(value)
+
+def profile_dir() -> str:
+    """Directory the profiles are written to. Created if it does not exist."""
+    path = os.environ.get(PROFILE_DIR_ENV) or os.path.join(cache_dir(), "profiles")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def profile_path(name: str, mode: str) -> str:
+    """Path of the profile file of a scrape of 'name' (an id such as "united-states/gdp"), e.g
+    '<dir>/united-states_gdp_20250101_120000_123_4242_1.prof': time to the millisecond, process id and a per process count, so that
+    scrapes of the same id in the same second (e.g by scrape_many workers) don't overwrite each other's profiles."""
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(now))}_{int(now * 1000) % 1000:03d}_{os.getpid()}_{next(_profile_count)}"
+    return os.path.join(profile_dir(), f"{name.replace('/', '_')}_{stamp}{FILE_EXTENSIONS[mode]}")
+
+def _profile_mode(mode) -> str:
+    """Profiling mode for a profile= argument or TEDATA_PROFILE value, None for no profiling."""
+    if mode is True:
+        return "cprofile"
+    mode = str(mode).strip().lower()
+    if mode in PROFILE_MODES:
+        return mode
+    if mode not in ("", "0", "false", "off", "none"):
+        logger.warning(f"Unknown profiling mode: {mode}, use one of {PROFILE_MODES}. Scraping without profiling.")
+    return None
+
+def _scrape_name(args: tuple, kwargs: dict) -> str:
+    """Id of the chart a scrape_chart call is for, used to name the profile file."""
+    if kwargs.get("indicator") is not None:
+        target = f"{kwargs.get('country', 'united-states')}/{kwargs['indicator']}"
+    else:
+        target = kwargs.get("url") or kwargs.get("id") or (args[0] if args else None)
+    try:
+        return normalize_id(target)
+    except ValueError:
+        return "scrape"
+
+def cprofile_summary(profiler: cProfile.Profile, top: int = 15) -> list:
+    """The 'top' functions by cumulative time: [{"function", "calls", "tottime", "cumtime"}, ...], times in seconds."""
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+    return [{"function": f"{os.path.basename(file)}:{line}({name})", "calls": calls, "tottime": round(tottime, 4), "cumtime": round(cumtime, 4)}
+            for (file, line, name), (prim_calls, calls, tottime, cumtime, callers) in rows]
+
+def tracemalloc_summary(snapshot: tracemalloc.Snapshot, top: int = 15) -> list:
+    """The 'top' source lines by memory allocated and still held at the end of the scrape: [{"line", "size_kb", "count"}, ...]."""
+    return [{"line": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}", "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:top]]
+
+def _run_profiled(func, mode: str, args: tuple, kwargs: dict):
+    if not _profile_lock.acquire(blocking=False):
+        logger.info("Another scrape is being profiled, scraping without profiling.")
+        return func(*args, **kwargs)
+    try:
+        top = int(os.environ.get(PROFILE_TOP_ENV) or 15)
+        name = _scrape_name(args, kwargs)
+        path = profile_path(name, mode)
+        result = None
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                profiler.dump_stats(path)
+                summary = {"mode": mode, "path": path, "top": cprofile_summary(profiler, top)}
+        else:
+            started = not tracemalloc.is_tracing()   # Leave tracing on if it was already started outside tedata.
+            if started:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            else:
+                tracemalloc.reset_peak()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                snapshot = tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),
+                                                                       tracemalloc.Filter(False, "<frozen importlib._bootstrap>")))
+                peak = tracemalloc.get_traced_memory()[1]
+                if started:
+                    tracemalloc.stop()
+                snapshot.dump(path)
+                summary = {"mode": mode, "path": path, "peak_mb": round(peak / 1024 ** 2, 2), "top": tracemalloc_summary(snapshot, top)}
+        logger.info(f"Profile ({mode}) of the scrape of {name} written to {path}")
+        if result is not None:
+            result.profile = summary
+        return result
+    finally:
+        _profile_lock.release()
+
+def profiled(func):
+    """Decorator for scrape_chart: profile the call if profile="cprofile"/"tracemalloc" is passed or TEDATA_PROFILE is set. The profile
+    is written to profile_dir() and a summary is put in the 'profile' attribute of the returned scraper: {"mode", "path", "top"} ("peak_mb"
+    too for tracemalloc). With profiling off nothing is started, the call goes straight through."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        mode = kwargs.get("profile")
+        if mode is None:
+            mode = os.environ.get(PROFILE_ENV)
+        if not mode:
+            return func(*args, **kwargs)
+        mode = _profile_mode(mode)
+        if mode is None:
+            return func(*args, **kwargs)
+        return _run_profiled(func, mode, args, kwargs)
+    return wrapper
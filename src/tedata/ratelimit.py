@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import tempfile
+import threading
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.ratelimit')
+
+# Settings are kept in environment variables so that worker processes (scrape_many, run_workers etc) inherit them.
+RPM_ENV = "TEDATA_RATE_LIMIT_RPM"
+BURST_ENV = "TEDATA_RATE_LIMIT_BURST"
+SLOW_ENV = "TEDATA_RATE_LIMIT_SLOW_SECONDS"
+STATE_DIR_ENV = "TEDATA_RATE_LIMIT_DIR"
+
+######## Cross process lock ##############################
+class FileLock:
+    """Exclusive lock shared by threads and processes on the same machine, using an OS level lock on a small lock file.
+
+    **Init Parameters:**
+    - path (str): Path of the lock file. Created if it does not exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()  # OS file locks are per process, so threads need their own lock as well.
+        self._file = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        try:
+            self._file = open(self.path, "a+")
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK gives up after 10 seconds.
+                        continue
+        except Exception:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+        finally:
+            self._file = None
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+######## Rate limiter ##############################
+class RateLimiter:
+    """Token bucket rate limiter for page loads, shared by all threads and processes on the machine that use the same state file.
+    The bucket holds up to 'burst' tokens and refills at requests_per_minute. Callers that find it empty reserve the next token and
+    sleep until it is due, so waiting callers are served in order.
+
+    The limiter also backs off adaptively: each page load is reported with record(), and a slow load or a failure (timeout, "no data"
+    page) halves the effective rate, down to min_factor * requests_per_minute. Successful, fast loads restore it gradually.
+
+    **Init Parameters:**
+    - requests_per_minute (float): Steady state request rate.
+    - state_path (str): Path of the JSON state file shared between processes. Default is a file per host in the temp directory.
+    - burst (int): Maximum number of requests that can be made back to back after an idle period. Default is 1.
+    - slow_threshold (float): Page loads slower than this many seconds count as a failure for the backoff. Default is 20.
+    - min_factor (float): Lowest fraction of requests_per_minute the backoff can go down to. Default is 0.1.
+    - recovery_step (float): Fraction of requests_per_minute added back after each good page load. Default is 0.05.
+    - backoff_interval (float): Minimum seconds between two halvings, so that a burst of failures from concurrent workers counts once.
+    """
+
+    def __init__(self,
+                 requests_per_minute: float,
+                 state_path: str = None,
+                 burst: int = 1,
+                 slow_threshold: float = 20,
+                 min_factor: float = 0.1,
+                 recovery_step: float = 0.05,
+                 backoff_interval: float = 10):
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive.")
+        self.requests_per_minute = requests_per_minute
+        self.state_path = state_path or default_state_path()
+        self.burst = max(int(burst), 1)
+        self.slow_threshold = slow_threshold
+        self.min_factor = min_factor
+        self.recovery_step = recovery_step
+        self.backoff_interval = backoff_interval
+        self._lock = FileLock(self.state_path + ".lock")
+
+    def _read_state(self, now: float) -> dict:
+        try:
+            with open(self.state_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        return {"tokens": float(state.get("tokens", self.burst)), "updated": float(state.get("updated", now)),
+                "factor": float(state.get("factor", 1.0)), "last_backoff": float(state.get("last_backoff", 0))}
+
+    def _write_state(self, state: dict):
+        tmp_path = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _refill(self, state: dict, now: float) -> float:
+        """Top up the bucket for the time elapsed since the last update. Returns the current rate in requests per second."""
+        rate = self.requests_per_minute * state["factor"] / 60
+        state["tokens"] = min(self.burst, state["tokens"] + max(now - state["updated"], 0) * rate)
+        state["updated"] = now
+        return rate
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available. Returns the time waited in seconds."""
+        with self._lock:
+            now = time.time()
+            state = self._read_state(now)
+            rate = self._refill(state, now)
+            state["tokens"] -= 1  # May go negative: a reservation on a future token.
+            self._write_state(state)
+        wait = max(-state["tokens"] / rate, 0)
+        if wait > 0:
+            logger.debug(f"RateLimiter: waiting {wait:.2f}s for a request slot.")
+            time.sleep(wait)
+        return wait
+
+    def record(self, latency: float = None, ok: bool = True):
+        """Report the outcome of a page load for the adaptive backoff.
+
+        **Parameters:**
+        - latency (float): Page load time in seconds. Loads slower than slow_threshold count as failures.
+        - ok (bool): False if the load failed, e.g timed out or showed a challenge or "no data" page.
+        """
+        failed = not ok or (latency is not None and latency > self.slow_threshold)
+        with self._lock:
+            now = time.time()
+            state = self._read_state(now)
+            self._refill(state, now)  # Settle tokens at the old rate before changing it.
+            if failed:
+                if now - state["last_backoff"] < self.backoff_interval:
+                    return
+                state["factor"] = max(self.min_factor, state["factor"] / 2)
+                state["last_backoff"] = now
+                logger.info(f"RateLimiter: backing off to {state['factor'] * self.requests_per_minute:.1f} requests/minute "
+                            f"(latency: {latency}, ok: {ok}).")
+            elif state["factor"] < 1:
+                state["factor"] = min(1.0, state["factor"] + self.recovery_step)
+            else:
+                return
+            self._write_state(state)
+
+    @property
+    def current_rate(self) -> float:
+        """Effective request rate in requests per minute, after backoff."""
+        return self.requests_per_minute * self._read_state(time.time())["factor"]
+
+    def reset(self):
+        """Clear the shared state: full bucket and no backoff."""
+        with self._lock:
+            if os.path.exists(self.state_path):
+                os.remove(self.state_path)
+
+## Standalone functions  ########################################
+def default_state_path(host: str = "tradingeconomics.com") -> str:
+    """State file of the limiter for a host, in TEDATA_RATE_LIMIT_DIR or the temp directory."""
+    state_dir = os.environ.get(STATE_DIR_ENV) or tempfile.gettempdir()
+    return f"{state_dir}{fdel}tedata_ratelimit_{host.replace(':', '_')}.json"
+
+def configure_rate_limit(requests_per_minute: float = None, burst: int = 1, slow_threshold: float = 20, state_dir: str = None):
+    """Turn the rate limit on page loads on or off for this process and any worker processes started after this call.
+    Rate limiting is off by default. It can also be turned on by setting the TEDATA_RATE_LIMIT_RPM environment variable.
+
+    **Parameters:**
+    - requests_per_minute (float): Steady state page loads per minute per host, shared by all processes on this machine.
+    None turns rate limiting off.
+    - burst (int): Maximum number of back to back page loads after an idle period.
+    - slow_threshold (float): Page loads slower than this many seconds trigger the backoff.
+    - state_dir (str): Directory for the shared state & lock files. Default is the temp directory.
+    """
+    if requests_per_minute is None:
+        os.environ.pop(RPM_ENV, None)
+    else:
+        os.environ[RPM_ENV] = str(requests_per_minute)
+    os.environ[BURST_ENV] = str(burst)
+    os.environ[SLOW_ENV] = str(slow_threshold)
+    if state_dir is not None:
+        os.makedirs(state_dir, exist_ok=True)
+        os.environ[STATE_DIR_ENV] = state_dir
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(url: str = "https://tradingeconomics.com/") -> RateLimiter:
+    """The rate limiter for the host of 'url' as configured by configure_rate_limit or the environment, or None if rate limiting is off."""
+    rpm = os.environ.get(RPM_ENV)
+    if not rpm:
+        return None
+    host = urlparse(url).netloc or "tradingeconomics.com"
+    settings = (host, float(rpm), int(os.environ.get(BURST_ENV, 1)), float(os.environ.get(SLOW_ENV, 20)), default_state_path(host))
+    with _limiters_lock:
+        limiter = _limiters.get(settings)
+        if limiter is None:
+            limiter = RateLimiter(settings[1], state_path=settings[4], burst=settings[2], slow_threshold=settings[3])
+            _limiters[settings] = limiter
+    return limiter
+
+def rate_limited_get(driver, url: str, record: bool = True) -> float:
+    """driver.get(url) behind the rate limiter for the url's host, if rate limiting is on.
+    Failed loads are always reported to the limiter, successful ones only if record is True (callers that check the page
+    content afterwards report the outcome themselves with get_rate_limiter(url).record()).
+
+    **Returns:**
+    - float: The page load time in seconds.
+    """
+    limiter = get_rate_limiter(url)
+    if limiter is not None:
+        limiter.acquire()
+    start = time.perf_counter()
+    try:
+        driver.get(url)
+    except Exception:
+        if limiter is not None:
+            limiter.record(time.perf_counter() - start, ok=False)
+        raise
+    latency = time.perf_counter() - start
+    if limiter is not None and record:
+        limiter.record(latency, ok=True)
+    return latency
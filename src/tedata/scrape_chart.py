@@ -5,31 +5,48 @@ import datetime
 
 from typing import Literal
 import time
+import pandas as pd
 from selenium import webdriver
 # tedata related imports
 from . import logger
 from .scraper import TE_Scraper
+from .cache import MethodMemory, SeriesCache, MetadataCache
+from .vintages import VintageStore
+from .timing import timed_scrape
+from .profiling import profiled
 
 import logging
 # Get the logger from the parent package
 logger = logging.getLogger('tedata.scrape_chart')
 
+AUTO_METHOD_ORDER = ("highcharts_api", "mixed", "tooltips", "path")  # Default order tried by method="auto".
+
 ############################################################################################################
 ############ Convenience function to run the full scraper from scraper module ##########################################
 
+@timed_scrape("scrape_chart")
+@profiled
 def scrape_chart(url: str = None, 
                  id: str = None,
                  country: str = "united-states",
                  indicator: str = None,
                  start_date: str = None,   #Use "YYYY-MM-DD" format. Only for "mixed" method.
                  end_date: str = None,   #Use "YYYY-MM-DD" format. Only for "mixed" method.
-                 method: Literal["path", "tooltips", "mixed", 'highcharts_api'] = "highcharts_api",
+                 method: Literal["path", "tooltips", "mixed", 'highcharts_api', 'auto'] = "highcharts_api",
                  scraper: TE_Scraper = None,
                  driver: webdriver = None, 
                  use_existing_driver: bool = False,
                  headless: bool = True, 
                  wait_time: int = 5,
-                 browser: str = 'firefox') -> TE_Scraper:
+                 browser: str = 'firefox',
+                 auto_order: list = None,
+                 method_memory: bool = True,
+                 use_cache: bool = False,
+                 max_age: float = None,
+                 update: bool = False,
+                 update_window_years: float = 3,
+                 vintages: bool = False,
+                 profile: str = None) -> TE_Scraper:
     
     """ This convenience function will scrape a chart from Trading Economics and return a TE_Scraper object with the series data in
     the 'series' attribute. Metadata is also retreived and stored in the 'series_metadata' & 'metadata' attributes.
@@ -59,16 +76,36 @@ def scrape_chart(url: str = None,
     takes the path element of the trace on the svg chart and then later scales series using the y-axis values. 'tooltips' uses the tooltip box on the chart to get the
     whole series data. The 'path' method is likely to work yet could have inacuraccies in values. The 'tooltips' method is more accurate. Try several and 
     decide what works best for you. Update: v0.3.2 added 'highcharts_api' method which uses the Highcharts API to get the series data. This is handsdown the best
-    method to use if it works for the chart you are scraping.
+    method to use if it works for the chart you are scraping. 'auto' tries the methods in auto_order on the same loaded page until one works, starting
+    with the fastest method known to work for the indicator. The method used is stored in the 'method' attribute of the returned scraper.
     - scraper (TE_Scraper): A TE_Scraper object to use for scraping the data. If this is passed, the function will not create a new one.
     - use_existing_driver (bool): Whether to use the existing webdriver of the scraper object if it exists. Default is False.
     - driver (webdriver): A Selenium WebDriver object to use for scraping the data. If this is passed, the function will not create a new one. If 
     scraper and driver are both passed, the webdriver of the scraper object will be used rather than the supplied webdriver.
     - headless (bool): Whether to run the browser in headless mode (display no window).
     - browser (str): The browser to use, either 'chrome' or 'firefox'. Default is 'firefox'. Only firefox is supported at the moment (v0.3.0).
+    - auto_order (list): Order in which method 'auto' tries the methods. Default is ["highcharts_api", "mixed", "tooltips", "path"].
+    - method_memory (bool): For method 'auto', remember per indicator which method worked and how fast (see tedata.cache.MethodMemory).
+    - use_cache (bool): Look for the series in the local series cache (tedata.cache.SeriesCache) before starting a browser and store
+    freshly scraped series in it. The static metadata of the series (title, units, source etc) is also cached, for 30 days, and when it is
+    cached only the chart rather than the whole page is parsed. For the 'path' and 'mixed' methods the frequency and start date of the
+    series are cached as well, so that only the end date needs to be probed on later scrapes. Default is False.
+    - max_age (float): With use_cache, maximum age of a cached series in seconds. Default None uses a time-to-live based on the series frequency.
+    - update (bool): Incremental refresh. If the series cache holds an earlier copy of the series, only the last update_window_years of the
+    series are scraped and spliced into it (see TE_Scraper.update_series). Revised points are in the 'revisions' attribute of the returned
+    scraper. Falls back to a full scrape if there is no cached copy or the update fails. The result is stored in the cache. Default is False.
+    - update_window_years (float): Length of the trailing window scraped by an incremental refresh. Default is 3 years.
+    - vintages (bool): Archive the scraped series as a new vintage in the vintage store (tedata.vintages.VintageStore), which keeps only
+    the points that changed since the last scrape. The vintage number is stored in the 'vintage' attribute of the returned scraper.
+    Series served from the cache are not archived. Default is False.
+    - profile (str): Profile this scrape: "cprofile" writes a cProfile .prof file, "tracemalloc" a tracemalloc memory snapshot, named
+    after the id, to '<cache_dir>/profiles' (or TEDATA_PROFILE_DIR). A summary of the top functions (or lines, for memory) is put in
+    the 'profile' attribute of the returned scraper. Default None uses the TEDATA_PROFILE environment variable, profiling is off if it is not
+    set. See tedata.profiling.
 
     **Returns**
-    - TE_Scraper object with the scraped data or None if an error occurs.
+    - TE_Scraper object with the scraped data or None if an error occurs. The time spent in each stage of the scrape (load_page,
+    scrape_metadata, series_from_highcharts etc and the total as 'scrape_chart') is in its 'timings' dict, see tedata.timing.
     """
     logger.info(f"In scrape chart function.")
 
@@ -76,50 +113,135 @@ def scrape_chart(url: str = None,
         start_date = "1850-01-01"
     if end_date is None:
         end_date = datetime.datetime.now().strftime("%Y-%m-%d")
+    if url is None:
+        if indicator is not None:   #Use country and id to create the URL if URL not supplied.
+            url = f"https://tradingeconomics.com/{country}/{indicator}"
+        elif indicator is None and id is not None:
+            url = f"https://tradingeconomics.com/{id}"
+        else:
+            print("No URL, id or indicator supplied.")
+            logger.debug("No URL, id or indicator supplied.")
+            return None
+    else:
+        pass
+
+    cached, history, cache = None, None, None
+    if use_cache or update:
+        try:
+            cache = SeriesCache()
+            if use_cache:   # Serve the series from the local cache if there is a fresh entry, no browser needed.
+                cached = cache.get(url, max_age=max_age)
+            if update and cached is None:  # Stored history to refresh incrementally, however old it is.
+                history = cache.get(url, allow_stale=True)
+            cache.close()
+        except Exception as e:
+            logger.info(f"Error reading series cache: {str(e)}")
+
     if scraper is not None:  
         logger.info(f"Using existing scraper object supplied {scraper}.")
         sel = scraper
         # List of attributes to delete if they exist to reset scraper for overwriting.
         attrs_to_delete = ['series', 'series_metadata', 'metadata', 'x_index', 'y_axis', "frequency", "start_end",
                     '_date_span',  '_chart_type',  'last_url',  'series_name', 'date_spans',  'date_span_dict',
-                     'latest_points',  'date_series', 'plot']
+                     'latest_points',  'date_series', 'plot', 'tooltip_scraper', 'start_end', 'axis_limits', 'method', 'revisions', 'vintage', 'profile']
         # Delete each attribute if it exists
         for attr in attrs_to_delete:
             if hasattr(sel, attr):
                 delattr(sel, attr)
+        # Drop observers left by old tooltip scrapers so that long-lived scrapers don't accumulate them.
+        sel.observers[:] = [sel]
+        sel.timings = {}
 
         if driver is None:
             driver = scraper.driver
         else:
             scraper.driver = driver
+    elif cached is not None:  # No browser needed.
+        sel = TE_Scraper.from_data(cached["series"], cached["metadata"], url=url)
     else:
         sel = TE_Scraper(driver = driver, browser = browser, headless = headless, use_existing_driver=use_existing_driver)
 
-    if url is None:
-        if indicator is not None:   #Use country and id to create the URL if URL not supplied.
-            url = f"https://tradingeconomics.com/{country}/{indicator}"
-        elif indicator is None and id is not None:
-            url = f"https://tradingeconomics.com/{id}"
-        else:
-            print("No URL, id or indicator supplied.")
-            logger.debug("No URL, id or indicator supplied.")
-            return None
-    else:
-        pass
+    if cached is not None:
+        logger.info(f"scrape_chart function: serving {url} from the series cache, age: {cached['age']:.0f} s.")
+        if scraper is not None:
+            sel._populate(cached["series"], cached["metadata"], url=url)
+        sel.method = cached["method"]
+        return sel
+
+    static_metadata, metadata_cache = None, None
+    if use_cache or update:  # With cached metadata only the chart needs to be parsed, not the whole page.
+        try:
+            metadata_cache = MetadataCache()
+            static_metadata = metadata_cache.get(url)
+            metadata_cache.close()
+        except Exception as e:
+            logger.info(f"Error reading metadata cache: {str(e)}")
 
     logger.info(f"scrape_chart function: Scraping chart at: {url}, time: {datetime.datetime.now()}, method: {method}")
-    if sel.load_page(url, extra_wait_time=wait_time):  # Load the page...
-        sel.scrape_metadata()  ## Scrape the metadata for the data series from the page.
+    if sel.load_page(url, extra_wait_time=wait_time, parse_full_page=static_metadata is None):  # Load the page...
+        if static_metadata is not None:
+            sel.metadata = dict(static_metadata)  # Dynamic fields (dates, min/max, length) are filled in from the scraped series.
+            sel.series_metadata = pd.Series(sel.metadata)
+        else:
+            sel.scrape_metadata()  ## Scrape the metadata for the data series from the page.
+            if use_cache or update:
+                try:
+                    # Same store as the read above, its connection is re-opened for the write and closed below.
+                    metadata_cache = metadata_cache if metadata_cache is not None else MetadataCache()
+                    metadata_cache.put(url, sel.metadata)
+                except Exception as e:
+                    logger.info(f"Error writing to metadata cache: {str(e)}")
+                finally:
+                    if metadata_cache is not None:
+                        metadata_cache.close()
     else:
         print("Error loading page at: ", url)
         logger.debug(f"Error loading page at: {url}")
         return None
 
+    if history is not None and sel.update_series(history["series"], window_years=update_window_years, method=method):
+        sel.method = method
+    elif method == "auto":
+        if not scrape_auto(sel, url, start_date, end_date, auto_order=auto_order, method_memory=method_memory, use_cache=use_cache or update):
+            return None
+    elif run_scrape_method(sel, method, start_date, end_date, use_cache=use_cache or update):
+        sel.method = method
+    else:
+        return None
+
+    if use_cache or update:
+        try:
+            cache = cache if cache is not None else SeriesCache()   # Same store as the read above, re-opened for the write.
+            cache.put(url, sel.series, sel.series_metadata if hasattr(sel, "series_metadata") else None, method=sel.method)
+        except Exception as e:
+            logger.info(f"Error writing to series cache: {str(e)}")
+        finally:
+            if cache is not None:
+                cache.close()
+    if vintages:
+        try:
+            vintage_store = VintageStore()
+            sel.vintage = vintage_store.record(url, sel.series, sel.series_metadata if hasattr(sel, "series_metadata") else None)
+            vintage_store.close()
+        except Exception as e:
+            logger.info(f"Error writing to vintage store: {str(e)}")
+
+    return sel #Return the TE_Scraper object with the series data in the 'series' attribute.
+
+def run_scrape_method(sel: TE_Scraper, method: str, start_date: str, end_date: str, use_cache: bool = False) -> bool:
+    """Scrape the series from the chart already loaded in 'sel' using one scraping method. Used by scrape_chart.
+
+    **Parameters**
+    - sel (TE_Scraper): Scraper with the chart page loaded.
+    - method (str): One of 'path', 'tooltips', 'mixed' or 'highcharts_api'.
+    - start_date (str): Start date for the 'tooltips' method, "YYYY-MM-DD".
+    - end_date (str): End date for the 'tooltips' method, "YYYY-MM-DD".
+    - use_cache (bool): For 'path' and 'mixed', use the cached frequency and start date of the series (see TE_Scraper.make_x_index).
+
+    **Returns**
+    - bool: True if the series was scraped, it is then in the 'series' attribute of sel.
+    """
     if method == "tooltips":
-        if start_date is None:
-            start_date = "1850-01-01"
-        if end_date is None:
-            end_date = datetime.datetime.now().strftime("%Y-%m-%d")
         if not hasattr(sel, "tooltip_scraper"):
             sel.init_tooltipScraper()  ## Initialize the tooltip scraper.
         try:
@@ -130,22 +252,22 @@ def scrape_chart(url: str = None,
             sel.tooltip_scraper.initialize_tooltip_simple()  #Initialize the tooltips on the page by moving mouse onto chart.
         except Exception as e:
             logger.info(f"Error initializing tooltips: {str(e)}")
-            return None
+            return False
         try:
             sel.full_series_fromTooltips()  #Scrape the full series from the tooltips on the chart.
             logger.info("Successfully scraped full series from tooltips.")
         except Exception as e:
             print("Error scraping full series from tooltips: ", str(e))
             logger.info(f"Error scraping full series from tooltips: {str(e)}")
-            return None
+            return False
         
     elif method == "path":
         try: #Create the x_index for the series. This is the most complicated bit.
-            sel.make_x_index(force_rerun_xlims = True, force_rerun_freqdet = True)  
+            sel.make_x_index(force_rerun_xlims = True, force_rerun_freqdet = True, use_cache = use_cache)  
         except Exception as e:
             print("Error with the x-axis scraping & frequency deterination using Selenium and tooltips:", str(e))
             logger.debug(f"Error with the x-axis scraping & frequency deterination using Selenium and tooltips: {str(e)}")
-            return None
+            return False
 
         try:  #Scrape the y-axis values from the chart.
             yaxis = sel.get_y_axis(set_global_y_axis=True)
@@ -154,7 +276,7 @@ def scrape_chart(url: str = None,
         except Exception as e:
             print(f"Error scraping y-axis: {str(e)}")
             logger.debug(f"Error scraping y-axis: {str(e)}")
-            return None
+            return False
         
         try:
             sel.series_from_chart_soup(set_max_datespan=True)  #Get the series data from path element on the svg chart.
@@ -162,14 +284,14 @@ def scrape_chart(url: str = None,
         except Exception as e:
             print("Error scraping full series: ", str(e))
             logger.debug(f"Error scraping full series: {str(e)}")
-            return None
+            return False
 
         try: 
             sel.apply_x_index()  ## Apply the x_index to the series, this will resample the data to the frequency of the x_index.
         except Exception as e:
             print(f"Error applying x-axis scaling: {str(e)}")
             logger.debug(f"Error applying x-axis scaling: {str(e)}")
-            return None
+            return False
 
         try:  
             scaled_series = sel.scale_series()   ## This converts the pixel co-ordinates to data values.
@@ -179,19 +301,19 @@ def scrape_chart(url: str = None,
             print(f"Error scaling series: {str(e)}")
             logger.debug(f"Error scaling series: {str(e)}")
         
-        logger.info(f"Successfully scraped time-series from chart at:  {url}, now getting some metadata...")
+        logger.info(f"Successfully scraped time-series from chart at:  {sel.last_url}, now getting some metadata...")
 
         print(f"Got metadata. \n\nSeries tail: {sel.series.tail()} \n\nScraping complete! Happy pirating yo!")
-        logger.debug(f"Scraping complete, data series retrieved successfully from chart at: {url}")
+        logger.debug(f"Scraping complete, data series retrieved successfully from chart at: {sel.last_url}")
     
     ## Most accurate method but slowest. Determine start & end dates for full series and frequency, make x-index. Then scrape the data from tooltips
     # using multiple runs of the chart with different date spans to capture all the data.
     elif method == "mixed":
         try: #Create the x_index for the series. This is the most complicated bit.
-            sel.make_x_index(force_rerun_xlims = True, force_rerun_freqdet = True)  
+            sel.make_x_index(force_rerun_xlims = True, force_rerun_freqdet = True, use_cache = use_cache)  
         except Exception as e:
             logger.info(f"Error with the x-axis scraping & frequency deterination using Selenium and tooltips: {str(e)}")
-            return None
+            return False
         
         if not hasattr(sel, "tooltip_scraper"):
             sel.init_tooltipScraper()  ## Initialize the tooltip scraper.
@@ -199,7 +321,7 @@ def scrape_chart(url: str = None,
             sel.tooltip_scraper.initialize_tooltip_simple()  #Initialize the tooltips on the page by moving mouse onto chart.
         except Exception as e:
             logger.info(f"Error initializing tooltips: {str(e)}")
-            return None
+            return False
         
         try:  
             if sel.tooltip_multiScrape():  ## Scrape the full series from the chart using multiple runs of the javascript tooltip scraper.
@@ -208,7 +330,7 @@ def scrape_chart(url: str = None,
                 raise Exception("Error scraping full series using mixed method.")
         except Exception as e:
             logger.info(f"Error scraping full series using mixed method: {str(e)}")
-            return None
+            return False
         
     elif method == "highcharts_api":
         try:
@@ -217,18 +339,71 @@ def scrape_chart(url: str = None,
             time.sleep(1)
         except Exception as e:
             logger.info(f"Error setting max date span: {str(e)}")
-            return None
+            return False
         try:
             # Use new method to scrape series from Highcharts API.
             sel.series_from_highcharts()
             logger.info("Successfully scraped series from Highcharts API.")
         except Exception as e:
             logger.info(f"Error scraping series from Highcharts API: {str(e)}")
-            return None
+            return False
 
     else:
-        logger.info("Invalid method supplied. Use 'path', 'tooltips', 'mixed' or 'highcharts_api'.")
-        return
-    
-    
-    return sel #Return the TE_Scraper object with the series data in the 'series' attribute.
+        logger.info("Invalid method supplied. Use 'path', 'tooltips', 'mixed', 'highcharts_api' or 'auto'.")
+        return False
+
+    return True
+
+def scrape_auto(sel: TE_Scraper, url: str, start_date: str, end_date: str, auto_order: list = None, method_memory: bool = True,
+                use_cache: bool = False) -> bool:
+    """Try scraping methods one after another on the chart already loaded in 'sel' until one works. The method that worked is stored in
+    the 'method' attribute of sel. With method_memory, the outcome and duration of each attempt is recorded per indicator id in
+    tedata.cache.MethodMemory and the fastest method known to work for the id is tried first.
+
+    **Parameters**
+    - sel (TE_Scraper): Scraper with the chart page loaded.
+    - url (str): URL of the chart, used as the key for the method memory.
+    - start_date, end_date (str): Date range for the 'tooltips' method.
+    - auto_order (list): Methods to try, in order. Default is AUTO_METHOD_ORDER.
+    - method_memory (bool): Use and update the persistent method memory. Default is True.
+    - use_cache (bool): Passed to run_scrape_method.
+
+    **Returns**
+    - bool: True if one of the methods worked.
+    """
+    order = list(auto_order or AUTO_METHOD_ORDER)
+    memory = None
+    if method_memory:
+        try:
+            memory = MethodMemory()
+            order = memory.best_order(url, order)
+        except Exception as e:
+            logger.info(f"Method memory unavailable, using default method order: {str(e)}")
+            memory = None
+
+    try:
+        for method in order:
+            logger.info(f"scrape_chart auto: trying method '{method}' for {url}")
+            if hasattr(sel, "series"):  # Clear results of a previous, failed attempt.
+                delattr(sel, "series")
+            start = time.perf_counter()
+            try:
+                ok = run_scrape_method(sel, method, start_date, end_date, use_cache=use_cache) and getattr(sel, "series", None) is not None and len(sel.series) > 0
+            except Exception as e:
+                logger.info(f"Method '{method}' raised an error: {str(e)}")
+                ok = False
+            elapsed = time.perf_counter() - start
+            if memory is not None:
+                try:
+                    memory.record(url, method, ok, elapsed)
+                except Exception as e:
+                    logger.info(f"Error recording method outcome: {str(e)}")
+            if ok:
+                logger.info(f"scrape_chart auto: method '{method}' worked for {url}, took {elapsed:.1f} s.")
+                sel.method = method
+                return True
+    finally:
+        if memory is not None:
+            memory.close()
+    logger.info(f"scrape_chart auto: all methods failed for {url}: {order}")
+    return False
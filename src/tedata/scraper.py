@@ -15,8 +15,11 @@ import plotly.graph_objects as go
 fdel = os.path.sep
 wd = os.path.dirname(__file__)
 
-# tedata related imports
-from . import utils
+# tedata related imports. utils is imported at the bottom of this module as utils sub-classes TE_Scraper.
+from .ratelimit import rate_limited_get, get_rate_limiter
+from .cache import FrequencyCache
+from .export import write_series, ExportFormat
+from .timing import timed
 from .base import Generic_Webdriver, SharedWebDriverState
 
 import logging
@@ -59,15 +62,59 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
         SharedWebDriverState.__init__(self)
         self.observers.append(self)  # Register self as observer
         self._shared_state = self  # Since we inherit SharedWebDriverState, we are our own shared state
+        self.timings = {}  # Seconds spent in each stage of the last scrape, see tedata.timing.
+
+    @classmethod
+    def from_data(cls, series: pd.Series, metadata=None, url: str = None):
+        """Make a TE_Scraper holding already scraped data, without a webdriver, e.g for a series served from tedata.cache.SeriesCache.
+        Data attributes and methods such as plot_series and export_data work as usual; methods that drive the browser do not.
+
+        **Parameters**
+        - series (pd.Series): The time-series.
+        - metadata (pd.Series or dict): Series metadata.
+        - url (str): URL of the chart the series came from.
+        """
+        sel = cls.__new__(cls)
+        SharedWebDriverState.__init__(sel)
+        sel.observers.append(sel)
+        sel._shared_state = sel
+        sel.driver = None
+        sel.browser = None
+        sel.headless = True
+        sel.created_at = time.time()
+        sel.timings = {}
+        sel._populate(series, metadata, url)
+        return sel
+
+    def _populate(self, series: pd.Series, metadata=None, url: str = None):
+        """Set the series, metadata & URL attributes from stored data."""
+        metadata = metadata.to_dict() if isinstance(metadata, pd.Series) else dict(metadata or {})
+        self.series = series
+        self.metadata = metadata
+        self.series_metadata = pd.Series(metadata)
+        if url is not None:
+            self.last_url = url
+            self.series_name = url.split("/")[-1].replace("-", " ")
+
+    @timed()
+    def load_page(self, url, extra_wait_time=3, parse_full_page: bool = True):
+        """Load page and wait for it to be ready.
 
-    def load_page(self, url, extra_wait_time=3):
-        """Load page and wait for it to be ready"""
+        **Parameters:**
+        - url (str): URL of the chart page.
+        - extra_wait_time (int): Extra seconds to wait after the page has loaded.
+        - parse_full_page (bool): Parse the whole page source with BeautifulSoup. If False only the chart elements are parsed, which is much
+        faster, but page level data needed by scrape_metadata (title, description) is not available. Later calls of update_chart also
+        parse only the chart elements. Default is True.
+        """
         self.last_url = url
         self.series_name = url.split("/")[-1].replace("-", " ")
+        limiter = get_rate_limiter(url)
+        load_time, load_ok = None, False
         
         try:
-            # This waits for initial page load
-            self.driver.get(url)
+            # This waits for initial page load. Rate limited if tedata.configure_rate_limit has been used.
+            load_time = rate_limited_get(self.driver, url, record=False)
             
             # Now explicitly wait for your critical elements
             chart_element = self.wait.until(
@@ -80,7 +127,9 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
 
             time.sleep(extra_wait_time)  # Extra wait time after page load just to be sure...
             
-            if self.has_no_data_message():
+            no_data = self.has_no_data_message()
+            load_ok = not no_data
+            if no_data:
                 logger.info("No data found for your country/indicator comibnation, check that the URL or country/indicator combination is correct.")
                 #return False
             # Wait for the chart content to be loaded with a shorter timeout
@@ -92,10 +141,14 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
                 logger.info("No data series found for your country/indicator comibnation, check that the URL or country/indicator combination is correct.")
             
             # Now it's safe to get the page source
-            self.full_page = self.get_page_source()
-            self.page_soup = BeautifulSoup(self.full_page, 'html.parser')
-            self.chart_soup = self.page_soup.select_one("#chart")  #Make a bs4 object from the #chart element of the page.
-            self.full_chart = self.chart_soup.contents
+            self.chart_only = not parse_full_page
+            if parse_full_page:
+                self.full_page = self.get_page_source()
+                self.page_soup = BeautifulSoup(self.full_page, 'html.parser')
+                self.chart_soup = self.page_soup.select_one("#chart")  #Make a bs4 object from the #chart element of the page.
+                self.full_chart = self.chart_soup.contents
+            else:
+                self._update_chart_only_soups()
 
             #Final check...
             if len(list(self.chart_soup.select_one(".highcharts-series-group").children)) > 0:
@@ -107,6 +160,11 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
             print(f"Error loading page: {str(e)}")
             logger.debug(f"Error loading page: {str(e)}")
             return False
+        finally:
+            # Report the outcome to the adaptive rate limiter, failures (e.g #chart wait timed out) included. If driver.get itself
+            # raised (load_time is None), rate_limited_get has already reported it.
+            if limiter is not None and load_time is not None:
+                limiter.record(load_time, ok=load_ok)
         
         retries = 4
         for i in range(retries):
@@ -237,6 +295,7 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
                 self.set_date_span(longest_span)
                 return shortest_span
 
+    @timed()
     def update_chart(self):
         """Update the chart attributes after loading a new page or clicking a button. This will check the page source and update the 
         beautiful soup objects such as chart_soup, from which most other methods derive their functionality. It will also update the full_chart attribute
@@ -244,6 +303,9 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
         as clicking a button to change the date span or chart type."""
 
         try:
+            if getattr(self, "chart_only", False):
+                self._update_chart_only_soups()
+                return True
             # Since we inherit from SharedWebDriverState, we can directly set the page_source property
             self.page_source = self.driver.page_source
             return True
@@ -252,6 +314,18 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
             logger.error(f"Failed to update chart: {e}")
             return False
 
+    def _update_chart_only_soups(self):
+        """Parse only the chart element and the date span buttons instead of the whole page source. page_soup then holds just these elements."""
+        html = self.driver.execute_script("""
+            const chart = document.getElementById('chart');
+            const spans = document.getElementById('dateSpansDiv');
+            let html = chart ? chart.outerHTML : '';
+            if (spans && !(chart && chart.contains(spans))) { html += spans.outerHTML; }
+            return html;""")
+        self.page_soup = BeautifulSoup(html or "", 'html.parser')
+        self.chart_soup = self.page_soup.select_one("#chart")
+        self.full_chart = self.chart_soup.contents if self.chart_soup else None
+
     def set_date_span(self, date_span: str):
         """Set the date span on the Trading Economics chart. This is done by clicking the date span button on the chart. The date span is a button on the chart
         that allows you to change the date range of the chart. This method will click the button for the date span specified in the date_span parameter.
@@ -413,6 +487,7 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
             logger.debug(f"Error finding element: {str(e)}")
             return None
         
+    @timed()
     def series_from_chart_soup(self, selector: str = ".highcharts-graph", 
                                invert_the_series: bool = False, 
                                set_max_datespan: bool = False,
@@ -452,15 +527,7 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
             print("Multiple series found in the chart. Got to figure out which one to use... work to do here... This will not work yet, please report error.")
             raise ValueError("Multiple series found in the chart. Got to figure out which one to use... work to do here...")
         else:
-            raw_series = self.chart_soup.select_one(".highcharts-graph")["d"].split(" ")
-    
-        ser = pd.Series(raw_series)
-        ser_num = pd.to_numeric(ser, errors='coerce').dropna()
-
-        exvals = ser_num[::2]; yvals = ser_num[1::2]
-        exvals = exvals.sort_values().to_list()
-        yvals = yvals.to_list()
-        series = pd.Series(yvals, index = exvals, name = "Extracted Series")
+            series = utils.series_from_svg_path(self.chart_soup.select_one(".highcharts-graph")["d"])
 
         if local_run:
             y_axis = self.get_y_axis()
@@ -524,6 +591,7 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
             logger.info("Failed to open date range inputs")
             return False
         
+    @timed()
     def custom_date_span_js(self, start_date: str = "1900-01-01", end_date: str = datetime.date.today().strftime("%Y-%m-%d")) -> bool:
         """Set the date range on the active chart in the webdriver window using JavaScript.
         This is more reliable than using Selenium's send_keys and can avoid issues with focus.
@@ -672,7 +740,8 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
         if hasattr(self, "metadata"):
             self.metadata["unit_tooltips"] = self.start_end["unit_str"]
 
-    def make_x_index(self, force_rerun_xlims: bool = True, force_rerun_freqdet: bool = True):
+    @timed()
+    def make_x_index(self, force_rerun_xlims: bool = True, force_rerun_freqdet: bool = True, use_cache: bool = False):
         """Make the DateTime Index for the series using the start and end dates scraped from the tooltips. 
         This uses Selenium and also scrapes the some of the latest datapoints from the tooltips on the chart in order to determine
         the frequency of the time series. It will take a bit of time to run.
@@ -682,11 +751,16 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
         will not run again by default if done a second time and start_end and frequency attributes are already set. 
         - force_rerun_freqdet (bool): Whether to force a rerun of the method to get the frequency of the time series again. The method
         will not run again by default if done a second time and frequency attribute is already set. 
+        - use_cache (bool): Use the frequency and start point stored for this indicator in tedata.cache.FrequencyCache, so that only
+        the end point of the series is probed from the tooltips. The cache is updated after a full determination. Default is False.
         """
         
         if not hasattr(self, "tooltip_scraper"):  # If the tooltip scraper object is not already created, create it.
             self.tooltip_scraper = utils.TooltipScraper(parent_instance = self) # Create a tooltip scraper child object
 
+        if use_cache and self._x_limits_from_cache():
+            return self._x_index_from_start_end()
+
         print("Using selenium and tooltip scraping to construct the date time index for the time-series, this'll take a bit...")
         ## Get the latest 10 or so points from the chart, date and value from tooltips, in order to determine the frequency of the time series.
         if force_rerun_freqdet or not hasattr(self, "latest_points"):
@@ -732,20 +806,68 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
 
             if self.start_end is not None:
                 logger.info(f"Start and end values scraped from tooltips: \n{self.start_end}")
-                start_date = self.start_end["start_date"]; end_date = self.start_end["end_date"]
-                dtIndex = self.dtIndex(start_date=start_date, end_date=end_date, ser_name = self.metadata["title"])
-                if dtIndex is not None:
-                    logger.info(f"DateTimeIndex created successfully for the time-series.")
-                    self.x_index = dtIndex
-                    return dtIndex  
-                else:
-                    logger.info(f"Error creating DateTimeIndex for the time-series.")
-                    return None
+                if use_cache:
+                    self._store_x_limits()
+        return self._x_index_from_start_end()
+
+    def _x_index_from_start_end(self):
+        """Make the x_index from the start_end and frequency attributes."""
+        if getattr(self, "start_end", None) is not None:
+            start_date = self.start_end["start_date"]; end_date = self.start_end["end_date"]
+            dtIndex = self.dtIndex(start_date=start_date, end_date=end_date, ser_name = self.metadata["title"])
+            if dtIndex is not None:
+                logger.info(f"DateTimeIndex created successfully for the time-series.")
+                self.x_index = dtIndex
+                return dtIndex  
             else:
-                print("Error: Start and end values not found...pulling out....")
-                logger.debug(f"Error: Start and end values not found...pulling out....")
+                logger.info(f"Error creating DateTimeIndex for the time-series.")
                 return None
+        else:
+            print("Error: Start and end values not found...pulling out....")
+            logger.debug(f"Error: Start and end values not found...pulling out....")
+            return None
+
+    def _x_limits_from_cache(self) -> bool:
+        """Set frequency & start_end from tedata.cache.FrequencyCache, probing only the latest point of the series from the tooltips.
+        Returns False if the indicator is not cached or the probe fails."""
+        try:
+            cache = FrequencyCache()
+            cached = cache.get(self.last_url)
+            cache.close()
+        except Exception as e:
+            logger.info(f"Error reading frequency cache: {str(e)}")
+            return False
+        if cached is None:
+            return False
+        latest = self.tooltip_scraper.latest_points_js(num_points=1)  # Shortest date span, latest point only.
+        if not latest:
+            logger.info("Could not probe the latest point, determining frequency and date limits from scratch.")
+            return False
+        end_value, unit_str = utils.extract_and_convert_value(latest[0]["value"])
+        end_date = pd.to_datetime(utils.ready_datestr(latest[0]["date"]))
+        self.latest_points = [{"date": end_date, "value": end_value}]
+        self.frequency = cached["frequency"]
+        if hasattr(self, "metadata"):
+            self.metadata["frequency"] = self.frequency
+        self.start_end = {"start_date": pd.Timestamp(cached["start_date"]), "end_date": end_date, "start_value": cached["start_value"],
+                          "end_value": end_value, "unit_str": unit_str}
+        logger.info(f"Frequency ({self.frequency}) and start date ({cached['start_date']}) from cache, end date probed: {end_date}")
+        self.set_max_date_span_viaCalendar()  # Leave the chart on the MAX span as the full determination does.
+        return True
+
+    def _store_x_limits(self):
+        """Store the frequency and start point of the series in tedata.cache.FrequencyCache."""
+        if not getattr(self, "frequency", None) or pd.isna(self.start_end.get("start_date")):
+            return
+        try:
+            cache = FrequencyCache()
+            cache.put(self.last_url, self.frequency, self.start_end["start_date"], start_value=self.start_end.get("start_value"))
+            cache.close()
+        except Exception as e:
+            logger.info(f"Error writing to frequency cache: {str(e)}")
+
     
+    @timed()
     def get_earliest_points(self, num_points: str = "all", num_years: int = 10):
         """Get the earliest data points from the chart using the cursor, use this to check for series that have differing frequency
         at start and end."""
@@ -768,6 +890,7 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
 
         return self.early_series
 
+    @timed()
     def full_series_fromTooltips(self, set_max_datespan: bool = False):
         """Scrape the full series from the dates and values displayed on the tooltips as the cursor is dragged across the chart. Uses javscript to handle the cursor 
         movement and tooltip retrieval and parsing. This is way faster than using a python loop. I suspect this may end up missing some points for series that 
@@ -888,6 +1011,7 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
         logger.info("Successfully scraped full series from tooltips.")
         return True
     
+    @timed()
     def series_from_highcharts(self):
         """Get the series data from the Highcharts JavaScript object. This is the fastest method of getting the series data from the chart.
         The series data is stored in the "series" attribute of the class. The method
@@ -927,6 +1051,58 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
             logger.info(f"Error extracting series from Highcharts: {e}")
             return None
 
+    @timed()
+    def update_series(self, history: pd.Series, window_years: float = 3, method: str = "highcharts_api") -> bool:
+        """Incremental refresh: scrape only a trailing window of the series and splice it into a previously scraped history, instead of
+        re-scraping the full date range. The window overlaps the end of the history so that revised values are picked up. The merged series
+        is stored in the 'series' attribute and the revised points in the 'revisions' attribute (DataFrame with "old" & "new" columns).
+        The page must already be loaded.
+
+        **Parameters:**
+        - history (pd.Series): The previously scraped series.
+        - window_years (float): Length of the trailing window, counted back from the last date of the history. Default is 3 years.
+        - method (str): "highcharts_api" to extract the window from the Highcharts API (falls back to tooltips if that fails),
+        any other method uses tooltips.
+
+        **Returns:**
+        - bool: True if the series was updated.
+        """
+        window_start = (history.index[-1] - pd.DateOffset(months=int(round(window_years * 12)))).strftime("%Y-%m-%d")
+        window_end = datetime.date.today().strftime("%Y-%m-%d")
+        if not self.custom_date_span_js(window_start, window_end):
+            logger.info("Could not set the date span for the update window.")
+            return False
+        time.sleep(1)
+
+        recent = None
+        if method in ("highcharts_api", "auto"):
+            recent = self.series_from_highcharts()
+        if recent is None or len(recent) == 0:
+            if not hasattr(self, "tooltip_scraper"):
+                self.init_tooltipScraper()
+            try:
+                self.tooltip_scraper.initialize_tooltip_simple()
+                recent = self.full_series_fromTooltips()
+            except Exception as e:
+                logger.info(f"Error scraping update window from tooltips: {str(e)}")
+        if recent is None or len(recent) == 0:
+            return False
+        recent = recent.loc[recent.index >= pd.Timestamp(window_start)]
+
+        self.series, self.revisions = utils.splice_series(history, recent)
+        if len(self.revisions) > 0:
+            logger.info(f"Incremental update found {len(self.revisions)} revised point(s):\n{self.revisions}")
+        self.metadata["start_date"] = self.series.index[0].strftime("%Y-%m-%d")
+        self.metadata["end_date"] = self.series.index[-1].strftime("%Y-%m-%d")
+        self.metadata["min_value"] = float(self.series.min())
+        self.metadata["max_value"] = float(self.series.max())
+        self.metadata["length"] = len(self.series)
+        freq = pd.infer_freq(self.series.index)
+        self.metadata["frequency"] = freq if freq is not None else self.metadata.get("frequency", "Unknown/irregular")
+        self.series_metadata = pd.Series(self.metadata)
+        logger.info(f"Incremental update: {len(recent)} point(s) scraped from {window_start}, series now ends {self.metadata['end_date']}.")
+        return True
+
     def get_chart_type_from_highcharts(self):
         """
         Get the chart type directly from the Highcharts API.
@@ -1012,6 +1188,7 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
             logger.info(f"Error setting chart type: {chart_type} (using Highcharts API)")
             return False
     
+    @timed()
     def get_y_axis(self, update_chart: bool = False, set_global_y_axis: bool = False):
         """Get y-axis values from chart to make a y-axis series with tick labels and positions (pixel positions).
         Also gets the limits of both axis in pixel co-ordinates. A series containing the y-axis values and their pixel positions (as index) is assigned
@@ -1315,6 +1492,7 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
         return True
 
 
+    @timed()
     def scrape_metadata(self):
         """Scrape metadata from the page. This method scrapes metadata from the page and stores it in the 'metadata' attribute. The metadata
         includes the title, indicator, country, length, frequency, source, , original source, id, start date, end date, min value, and max value of the series.
@@ -1362,13 +1540,18 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
         if self.metadata is not None:
             logger.debug(f"Metadata scraped successfully: {self.metadata}")
 
-    def export_data(self, savePath: str = os.getcwd(), filename: str = None):
-        """ Export the series data to an excel .xlsx file. The series and metadata attributes must be set before running this method.
-        Only do it after scraping the series data. The metadata will be saved in a separate sheet in the same file.
+    def export_data(self, savePath: str = os.getcwd(), filename: str = None, format: ExportFormat = "xlsx"):
+        """ Export the series data to file. The series and metadata attributes must be set before running this method.
+        Only do it after scraping the series data. For .xlsx the metadata is saved in a separate sheet in the same file, for "parquet" and
+        "arrow" it is embedded in the file schema. Read the file back with tedata.read_series.
         
         **Parameters**
         - savePath (str): The directory to save the file to. Default is the current working directory.
-        - filename (str): The name of the file to save the data to. Default is the name of the series. """
+        - filename (str): The name of the file to save the data to. Default is the name of the series.
+        - format (str): "xlsx" (default), "csv", "parquet", "arrow" or "jsonl". See tedata.export.write_series.
+
+        **Returns**
+        - path (str): Path of the file written. """
         
         if not hasattr(self, "series"):
             print("No series found. Run the series_from_chart_soup method first.")
@@ -1376,10 +1559,7 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
         if filename is None:
             filename = self.series_name
 
-        with pd.ExcelWriter(f"{savePath}{fdel}{filename}.xlsx") as writer:
-            self.series.to_excel(writer, sheet_name='Data')
-            self.series_metadata.to_excel(writer, sheet_name='Metadata')
-            logger.info(f"Data exported to {savePath}{fdel}{filename}")
+        return write_series(self.series, getattr(self, "series_metadata", None), filename=filename, out_dir=savePath, format=format)
 
     def get_page_source(self):
         """Get current page source after interactions"""
@@ -1441,4 +1621,7 @@ class TE_Scraper(Generic_Webdriver, SharedWebDriverState):
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.close()
\ No newline at end of file
+        self.close()
+
+# Imported last so that importing this module on its own (e.g "from tedata.scraper import TE_Scraper") works: utils needs TE_Scraper.
+from . import utils
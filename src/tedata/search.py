@@ -4,6 +4,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 import time
+import threading
 import pandas as pd
 import os
 
@@ -14,6 +15,8 @@ fdel= os.path.sep
 ## Import the TE_Scraper class from the scraper module ################
 from .base import Generic_Webdriver
 from .scrape_chart import scrape_chart
+from .ratelimit import rate_limited_get
+from .cache import SearchCache, normalize_query
 
 import logging
 # Get the logger from the parent package
@@ -57,7 +60,7 @@ class search_TE(Generic_Webdriver):
         # Load page
         try:
             logger.info("Loading home page at https://tradingeconomics.com/ ...")
-            self.driver.get("https://tradingeconomics.com/")
+            rate_limited_get(self.driver, "https://tradingeconomics.com/")
 
             # Check if search box exists
             search_box = WebDriverWait(self.driver, timeout).until(
@@ -73,7 +76,8 @@ class search_TE(Generic_Webdriver):
             logger.debug(f"Error occurred, check internet connection. Error details: {str(e)}")
             return None
 
-    def search_trading_economics(self, search_term: str = None, wait_time: int = 5):
+    def search_trading_economics(self, search_term: str = None, wait_time: int = 5, use_cache: bool = False, max_age: float = None,
+                                 background_refresh: bool = False):
         """Search Trading Economics website for a given term and extract URLs of search results.
         This method will search the Trading Economics website for a given term and extract the URLs of the search results.
         It will enter the search term in the search box, submit the search, and extract the URLs of the search results.
@@ -84,7 +88,23 @@ class search_TE(Generic_Webdriver):
         - search_term (str): The term to search for on the website.
         - wait_time (int): The time to wait for the search results to load, in seconds (if you get an empty table 
         of results, increase this time).
+        - use_cache (bool): Return cached results for the query (tedata.cache.SearchCache) without using the browser if there are any,
+        and cache fresh results. Default is False.
+        - max_age (float): Maximum age of cached results in seconds. Default is the cache's time-to-live (7 days).
+        - background_refresh (bool): With use_cache, return expired cached results straight away and refresh them in a background thread
+        with a separate browser.
         """
+        if search_term is None:
+            search_term = self.search_term
+        else:
+            self.search_term = search_term
+
+        if use_cache:
+            cached = _cached_search(search_term, max_age=max_age, background_refresh=background_refresh, headless=self.headless)
+            if cached is not None:
+                self.results = cached
+                self.results_table()
+                return None
 
         # Load home page, can't yet figure ourt how to work the search bar from other pages
         if self.driver.current_url != "https://tradingeconomics.com/":
@@ -94,10 +114,6 @@ class search_TE(Generic_Webdriver):
             search_box = WebDriverWait(self.driver, 30).until(
                 EC.presence_of_element_located((By.ID, "thisIstheSearchBoxIdTag")))
  
-        if search_term is None:
-            search_term = self.search_term
-        else:
-            self.search_term = search_term
         logger.debug(f"Searching Trading Economics for: {self.search_term}")
         
         try:
@@ -123,6 +139,8 @@ class search_TE(Generic_Webdriver):
 
             self.results = self.extract_search_results(self.driver.page_source)
             self.results_table()
+            if use_cache and len(self.results) > 0:
+                _store_search(search_term, self.results)
             logger.debug(f"Search for {self.search_term} completed successfully.")
         
         except Exception as e:
@@ -142,38 +160,19 @@ class search_TE(Generic_Webdriver):
         
         print("Found search results on page.")
         time.sleep(1)
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Find all list items in search results
-        results = soup.find_all('li', class_='list-group-item')
-        
-        urls = []
-        for result in results:
-            # Find the main link in each result item
-            link = result.find('a', href=True)
-            if link and link['href'].startswith('/'):
-                full_url = f"https://tradingeconomics.com{link['href']}"
-                urls.append(full_url)
-        
-        return urls
+        return parse_search_results(html_content)
     
     def results_table(self):
         """Create a DataFrame from the search results"""
 
         if hasattr(self, "results"):
-            metrics = []
-            countries = []
-            for result in self.results:
-                metrics.append(result.split("/")[-1].replace("-", " "))
-                countries.append(result.split("/")[-2].replace("-", " "))
-            df = pd.DataFrame({'country': countries, 'metric': metrics, "url": self.results})
-            df.index.rename('result', inplace=True)
-            self.result_table = df
+            self.result_table = _results_frame(self.results)
         else:
             print("No search results found.")
             return None
         
-    def get_data(self, result_num: int = 0, method: str = "highcharts_api", start_date: str = None, end_date: str = None):
+    def get_data(self, result_num: int = 0, method: str = "highcharts_api", start_date: str = None, end_date: str = None,
+                 use_cache: bool = False, max_age: float = None):
         """Scrape data for a given search result number.
         This method will scrape data for a given search result number from the search results table.
         It will extract the URL for the result and scrape the data from the chart at that URL.
@@ -183,6 +182,8 @@ class search_TE(Generic_Webdriver):
         **Parameters:**
         - result_num (int): The index of the search result in your result table to scrape the data for.
         - method (str): The method to use for scraping the data. Options are "path" (default) or "tooltips" or "mixed".
+        - use_cache (bool): Serve the series from the local series cache if it holds a fresh copy, see scrape_chart.
+        - max_age (float): Maximum age of a cached series in seconds, see scrape_chart.
 
         **Returns:**
         - scraped_data (TE_Scraper): The scraped data object. The data can be accessed from the 'series' attribute of the TE_SCraper object
@@ -212,7 +213,8 @@ class search_TE(Generic_Webdriver):
         if hasattr(self, "result_table"):
             url = self.result_table.loc[result_num, "url"]
             print(f"Scraping data from: {url}")
-            self.scraped_data = scrape_chart(url, driver=self.driver, headless=self.headless, browser=self.browser, method=method, start_date=start_date, end_date=end_date)
+            self.scraped_data = scrape_chart(url, driver=self.driver, headless=self.headless, browser=self.browser, method=method, start_date=start_date, end_date=end_date,
+                                             use_cache=use_cache, max_age=max_age)
             if self.scraped_data is not None:
                 print(f"Data scraped successfully from: {url}")
                 logger.debug(f"Data scraped successfully from: {url}")
@@ -221,4 +223,113 @@ class search_TE(Generic_Webdriver):
             print("No search result found with the number specified: ", result_num)
             logger.debug(f"No search result found with the number specified: {result_num}")
             return None
-        
\ No newline at end of file
+
+## Standalone functions ########################################
+def parse_search_results(html_content: str) -> list:
+    """URLs of the results in the HTML of a Trading Economics search results page. Used by search_TE.extract_search_results."""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    # Find all list items in search results
+    results = soup.find_all('li', class_='list-group-item')
+    
+    urls = []
+    for result in results:
+        # Find the main link in each result item
+        link = result.find('a', href=True)
+        if link and link['href'].startswith('/'):
+            full_url = f"https://tradingeconomics.com{link['href']}"
+            urls.append(full_url)
+    
+    return urls
+
+## Search result cache helpers ########################################
+_refreshing = set()  # Queries being refreshed in the background.
+_refreshing_lock = threading.Lock()
+
+def _store_search(query: str, results: list):
+    try:
+        cache = SearchCache()
+        cache.put(query, results)
+        cache.close()
+    except Exception as e:
+        logger.info(f"Error writing to search cache: {str(e)}")
+
+def _cached_search(query: str, max_age: float = None, background_refresh: bool = False, headless: bool = True) -> list:
+    """Cached result URLs for a query, or None. With background_refresh expired results are returned too and a refresh is started."""
+    try:
+        cache = SearchCache()
+        cached = cache.get(query, max_age=max_age, allow_stale=background_refresh)
+        cache.close()
+    except Exception as e:
+        logger.info(f"Error reading search cache: {str(e)}")
+        return None
+    if cached is None:
+        return None
+    if cached["stale"]:
+        _refresh_in_background(query, headless=headless)
+    logger.info(f"Search results for '{query}' served from cache, age: {cached['age']:.0f} s.")
+    return cached["results"]
+
+def _refresh_in_background(query: str, headless: bool = True):
+    """Re-run a search with its own browser in a daemon thread and update the cache. Only one refresh per query runs at a time."""
+    key = normalize_query(query)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh():
+        searcher = None
+        try:
+            searcher = search_TE(headless=headless)
+            searcher.search_trading_economics(query, use_cache=False)
+            if len(getattr(searcher, "results", [])) > 0:
+                _store_search(query, searcher.results)
+                logger.info(f"Search cache refreshed for '{query}'.")
+        except Exception as e:
+            logger.info(f"Background refresh of search '{query}' failed: {str(e)}")
+        finally:
+            if searcher is not None and getattr(searcher, "driver", None) is not None:
+                try:
+                    searcher.driver.quit()
+                except Exception:
+                    pass
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=refresh, name="tedata-search-refresh", daemon=True).start()
+
+def search_results(query: str, max_age: float = None, background_refresh: bool = False, headless: bool = True, wait_time: int = 5) -> pd.DataFrame:
+    """Search Trading Economics for a query, serving the results from the search cache when possible. A browser is only started when the
+    query is not cached (or the cached results are too old and background_refresh is False).
+
+    **Parameters:**
+    - query (str): The search term.
+    - max_age (float): Maximum age of cached results in seconds. Default is the cache's time-to-live (7 days).
+    - background_refresh (bool): Return expired cached results straight away and refresh them in a background thread.
+    - headless (bool): Whether to run the browser in headless mode, if one is needed.
+    - wait_time (int): See search_TE.search_trading_economics.
+
+    **Returns:**
+    - pd.DataFrame: The results table with 'country', 'metric' and 'url' columns, as the 'result_table' attribute of search_TE.
+    """
+    cached = _cached_search(query, max_age=max_age, background_refresh=background_refresh, headless=headless)
+    if cached is not None:
+        return _results_frame(cached)
+    searcher = search_TE(headless=headless)
+    try:
+        searcher.search_trading_economics(query, wait_time=wait_time)
+        if len(getattr(searcher, "results", [])) > 0:
+            _store_search(query, searcher.results)
+        return getattr(searcher, "result_table", None)
+    finally:
+        try:
+            searcher.driver.quit()
+        except Exception:
+            pass
+
+def _results_frame(results: list) -> pd.DataFrame:
+    df = pd.DataFrame({'country': [url.split("/")[-2].replace("-", " ") for url in results],
+                       'metric': [url.split("/")[-1].replace("-", " ") for url in results], "url": results})
+    df.index.rename('result', inplace=True)
+    return df
@@ -0,0 +1,253 @@
+import os
+import time
+import socket
+import bisect
+import threading
+import multiprocessing
+from typing import Iterable
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports
+from .ids import normalize_id
+from .jobqueue import JobQueue, run_worker, shard_key, default_worker_name
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.sharding')
+
+KEY_SPACE = 2 ** 63  # shard_key() returns values in [0, KEY_SPACE).
+
+######## Consistent hashing ##############################
+class HashRing:
+    """Consistent hash ring mapping series ids ("country/indicator") to nodes. Each node is placed on the ring 'replicas' times
+    so that keys are spread evenly, and adding or removing a node only moves the keys of that node.
+
+    **Init Parameters:**
+    - nodes (Iterable[str]): Node names.
+    - replicas (int): Number of points per node on the ring. Default is 64.
+    """
+
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        self.replicas = replicas
+        self.nodes = sorted(set(nodes))
+        points = sorted((shard_key(f"{node}#{i}"), node) for node in self.nodes for i in range(replicas))
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, id) -> str:
+        """Node that owns an id (or a shard key as returned by tedata.jobqueue.shard_key). Returns None if the ring is empty."""
+        if not self._points:
+            return None
+        key = id if isinstance(id, int) else shard_key(normalize_id(id))
+        index = bisect.bisect_left(self._points, key)
+        return self._owners[index % len(self._points)]
+
+    def ranges(self, node: str) -> list:
+        """Key ranges owned by a node as a list of (low, high) tuples, low exclusive & high inclusive."""
+        ranges = []
+        for i, (point, owner) in enumerate(zip(self._points, self._owners)):
+            if owner != node:
+                continue
+            if i == 0:  # The first point also owns the wrap around from the last point.
+                ranges.append((-1, point))
+                ranges.append((self._points[-1], KEY_SPACE - 1))
+            else:
+                ranges.append((self._points[i - 1], point))
+        ranges.sort()
+        merged = []
+        for low, high in ranges:
+            if merged and merged[-1][1] >= low:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+            else:
+                merged.append((low, high))
+        return merged
+
+######## Sharded job queue ##############################
+class ShardedQueue(JobQueue):
+    """JobQueue shared by worker nodes on several hosts. Each node registers itself in a 'nodes' table and keeps a heartbeat there.
+    Pending jobs are split between the live nodes by consistent hashing of their ids, so each node works through its own shard.
+    When a node stops heart-beating its shard is spread over the remaining nodes, and when a node joins it takes over part of the
+    others' shards. Jobs already leased by a dead node are handed out again when their lease expires, as in JobQueue.
+
+    Put the SQLite file on a filesystem that all hosts can reach (NFS, SMB etc). WAL mode is off by default because it does not
+    work over network filesystems. Several processes on one host can also run as separate nodes, which is how this is tested locally.
+
+    **Init Parameters:**
+    - path (str): Path of the shared SQLite file.
+    - node (str): Name of this node. Default is "hostname:pid".
+    - heartbeat_timeout (float): Seconds without a heartbeat after which a node is considered dead. Default is 120.
+    - replicas (int): Points per node on the hash ring.
+    - steal (bool): Lease jobs from other nodes' shards once this node's shard is empty. Default is True, which keeps fast nodes busy
+    at the end of a crawl. Set to False for strict partitioning.
+    - wal (bool): Use SQLite's write-ahead log, only if all nodes are on the same host. Default is False.
+    """
+
+    def __init__(self,
+                 path: str = "tedata_jobs.db",
+                 node: str = None,
+                 heartbeat_timeout: float = 120,
+                 replicas: int = 64,
+                 steal: bool = True,
+                 wal: bool = False):
+        super().__init__(path, wal=wal)
+        self.node = node or default_worker_name()
+        self.heartbeat_timeout = heartbeat_timeout
+        self.replicas = replicas
+        self.steal = steal
+        self._heartbeat_thread = None
+        with self._transaction() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS nodes (
+                node TEXT PRIMARY KEY,
+                host TEXT,
+                heartbeat REAL NOT NULL,
+                joined_at REAL NOT NULL)""")
+        self.heartbeat()
+
+    def heartbeat(self):
+        """Register this node or refresh its heartbeat."""
+        now = time.time()
+        with self._transaction() as conn:
+            self._heartbeat(conn, now)
+
+    def _heartbeat(self, conn, now: float):
+        conn.execute("""INSERT INTO nodes (node, host, heartbeat, joined_at) VALUES (?, ?, ?, ?)
+                     ON CONFLICT(node) DO UPDATE SET heartbeat = excluded.heartbeat""", (self.node, socket.gethostname(), now, now))
+
+    def leave(self):
+        """Remove this node from the ring so that its shard is taken over by the other nodes straight away."""
+        self.stop_heartbeat()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM nodes WHERE node = ?", (self.node,))
+
+    def live_nodes(self) -> list:
+        """Names of the nodes that have sent a heartbeat within heartbeat_timeout seconds."""
+        return self._live_nodes(self.conn, time.time())
+
+    def _live_nodes(self, conn, now: float) -> list:
+        rows = conn.execute("SELECT node FROM nodes WHERE heartbeat >= ? ORDER BY node", (now - self.heartbeat_timeout,))
+        return [row["node"] for row in rows]
+
+    def ring(self) -> HashRing:
+        """Hash ring of the currently live nodes."""
+        return HashRing(self.live_nodes(), replicas=self.replicas)
+
+    def lease(self, worker: str = None, lease_timeout: float = 900) -> dict:
+        """Lease the next job from this node's shard (or from another shard if this one is empty and steal is True).
+        Also refreshes the node's heartbeat. See JobQueue.lease."""
+        worker = worker or self.node
+        now = time.time()
+        with self._transaction() as conn:
+            self._heartbeat(conn, now)
+            self._reclaim_expired(conn, now)
+            ring = HashRing(self._live_nodes(conn, now), replicas=self.replicas)
+            ranges = ring.ranges(self.node)
+            row = None
+            if ranges:
+                where = " OR ".join(["(shard > ? AND shard <= ?)"] * len(ranges))
+                params = [bound for bounds in ranges for bound in bounds]
+                row = conn.execute(f"""SELECT job_id FROM jobs WHERE status = 'pending' AND ({where})
+                                   ORDER BY priority DESC, job_id LIMIT 1""", params).fetchone()
+            if row is None and self.steal:
+                row = conn.execute("""SELECT job_id FROM jobs WHERE status = 'pending'
+                                   ORDER BY priority DESC, job_id LIMIT 1""").fetchone()
+            if row is None:
+                return None
+            conn.execute("""UPDATE jobs SET status = 'leased', attempts = attempts + 1, worker = ?, lease_expires = ?, updated_at = ?
+                         WHERE job_id = ?""", (worker, now + lease_timeout, now, row["job_id"]))
+            job = conn.execute("""SELECT job_id, id, method, priority, attempts, worker, lease_expires FROM jobs
+                               WHERE job_id = ?""", (row["job_id"],)).fetchone()
+        return dict(job)
+
+    def shard_stats(self) -> dict:
+        """Number of pending jobs in the shard of each live node, {node: count}."""
+        ring = self.ring()
+        counts = {node: 0 for node in ring.nodes}
+        for row in self.conn.execute("SELECT shard FROM jobs WHERE status = 'pending'"):
+            counts[ring.node_for(row["shard"])] += 1
+        return counts
+
+    def start_heartbeat(self, interval: float = None):
+        """Keep the node's heartbeat fresh from a background thread, e.g while a long scrape is running."""
+        if self._heartbeat_thread is not None:
+            return
+        self._heartbeat_thread = _NodeHeartbeat(self, interval or max(self.heartbeat_timeout / 4, 1))
+        self._heartbeat_thread.start()
+
+    def stop_heartbeat(self):
+        if self._heartbeat_thread is not None:
+            self._heartbeat_thread.stop()
+            self._heartbeat_thread.join()
+            self._heartbeat_thread = None
+
+class _NodeHeartbeat(threading.Thread):
+    """Background thread that refreshes a node's heartbeat."""
+
+    def __init__(self, queue: ShardedQueue, interval: float):
+        super().__init__(daemon=True)
+        self.queue = queue  # Connections are per thread so the queue can be used from here.
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.queue.heartbeat()
+            except Exception as e:
+                logger.info(f"ShardedQueue: heartbeat of node {self.queue.node} failed: {str(e)}")
+        self.queue.close()
+
+    def stop(self):
+        self.stopped.set()
+
+## Workers ########################################
+def run_shard_worker(path: str,
+                     node: str = None,
+                     heartbeat_timeout: float = 120,
+                     steal: bool = True,
+                     **kwargs) -> dict:
+    """Join the crawl in the shared queue at 'path' as a node and work through this node's shard with run_worker. Start one of these
+    on each host (or several per host, with different node names). The node leaves the ring when it finishes.
+    Use out_dir (or a handler) pointing at shared storage so that all results end up in one place.
+
+    **Parameters:**
+    - path (str): Path of the shared SQLite file, see ShardedQueue.
+    - node (str): Name of this node. Default is "hostname:pid".
+    - heartbeat_timeout (float): Seconds without a heartbeat after which a node is considered dead.
+    - steal (bool): Take jobs from other shards when this node's shard is empty.
+    - **kwargs: Passed to tedata.jobqueue.run_worker e.g method, out_dir, format, handler, lease_timeout, headless.
+
+    **Returns:**
+    - dict with the number of jobs "done" and "failed" by this node.
+    """
+    queue = ShardedQueue(path, node=node, heartbeat_timeout=heartbeat_timeout, steal=steal)
+    queue.start_heartbeat()
+    logger.info(f"ShardedQueue: node {queue.node} joined, live nodes: {queue.live_nodes()}")
+    try:
+        return run_worker(queue, worker=queue.node, **kwargs)
+    finally:
+        queue.leave()
+        queue.close()
+
+def run_shard_workers(path: str, nodes=4, **kwargs) -> list:
+    """Start several run_shard_worker processes on this host and wait for them to finish.
+
+    **Parameters:**
+    - path (str): Path of the shared SQLite file.
+    - nodes (int or list): Number of nodes to start, or a list of node names. Default names are "hostname-0", "hostname-1" etc.
+    - **kwargs: Passed to run_shard_worker.
+
+    **Returns:**
+    - list: The exit codes of the worker processes.
+    """
+    if isinstance(nodes, int):
+        nodes = [f"{socket.gethostname()}-{i}" for i in range(nodes)]
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=run_shard_worker, args=(path,), kwargs={"node": node, **kwargs}, name=f"tedata-node-{node}")
+                 for node in nodes]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return [process.exitcode for process in processes]
@@ -0,0 +1,192 @@
+import os
+import time
+import asyncio
+import inspect
+import threading
+import concurrent.futures
+from typing import Literal, Callable
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports
+from .ids import normalize_id, id_to_url
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.singleflight')
+
+# Seconds that a finished result stays available to late arrivals. Kept in an environment variable so that worker processes inherit it.
+LINGER_ENV = "TEDATA_SINGLEFLIGHT_LINGER"
+DEFAULT_LINGER = 5.0
+
+######## Request coalescing ##############################
+class _Call:
+    """One in-flight (or recently finished) call. The concurrent.futures.Future is shared by every caller: threads block on
+    future.result() and coroutines await it through asyncio.wrap_future."""
+
+    def __init__(self):
+        self.future = concurrent.futures.Future()
+        self.future.set_running_or_notify_cancel()   # Puts the future in the running state so that it can no longer be cancelled.
+        self.expires = None   # Set when the call finishes and the result may be reused.
+        self.callers = 1
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one call. The first caller for a key (the leader) runs the function,
+    callers that arrive while it is running wait for it and get the same result (or exception). After a successful call, the result
+    is kept for 'linger' seconds so that late arrivals re-use it as well. Failed calls (exception or None result) are not kept.
+    Works for threads and asyncio tasks alike and both can share the same call.
+
+    Note that every caller gets the same result object. Copy it before modifying it.
+
+    **Init Parameters:**
+    - linger (float): Seconds that a finished result is re-used for. Use 0 to share only in-flight calls. Default is the
+    TEDATA_SINGLEFLIGHT_LINGER environment variable, or 5 seconds.
+
+    **Example:**
+    ```
+    flight = SingleFlight(linger=5)
+    result = flight.do("united-states/cpi", expensive_function, arg1, kwarg1=1)
+    result = await flight.do_async("united-states/cpi", expensive_function, arg1, kwarg1=1)
+    ```
+    """
+
+    def __init__(self, linger: float = None):
+        if linger is None:
+            linger = float(os.environ.get(LINGER_ENV, DEFAULT_LINGER))
+        self.linger = linger
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def _join(self, key) -> tuple:
+        """Return (call, is_leader) for key. Registers a new call if there is no in-flight or lingering one."""
+        with self._lock:
+            now = time.monotonic()
+            for stale_key in [k for k, c in self._calls.items() if c.expires is not None and c.expires <= now]:
+                del self._calls[stale_key]
+            call = self._calls.get(key)
+            if call is not None:
+                call.callers += 1
+                logger.debug(f"SingleFlight: joining {'finished' if call.expires is not None else 'in-flight'} call for {key}.")
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            return call, True
+
+    def _finish(self, key, call: _Call, result=None, error: BaseException = None):
+        with self._lock:
+            if error is None and result is not None and self.linger > 0:
+                call.expires = time.monotonic() + self.linger
+            elif self._calls.get(key) is call:
+                del self._calls[key]
+        if call.callers > 1:
+            logger.info(f"SingleFlight: {call.callers} callers shared the call for {key}.")
+        if error is not None:
+            call.future.set_exception(error)
+        else:
+            call.future.set_result(result)
+
+    def _run(self, key, call: _Call, fn: Callable, args: tuple, kwargs: dict):
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            return
+        self._finish(key, call, result=result)
+
+    async def _run_async(self, key, call: _Call, fn: Callable, args: tuple, kwargs: dict):
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            return
+        self._finish(key, call, result=result)
+
+    def do(self, key, fn: Callable, *args, **kwargs):
+        """Call fn(*args, **kwargs), or wait for the in-flight call with the same key and return its result.
+        Exceptions raised by the leader's call are raised in every waiting caller."""
+        call, leader = self._join(key)
+        if leader:
+            self._run(key, call, fn, args, kwargs)
+        return call.future.result()
+
+    async def do_async(self, key, fn: Callable, *args, executor: concurrent.futures.Executor = None, **kwargs):
+        """asyncio version of do. fn can be a coroutine function or a blocking function, the latter is run on 'executor'
+        (default executor of the loop if None). Cancelling a waiting task does not cancel the shared call, other callers still get the result."""
+        call, leader = self._join(key)
+        if leader:
+            if inspect.iscoroutinefunction(fn):
+                asyncio.ensure_future(self._run_async(key, call, fn, args, kwargs))
+            else:
+                asyncio.get_running_loop().run_in_executor(executor, self._run, key, call, fn, args, kwargs)
+        return await asyncio.shield(asyncio.wrap_future(call.future))
+
+    def forget(self, key=None):
+        """Drop the lingering result for key (all keys if None) so that the next call runs again. In-flight calls are not affected."""
+        with self._lock:
+            for k in [k for k, c in self._calls.items() if c.expires is not None and (key is None or k == key)]:
+                del self._calls[k]
+
+    def in_flight(self) -> list:
+        """List of keys with a call that is still running."""
+        with self._lock:
+            return [k for k, c in self._calls.items() if c.expires is None]
+
+## Shared scrape_chart ########################################
+_scrape_flight = SingleFlight()
+
+def _flight_key(url: str = None, id: str = None, country: str = "united-states", indicator: str = None,
+                method: str = "highcharts_api", start_date: str = None, end_date: str = None, use_cache: bool = False,
+                max_age: float = None) -> tuple:
+    """Key for coalescing scrape_chart calls: normalized id + the arguments that change the returned series. use_cache and max_age are
+    part of it so that a call asking for a fresh scrape is never served the result of one that was allowed a cached copy."""
+    if url is None:
+        if indicator is not None:
+            url = f"{country}/{indicator}"
+        elif id is not None:
+            url = id
+        else:
+            raise ValueError("No URL, id or indicator supplied.")
+    return (normalize_id(url, country=country), method, start_date, end_date, use_cache, max_age)
+
+def scrape_chart_shared(url: str = None,
+                        id: str = None,
+                        country: str = "united-states",
+                        indicator: str = None,
+                        method: Literal["path", "tooltips", "mixed", "highcharts_api", "auto"] = "highcharts_api",
+                        start_date: str = None,
+                        end_date: str = None,
+                        **kwargs):
+    """scrape_chart with request coalescing. Concurrent calls for the same chart (same normalized id, method and date range) share one
+    scrape and get the same TE_Scraper object back. A successful result is re-used for a few seconds after it finishes
+    (see SingleFlight, TEDATA_SINGLEFLIGHT_LINGER). Copy the series before modifying it as it is shared with the other callers.
+
+    **Parameters**
+    - url, id, country, indicator, method, start_date, end_date: Specify the chart, as for scrape_chart.
+    - kwargs: Other keyword arguments are passed to scrape_chart (headless, wait_time, use_cache etc). They are taken from the caller that
+    starts the scrape, so don't pass a scraper or driver here.
+
+    **Returns**
+    - TE_Scraper object with the series, or None if scraping failed (as for scrape_chart).
+    """
+    from .scrape_chart import scrape_chart
+
+    key = _flight_key(url, id, country, indicator, method, start_date, end_date, kwargs.get("use_cache", False), kwargs.get("max_age"))
+    return _scrape_flight.do(key, scrape_chart, url=id_to_url(key[0]), method=method, start_date=start_date, end_date=end_date, **kwargs)
+
+async def scrape_chart_shared_async(url: str = None,
+                                    id: str = None,
+                                    country: str = "united-states",
+                                    indicator: str = None,
+                                    method: Literal["path", "tooltips", "mixed", "highcharts_api", "auto"] = "highcharts_api",
+                                    start_date: str = None,
+                                    end_date: str = None,
+                                    executor: concurrent.futures.Executor = None,
+                                    **kwargs):
+    """asyncio version of scrape_chart_shared. The scrape runs on 'executor' (default executor of the loop if None) and is shared with
+    concurrent callers from other tasks and threads."""
+    from .scrape_chart import scrape_chart
+
+    key = _flight_key(url, id, country, indicator, method, start_date, end_date, kwargs.get("use_cache", False), kwargs.get("max_age"))
+    return await _scrape_flight.do_async(key, scrape_chart, url=id_to_url(key[0]), method=method, start_date=start_date,
+                                         end_date=end_date, executor=executor, **kwargs)
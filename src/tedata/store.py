@@ -0,0 +1,172 @@
+import os
+import time
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports. This module must stay importable without selenium.
+from .ids import normalize_id
+from .cache import SQLiteStore
+from .export import metadata_to_dict
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.store')
+
+SQLITE_MAX_VARIABLES = 900   # Stay below SQLite's limit on the number of "?" parameters in one statement.
+
+def _to_ns(date) -> int:
+    return pd.Timestamp(date).value
+
+######## Local time-series store ##############################
+class SeriesStore(SQLiteStore):
+    """Single file store for many scraped series, in SQLite (WAL mode, so readers don't block the writer). Points are kept in one table
+    with primary key (id, date), stored without a rowid, so a range read of one series is a single index scan and reads over thousands of
+    series stay fast. Dates are stored as integer nanoseconds since the epoch. Writing a series upserts its points: new dates are added,
+    revised values replace the old ones. Safe to use from several threads and processes at once.
+
+    **Init Parameters:**
+    - path (str): Path of the SQLite file. Default is '<cache_dir>/series_store.db'.
+
+    **Example:**
+    ```
+    store = SeriesStore("macro.db")
+    store.put("united-states/gdp", scraped.series, scraped.series_metadata)
+    gdp = store.get("united-states/gdp", start="2010-01-01")
+    frame = store.get_many(["united-states/gdp", "japan/gdp"])
+    ```
+    """
+    default_filename = "series_store.db"
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("""CREATE TABLE IF NOT EXISTS points (
+            id TEXT NOT NULL,
+            date INTEGER NOT NULL,
+            value REAL,
+            PRIMARY KEY (id, date)) WITHOUT ROWID""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS series (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            metadata TEXT,
+            updated_at REAL NOT NULL)""")
+
+    def put(self, id: str, series: pd.Series, metadata=None, replace: bool = False) -> int:
+        """Upsert the points of a series. Dates already in the store get the new value, new dates are added.
+
+        **Parameters**
+        - id (str): URL or id of the series.
+        - series (pd.Series): Series with a DatetimeIndex.
+        - metadata (pd.Series or dict): Series metadata, replaces the stored metadata if given.
+        - replace (bool): Also delete stored points whose dates are not in 'series', i.e store exactly this series.
+
+        **Returns**
+        - int: Number of points that were added or changed.
+        """
+        id = normalize_id(id)
+        series = series[~series.index.duplicated(keep="last")]
+        dates = pd.DatetimeIndex(series.index).asi8.tolist()
+        values = [None if pd.isna(v) else float(v) for v in series.to_numpy()]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            if replace:
+                conn.execute("DELETE FROM points WHERE id = ?", (id,))
+            conn.executemany("""INSERT INTO points (id, date, value) VALUES (?, ?, ?)
+                             ON CONFLICT(id, date) DO UPDATE SET value = excluded.value WHERE value IS NOT excluded.value""",
+                             zip([id] * len(dates), dates, values))
+            changed = conn.total_changes - before
+            row = conn.execute("SELECT metadata FROM series WHERE id = ?", (id,)).fetchone()
+            meta = json.dumps(metadata_to_dict(metadata), default=str) if metadata is not None else (row["metadata"] if row else None)
+            conn.execute("""INSERT INTO series (id, name, metadata, updated_at) VALUES (?, ?, ?, ?)
+                         ON CONFLICT(id) DO UPDATE SET name = excluded.name, metadata = excluded.metadata, updated_at = excluded.updated_at""",
+                         (id, None if series.name is None else str(series.name), meta, time.time()))
+        if replace:
+            changed = len(dates)   # Deleted & re-inserted rows can't be told apart from changed ones.
+        logger.debug(f"SeriesStore: {changed} points of {id} added or changed.")
+        return changed
+
+    def put_results(self, results: dict) -> dict:
+        """Store the successful results of scrape_many / scrape_many_async (dict of id -> result). Returns dict of id -> points changed."""
+        return {id: self.put(id, result["series"], result.get("metadata"))
+                for id, result in results.items() if result.get("error") is None and result.get("series") is not None}
+
+    def _range_clause(self, start=None, end=None) -> tuple:
+        clause, params = "", []
+        if start is not None:
+            clause += " AND date >= ?"
+            params.append(_to_ns(start))
+        if end is not None:
+            clause += " AND date <= ?"
+            params.append(_to_ns(end))
+        return clause, params
+
+    def get(self, id: str, start=None, end=None) -> pd.Series:
+        """Get a stored series, optionally only the points between start and end (inclusive, "YYYY-MM-DD" or anything pd.Timestamp takes).
+        Returns None if the id is not in the store."""
+        id = normalize_id(id)
+        name = self.conn.execute("SELECT name FROM series WHERE id = ?", (id,)).fetchone()
+        if name is None:
+            return None
+        clause, params = self._range_clause(start, end)
+        rows = self.conn.execute(f"SELECT date, value FROM points WHERE id = ?{clause} ORDER BY date", [id] + params).fetchall()
+        dates = np.array([row[0] for row in rows], dtype="int64")
+        values = np.array([row[1] for row in rows], dtype="float64")
+        return pd.Series(values, index=pd.DatetimeIndex(dates.view("datetime64[ns]"), name="date"), name=name["name"])
+
+    def iter_points(self, id: str, start=None, end=None):
+        """Iterate over the (date, value) points of a stored series in date order, dates as integer nanoseconds, without loading the whole
+        series: rows are fetched from a database cursor as they are consumed. Yields nothing if the id is not in the store."""
+        clause, params = self._range_clause(start, end)
+        cursor = self.conn.execute(f"SELECT date, value FROM points WHERE id = ?{clause} ORDER BY date", [normalize_id(id)] + params)
+        for row in cursor:
+            yield row[0], row[1]
+
+    def get_many(self, ids, start=None, end=None) -> pd.DataFrame:
+        """Get several stored series as one wide DataFrame with a column per id (in the order given) and the union of their dates as index.
+        Ids that are not in the store give a column of NaN."""
+        ids = list(dict.fromkeys(normalize_id(id) for id in ids))
+        clause, params = self._range_clause(start, end)
+        rows = []
+        for i in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            chunk = ids[i:i + SQLITE_MAX_VARIABLES]
+            rows.extend(self.conn.execute(f"SELECT id, date, value FROM points WHERE id IN ({','.join('?' * len(chunk))}){clause}",
+                                          chunk + params).fetchall())
+        long = pd.DataFrame([tuple(row) for row in rows], columns=["id", "date", "value"])
+        long["date"] = pd.to_datetime(long["date"].astype("int64"), unit="ns")
+        wide = long.pivot(index="date", columns="id", values="value").reindex(columns=ids).sort_index()
+        wide.columns.name = None
+        return wide
+
+    def metadata(self, id: str) -> dict:
+        """Stored metadata of a series as a dict, None if the id is not in the store."""
+        row = self.conn.execute("SELECT metadata FROM series WHERE id = ?", (normalize_id(id),)).fetchone()
+        return None if row is None else json.loads(row["metadata"] or "{}")
+
+    def updated_at(self, id: str) -> float:
+        """Time (seconds since the epoch) the series was last written to the store, None if the id is not in the store."""
+        row = self.conn.execute("SELECT updated_at FROM series WHERE id = ?", (normalize_id(id),)).fetchone()
+        return None if row is None else row["updated_at"]
+
+    def ids(self) -> list:
+        """Ids of all stored series."""
+        return [row["id"] for row in self.conn.execute("SELECT id FROM series ORDER BY id")]
+
+    def delete(self, id: str):
+        """Remove a series and its points from the store."""
+        id = normalize_id(id)
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM points WHERE id = ?", (id,))
+            conn.execute("DELETE FROM series WHERE id = ?", (id,))
+
+    def info(self) -> pd.DataFrame:
+        """Summary of the stored series: number of points, first & last date and last update time per id."""
+        rows = self.conn.execute("""SELECT s.id, s.name, COUNT(p.date) AS points, MIN(p.date) AS start, MAX(p.date) AS end, s.updated_at
+                                 FROM series s LEFT JOIN points p ON p.id = s.id GROUP BY s.id ORDER BY s.id""").fetchall()
+        info = pd.DataFrame([dict(row) for row in rows], columns=["id", "name", "points", "start", "end", "updated_at"]).set_index("id")
+        for col in ("start", "end"):
+            info[col] = pd.to_datetime(info[col], unit="ns")
+        info["updated_at"] = pd.to_datetime(info["updated_at"], unit="s")
+        return info
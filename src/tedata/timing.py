@@ -0,0 +1,120 @@
+import os
+import json
+import time
+import socket
+import functools
+import threading
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.timing')
+
+# Path of a JSON lines file that timing events are appended to. Kept in an environment variable so that worker processes inherit it.
+TIMING_LOG_ENV = "TEDATA_TIMING_LOG"
+
+_write_lock = threading.Lock()
+
+## Standalone functions  ########################################
+def configure_timing(events_path: str = None):
+    """Turn structured timing events on or off. With events_path set, every timed stage of a scrape (see span) appends one JSON line to
+    that file: {"ts", "host", "pid", "stage", "url", "method", "duration", "ok", "error"}. Use None to turn events off.
+    Stage timings are always collected in the 'timings' attribute of the scraper, events are optional."""
+    if events_path is None:
+        os.environ.pop(TIMING_LOG_ENV, None)
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(events_path)), exist_ok=True)
+        os.environ[TIMING_LOG_ENV] = os.path.abspath(events_path)
+
+def emit_event(event: dict):
+    """Append a timing event to the JSON lines file set with configure_timing. Does nothing if events are off."""
+    path = os.environ.get(TIMING_LOG_ENV)
+    if not path:
+        return
+    line = json.dumps({"ts": round(time.time(), 3), "host": socket.gethostname(), "pid": os.getpid(), **event}, default=str) + "\n"
+    try:
+        with _write_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line)   # One short write per event, lines from several processes don't interleave.
+    except OSError as e:
+        logger.debug(f"Could not write timing event to {path}: {str(e)}")
+
+def record(owner, stage: str, duration: float, ok: bool = True, error: str = None, url: str = None, method: str = None):
+    """Add the duration of a stage to owner.timings (seconds, summed if the stage runs more than once) and emit a timing event."""
+    if owner is not None:
+        timings = getattr(owner, "timings", None)
+        if timings is None:
+            timings = {}
+            owner.timings = timings
+        timings[stage] = round(timings.get(stage, 0) + duration, 4)
+        url = url or getattr(owner, "last_url", None)
+        method = method or getattr(owner, "method", None)
+    emit_event({"stage": stage, "url": url, "method": method, "duration": round(duration, 4), "ok": ok, "error": error})
+
+######## Spans ##############################
+class span:
+    """Context manager that times one stage of a scrape. The duration goes into owner.timings[stage] and, if turned on, a timing event.
+    The stage counts as failed if an exception is raised in the block, or if 'ok' is set to False on the span.
+
+    **Parameters**
+    - stage (str): Name of the stage e.g "load_page".
+    - owner (TE_Scraper): Object whose 'timings' dict the duration is added to. Can be None to only emit the event.
+    - url, method (str): Extra fields for the event. Default is owner.last_url and owner.method.
+
+    **Example:**
+    ```
+    with span("parse_chart", scraper) as s:
+        s.ok = parse(scraper.chart_soup)
+    ```
+    """
+    __slots__ = ("stage", "owner", "url", "method", "ok", "_start")
+
+    def __init__(self, stage: str, owner=None, url: str = None, method: str = None):
+        self.stage, self.owner, self.url, self.method = stage, owner, url, method
+        self.ok = True
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        record(self.owner, self.stage, time.perf_counter() - self._start, ok=exc_type is None and self.ok is not False,
+               error=None if exc_val is None else str(exc_val), url=self.url, method=self.method)
+        return False
+
+def timed(stage: str = None):
+    """Decorator that times a TE_Scraper method as a span named 'stage' (default: the method name) owned by the instance.
+    The stage counts as failed if the method raises or returns False."""
+    def decorator(method):
+        name = stage or method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with span(name, self) as s:
+                result = method(self, *args, **kwargs)
+                s.ok = result is not False
+                return result
+        return wrapper
+    return decorator
+
+def timed_scrape(stage: str):
+    """Decorator for functions like scrape_chart that return the scraper (or None on failure). The total time goes into the 'timings' of
+    the returned scraper; the url and method of the event are taken from the 'url'/'id' and 'method' keyword arguments."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result, error = None, None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except BaseException as e:
+                error = str(e)
+                raise
+            finally:
+                record(result, stage, time.perf_counter() - start, ok=result is not None and error is None, error=error,
+                       url=kwargs.get("url") or kwargs.get("id") or (args[0] if args else None),
+                       method=getattr(result, "method", None) or kwargs.get("method"))
+        return wrapper
+    return decorator
@@ -16,6 +16,7 @@ import timeit
 import plotly.graph_objects as go
 
 from . import logger, scraper
+from .timing import timed
 
 import logging
 # Get the logger from the parent package
@@ -396,6 +397,38 @@ def find_zero_crossing(series):
             zero_x = x1 + (0 - y1)*(x2 - x1)/(y2 - y1)
             return zero_x
 
+def series_from_svg_path(path_d: str) -> pd.Series:
+    """Pixel co-ordinates of the points of an svg path element (its "d" attribute, e.g "M 0 210.5 L 5.2 208 L 10.4 199.75") as a
+    series of y values indexed by x. Path commands are skipped. Used by TE_Scraper.series_from_chart_soup."""
+    ser_num = pd.to_numeric(pd.Series(path_d.split(" ")), errors='coerce').dropna()
+    exvals = ser_num[::2].sort_values().to_list()
+    yvals = ser_num[1::2].to_list()
+    return pd.Series(yvals, index = exvals, name = "Extracted Series")
+
+def splice_series(history: pd.Series, recent: pd.Series, rtol: float = 1e-9) -> tuple[pd.Series, pd.DataFrame]:
+    """Splice a freshly scraped recent window of a series into its stored history. Points of the history from the start of the recent window
+    onwards are replaced by the recent window. Points present in both whose values differ are reported as revisions.
+
+    **Parameters:**
+    - history (pd.Series): The stored series.
+    - recent (pd.Series): Freshly scraped trailing window of the series.
+    - rtol (float): Relative tolerance below which differing values do not count as revisions.
+
+    **Returns:**
+    - tuple: (merged series, revisions DataFrame with columns "old" & "new" indexed by date, empty if nothing was revised).
+    """
+    recent = recent.sort_index()
+    if len(recent) == 0:
+        return history.copy(), pd.DataFrame(columns=["old", "new"], dtype=float)
+    overlap = history.index.intersection(recent.index)
+    old, new = history.loc[overlap].astype(float), recent.loc[overlap].astype(float)
+    changed = (old - new).abs() > rtol * np.maximum(old.abs(), 1)
+    changed |= old.isna() != new.isna()
+    revisions = pd.DataFrame({"old": old[changed], "new": new[changed]})
+    revisions.index.name = "date"
+    merged = pd.concat([history.loc[history.index < recent.index[0]], recent]).rename(history.name if history.name is not None else recent.name)
+    return merged, revisions
+
 def round_to_month_start(dates: pd.DatetimeIndex):
     """Round dates to nearest month start.
     
@@ -510,6 +543,7 @@ class TooltipScraper(scraper.TE_Scraper):
             else:
                 return False
     
+    @timed()
     def first_last_dates_js(self):
         """Get first and last data points using JavaScript execution instead of ActionChains.
         More reliable across different browser implementations and environments."""
@@ -637,6 +671,7 @@ class TooltipScraper(scraper.TE_Scraper):
         
         return start_end
 
+    @timed()
     def latest_points_js(self, num_points: int = 10, increment: int = None, wait_time: int = None, 
                         force_shortest_span: bool = True):
         """Get data points by moving cursor across chart within viewport bounds using JavaScript.
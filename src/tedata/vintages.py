@@ -0,0 +1,195 @@
+import os
+import time
+import json
+import sqlite3
+import numpy as np
+import pandas as pd
+
+fdel = os.path.sep
+wd = os.path.dirname(__file__)
+
+# tedata related imports. This module must stay importable without selenium.
+from .ids import normalize_id
+from .cache import SQLiteStore
+from .export import metadata_to_dict
+
+import logging
+# Get the logger from the parent package
+logger = logging.getLogger('tedata.vintages')
+
+def _to_epoch(when) -> float:
+    """Seconds since the epoch for a vintage time given as a float (epoch seconds) or anything pd.Timestamp takes (naive times are UTC)."""
+    if isinstance(when, (int, float)):
+        return float(when)
+    when = pd.Timestamp(when)
+    if when.tzinfo is None:
+        when = when.tz_localize("UTC")
+    return when.timestamp()
+
+######## Vintage archive ##############################
+class VintageStore(SQLiteStore):
+    """Archive of the vintages of scraped series: what each series looked like every time it was scraped. Only the points that changed
+    against the previous vintage are stored (new dates, revised values and dates that disappeared), along with the scrape time, so
+    archiving a scrape where nothing was revised costs one small row. Any vintage can be rebuilt with as_of.
+
+    **Init Parameters:**
+    - path (str): Path of the SQLite file. Default is '<cache_dir>/vintages.db'.
+
+    **Example:**
+    ```
+    vintages = VintageStore("vintages.db")
+    scraped = ted.scrape_chart(id="united-states/non-farm-payrolls")
+    vintages.record(scraped.metadata["id"], scraped.series, scraped.series_metadata)
+    then = vintages.as_of("united-states/non-farm-payrolls", "2024-06-30")
+    revisions = vintages.revisions("united-states/non-farm-payrolls")
+    ```
+    """
+    default_filename = "vintages.db"
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute("""CREATE TABLE IF NOT EXISTS vintages (
+            id TEXT NOT NULL,
+            vintage INTEGER NOT NULL,
+            scraped_at REAL NOT NULL,
+            changed INTEGER NOT NULL,
+            metadata TEXT,
+            PRIMARY KEY (id, vintage))""")
+        conn.execute("""CREATE TABLE IF NOT EXISTS deltas (
+            id TEXT NOT NULL,
+            date INTEGER NOT NULL,
+            vintage INTEGER NOT NULL,
+            value REAL,
+            removed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (id, date, vintage)) WITHOUT ROWID""")
+
+    def _vintage_at(self, conn: sqlite3.Connection, id: str, when: float = None):
+        """Number of the last vintage of id scraped at or before 'when' (latest vintage if None). None if there is no such vintage."""
+        if when is None:
+            row = conn.execute("SELECT MAX(vintage) FROM vintages WHERE id = ?", (id,)).fetchone()
+        else:
+            row = conn.execute("SELECT MAX(vintage) FROM vintages WHERE id = ? AND scraped_at <= ?", (id, when)).fetchone()
+        return row[0]
+
+    def _rebuild(self, conn: sqlite3.Connection, id: str, vintage: int) -> pd.Series:
+        """Series as of a vintage number: for each date the value from the latest delta at or before that vintage."""
+        rows = conn.execute("""SELECT date, value, removed, MAX(vintage) FROM deltas WHERE id = ? AND vintage <= ?
+                            GROUP BY date ORDER BY date""", (id, vintage)).fetchall()
+        rows = [row for row in rows if not row[2]]
+        dates = np.array([row[0] for row in rows], dtype="int64")
+        values = np.array([row[1] if row[1] is not None else np.nan for row in rows], dtype="float64")
+        return pd.Series(values, index=pd.DatetimeIndex(dates.view("datetime64[ns]"), name="date"))
+
+    def record(self, id: str, series: pd.Series, metadata=None, scraped_at=None) -> int:
+        """Archive a scrape of a series as a new vintage, storing only the points that differ from the previous vintage.
+
+        **Parameters**
+        - id (str): URL or id of the series.
+        - series (pd.Series): The scraped series, e.g the 'series' attribute of a TE_Scraper after series_from_highcharts or
+        full_series_fromTooltips.
+        - metadata (pd.Series or dict): The 'series_metadata' of the scrape, kept with the vintage.
+        - scraped_at (float, str or pd.Timestamp): Time of the scrape. Default is now. Must not be earlier than the previous vintage.
+
+        **Returns**
+        - int: The vintage number, or the number of the previous vintage if nothing changed (no new vintage is made then).
+        """
+        id = normalize_id(id)
+        scraped_at = time.time() if scraped_at is None else _to_epoch(scraped_at)
+        series = series[~series.index.duplicated(keep="last")].sort_index()
+        new = pd.Series(series.to_numpy(dtype="float64"), index=pd.DatetimeIndex(series.index).asi8)
+
+        with self._transaction() as conn:
+            last = self._vintage_at(conn, id)
+            if last is None:
+                old = pd.Series(dtype="float64")
+            else:
+                last_time = conn.execute("SELECT scraped_at FROM vintages WHERE id = ? AND vintage = ?", (id, last)).fetchone()[0]
+                if scraped_at < last_time:
+                    raise ValueError(f"Vintage time {scraped_at} of {id} is earlier than the previous vintage ({last_time}).")
+                rebuilt = self._rebuild(conn, id, last)
+                old = pd.Series(rebuilt.to_numpy(), index=rebuilt.index.asi8)
+
+            both = old.index.intersection(new.index)
+            revised = both[~np.isclose(old[both].to_numpy(), new[both].to_numpy(), rtol=1e-9, atol=0, equal_nan=True)]
+            added = new.index.difference(old.index)
+            removed = old.index.difference(new.index)
+            if last is not None and len(revised) + len(added) + len(removed) == 0:
+                logger.debug(f"VintageStore: no changes to {id} since vintage {last}.")
+                return last
+
+            vintage = 1 if last is None else last + 1
+            changed = revised.append(added)
+            conn.executemany("INSERT INTO deltas (id, date, vintage, value, removed) VALUES (?, ?, ?, ?, 0)",
+                             [(id, int(date), vintage, None if np.isnan(new[date]) else float(new[date])) for date in changed])
+            conn.executemany("INSERT INTO deltas (id, date, vintage, value, removed) VALUES (?, ?, ?, NULL, 1)",
+                             [(id, int(date), vintage) for date in removed])
+            conn.execute("INSERT INTO vintages (id, vintage, scraped_at, changed, metadata) VALUES (?, ?, ?, ?, ?)",
+                         (id, vintage, scraped_at, len(changed) + len(removed),
+                          json.dumps(metadata_to_dict(metadata), default=str) if metadata is not None else None))
+        logger.info(f"VintageStore: vintage {vintage} of {id}: {len(added)} new, {len(revised)} revised, {len(removed)} removed points.")
+        return vintage
+
+    def as_of(self, id: str, when=None) -> pd.Series:
+        """Rebuild the series as it was at time 'when' (latest vintage scraped at or before then). Default is the latest vintage.
+        Returns None if there is no vintage that old."""
+        id = normalize_id(id)
+        conn = self.conn
+        vintage = self._vintage_at(conn, id, None if when is None else _to_epoch(when))
+        if vintage is None:
+            return None
+        series = self._rebuild(conn, id, vintage)
+        series.name = id
+        return series
+
+    def vintages(self, id: str) -> pd.DataFrame:
+        """List the vintages of a series: vintage number, scrape time and number of points changed."""
+        rows = self.conn.execute("SELECT vintage, scraped_at, changed FROM vintages WHERE id = ? ORDER BY vintage",
+                                 (normalize_id(id),)).fetchall()
+        frame = pd.DataFrame([tuple(row) for row in rows], columns=["vintage", "scraped_at", "changed"]).set_index("vintage")
+        frame["scraped_at"] = pd.to_datetime(frame["scraped_at"], unit="s", utc=True)
+        return frame
+
+    def metadata(self, id: str, when=None) -> dict:
+        """Metadata stored with the vintage in force at time 'when' (latest if None)."""
+        id = normalize_id(id)
+        conn = self.conn
+        vintage = self._vintage_at(conn, id, None if when is None else _to_epoch(when))
+        row = conn.execute("SELECT metadata FROM vintages WHERE id = ? AND vintage = ?", (id, vintage)).fetchone()
+        return None if row is None else json.loads(row["metadata"] or "{}")
+
+    def diff(self, id: str, start=None, end=None) -> pd.DataFrame:
+        """Revision diff between two points in time: the dates whose value differs between the series as of 'start' and as of 'end'
+        (default: first and latest vintage).
+
+        **Returns**
+        - pd.DataFrame indexed by date with columns "old", "new" and "change". New dates have NaN in "old", removed dates NaN in "new".
+        """
+        id = normalize_id(id)
+        if start is None:
+            first = self.conn.execute("SELECT MIN(scraped_at) FROM vintages WHERE id = ?", (id,)).fetchone()[0]
+            start = first
+        old, new = self.as_of(id, start), self.as_of(id, end)
+        if old is None or new is None:
+            return pd.DataFrame(columns=["old", "new", "change"])
+        frame = pd.concat([old.rename("old"), new.rename("new")], axis=1)
+        differs = ~np.isclose(frame["old"].to_numpy(), frame["new"].to_numpy(), rtol=1e-9, atol=0, equal_nan=True)
+        frame = frame[differs]
+        frame["change"] = frame["new"] - frame["old"]
+        return frame
+
+    def revisions(self, id: str) -> pd.DataFrame:
+        """Report of every revision of a series: one row per revised point per vintage, with the vintage, its scrape time, the date of
+        the point and its old and new value. Points added for the first time are not revisions and are left out."""
+        rows = self.conn.execute("""SELECT d.date, d.vintage, v.scraped_at, d.value, d.removed FROM deltas d
+                                 JOIN vintages v ON v.id = d.id AND v.vintage = d.vintage WHERE d.id = ? ORDER BY d.date, d.vintage""",
+                                 (normalize_id(id),)).fetchall()
+        report, previous = [], {}
+        for date, vintage, scraped_at, value, removed in rows:
+            value = np.nan if removed or value is None else value
+            if date in previous:
+                report.append((date, vintage, scraped_at, previous[date], value, bool(removed)))
+            previous[date] = value
+        frame = pd.DataFrame(report, columns=["date", "vintage", "scraped_at", "old", "new", "removed"])
+        frame["date"] = pd.to_datetime(frame["date"].astype("int64"), unit="ns")
+        frame["scraped_at"] = pd.to_datetime(frame["scraped_at"], unit="s", utc=True)
+        frame["change"] = frame["new"] - frame["old"]
+        return frame.sort_values(["vintage", "date"]).reset_index(drop=True)
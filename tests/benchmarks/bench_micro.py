@@ -0,0 +1,208 @@
+import os
+import re
+import sys
+import json
+import timeit
+import argparse
+import pandas as pd
+
+wd = os.path.dirname(__file__)
+fdel = os.path.sep
+sys.path.append(wd)
+
+from common import run_info, save_results, git_revision
+from history import HISTORY_PATH, append_history
+from tedata import utils
+from tedata.base import SharedWebDriverState
+from tedata.search import parse_search_results
+
+# Micro-benchmarks of tedata's pure python parsing hot paths, no browser needed. Inputs are built from the saved HTML & tooltip string
+# fixtures in tests/benchmarks/fixtures/, scaled to several sizes. Times are divided by the time of a fixed calibration workload so
+# that they can be compared with the stored baselines (baselines/micro.json) across machines; --check fails if any benchmark got more
+# than 'threshold' times slower than its baseline. Single timings are noisy, so the whole set is run several times (--runs) and the
+# median over the runs is compared. Baselines must be saved from a clean checkout, with at least BASELINE_RUNS runs.
+#
+# Usage: python tests/benchmarks/bench_micro.py [--check] [--save-baseline] [--runs 3] [--benchmarks ready_datestr round_to_freq] [--quick]
+
+FIXTURES_DIR = wd+fdel+"fixtures"
+BASELINE_PATH = wd+fdel+"baselines"+fdel+"micro.json"
+THRESHOLD_ENV = "TEDATA_BENCH_THRESHOLD"
+DEFAULT_THRESHOLD = 2.0   # Fail --check if a benchmark is twice as slow as its baseline. Run to run spread on one machine is up to ~1.5x.
+DEFAULT_RUNS = 3          # Runs of the whole set per invocation, the median normalized time over the runs is kept.
+BASELINE_RUNS = 5         # Minimum runs for --save-baseline.
+
+######## Fixtures ##############################
+def _read(name: str) -> str:
+    with open(FIXTURES_DIR+fdel+name, "r", encoding="utf-8") as f:
+        return f.read()
+
+def _tile(items: list, n: int) -> list:
+    return (items * (n // len(items) + 1))[:n]
+
+def tooltip_values(n: int) -> list:
+    return _tile([line for line in _read("tooltip_values.txt").splitlines() if line], n)
+
+def tooltip_dates(n: int) -> list:
+    return _tile([line for line in _read("tooltip_dates.txt").splitlines() if line], n)
+
+def chart_dates(n: int) -> pd.DatetimeIndex:
+    """Dates as read off chart tooltips: the tooltip date fixtures, parsed and shifted by a few days so that they need rounding."""
+    parsed = [pd.Timestamp(utils.ready_datestr(date)) for date in tooltip_dates(n)]
+    return pd.DatetimeIndex([date + pd.Timedelta(days=(i % 21) - 10) for i, date in enumerate(parsed)])
+
+def svg_path(n: int) -> str:
+    """The "d" attribute of the chart path in the chart page fixture, extended to n points by repeating it along the x axis."""
+    d = re.search(r'class="highcharts-graph" d="([^"]+)"', _read("chart_page.html")).group(1)
+    numbers = [float(token) for token in d.split(" ") if token not in ("M", "L")]
+    points = list(zip(numbers[::2], numbers[1::2]))
+    width = points[-1][0] - points[0][0] + (points[1][0] - points[0][0])
+    tiled = [(x + width * (i // len(points)), y) for i, (x, y) in enumerate(_tile(points, n))]
+    return " ".join(("M" if i == 0 else "L") + f" {x:.2f} {y:.2f}" for i, (x, y) in enumerate(tiled))
+
+def chart_page(n_rows: int) -> str:
+    """The chart page fixture with n_rows rows in its related indicators table, to scale the page size."""
+    page = _read("chart_page.html")
+    rows = re.findall(r"<tr><td>.*?</tr>", page)
+    return page.replace("\n".join(rows), "\n".join(_tile(rows, n_rows)))
+
+def search_page(n_results: int) -> str:
+    """The search results page fixture with n_results result items."""
+    page = _read("search_results.html")
+    items = re.findall(r'<li class="list-group-item">.*?</li>', page)
+    return page.replace("\n".join(items), "\n".join(_tile(items, n_results)))
+
+######## Benchmarks ##############################
+def _bench_extract_and_convert_value(values: list):
+    return [utils.extract_and_convert_value(value) for value in values]
+
+def _bench_ready_datestr(dates: list):
+    return [utils.ready_datestr(date) for date in dates]
+
+def _bench_round_to_freq(dates: pd.DatetimeIndex):
+    return utils.round_to_freq(dates, "MS")
+
+def _bench_series_from_svg_path(d: str):
+    return utils.series_from_svg_path(d)
+
+def _bench_update_soups(page: str):
+    state = SharedWebDriverState()
+    state.page_source = page   # The page_source setter re-parses the page with _update_soups.
+    return state.chart_soup
+
+def _bench_parse_search_results(page: str):
+    return parse_search_results(page)
+
+# name -> (input builder, benchmarked function, input sizes). Sizes are numbers of strings, dates or path points, or rows/results in the pages.
+BENCHMARKS = {"extract_and_convert_value": (tooltip_values, _bench_extract_and_convert_value, (100, 1000, 10000)),
+              "ready_datestr": (tooltip_dates, _bench_ready_datestr, (100, 1000, 10000)),
+              "round_to_freq": (chart_dates, _bench_round_to_freq, (100, 1000, 10000)),
+              "series_from_chart_soup.path": (svg_path, _bench_series_from_svg_path, (100, 1000, 10000)),
+              "SharedWebDriverState._update_soups": (chart_page, _bench_update_soups, (10, 100, 1000)),
+              "search_TE.extract_search_results": (search_page, _bench_parse_search_results, (10, 100, 1000))}
+
+def _calibration_workload():
+    total = 0
+    for i in range(100000):
+        total += (i * i) % 7
+    return " ".join(str(i) for i in range(20000)).split(" ")
+
+def measure(func, arg, repeat: int = 5) -> list:
+    """Time of one call of func(arg) in seconds, timeit style: calls are looped for at least 0.2 s. Returns the time per call of each
+    of the 'repeat' loops; the best one is the usual figure, all of them are kept for the regression tests in history.py."""
+    timer = timeit.Timer(lambda: func(arg))
+    number, _ = timer.autorange()
+    return [total / number for total in timer.repeat(repeat=repeat, number=number)]
+
+def key(name: str, size: int) -> str:
+    return f"{name}@{size}"
+
+def _median(values: list) -> float:
+    return float(pd.Series(values, dtype=float).median())
+
+def run(benchmarks: list = None, quick: bool = False, repeat: int = 5, runs: int = 1) -> dict:
+    """Run the benchmarks 'runs' times, each run with its own calibration. Each benchmark's time in a run is the best of its 'repeat'
+    loops; "seconds" and "normalized" are the medians of these over the runs. quick runs only the two smallest sizes with 3 repeats.
+    Returns the results dict that is saved as JSON."""
+    repeat = 3 if quick else repeat
+    cases = [(name, size) for name in benchmarks or list(BENCHMARKS) for size in (BENCHMARKS[name][2][:2] if quick else BENCHMARKS[name][2])]
+    inputs = {(name, size): BENCHMARKS[name][0](size) for name, size in cases}
+    calibrations, timings = [], {case: {"seconds": [], "normalized": [], "samples": []} for case in cases}
+    for i in range(runs):
+        calibration = min(measure(lambda _: _calibration_workload(), None, repeat))
+        calibrations.append(calibration)
+        for name, size in cases:
+            samples = measure(BENCHMARKS[name][1], inputs[(name, size)], repeat)
+            timing = timings[(name, size)]
+            timing["seconds"].append(min(samples))
+            timing["normalized"].append(min(samples) / calibration)
+            timing["samples"].extend(samples)
+            print(f"run {i + 1}/{runs} {name:>36} {size:>6}: {min(samples) * 1000:10.3f} ms, {min(samples) / size * 1e6:8.2f} us per item")
+    results = []
+    for (name, size), timing in timings.items():
+        seconds = _median(timing["seconds"])
+        results.append({"benchmark": name, "size": size, "seconds": seconds, "per_item": seconds / size,
+                        "normalized": _median(timing["normalized"]), "normalized_runs": timing["normalized"], "samples": timing["samples"]})
+    return {"run": run_info(), "benchmark": "micro", "runs": runs, "calibration": _median(calibrations), "results": results}
+
+def compare(output: dict, baseline: dict, threshold: float) -> list:
+    """Ratio of each (median) normalized time to its baseline. Benchmarks more than 'threshold' times slower are regressions."""
+    base = {key(r["benchmark"], r["size"]): r["normalized"] for r in baseline["results"]}
+    report = []
+    for r in output["results"]:
+        k = key(r["benchmark"], r["size"])
+        if k not in base:
+            continue
+        ratio = r["normalized"] / base[k]
+        status = "regression" if ratio > threshold else ("faster" if ratio < 1 / threshold else "ok")
+        report.append({"benchmark": r["benchmark"], "size": r["size"], "ratio": round(ratio, 3), "status": status})
+    return report
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of tedata's parsing hot paths on saved fixtures.")
+    parser.add_argument("--benchmarks", nargs="+", default=None, choices=list(BENCHMARKS), help="Benchmarks to run. Default: all.")
+    parser.add_argument("--quick", action="store_true", help="Only the two smallest sizes, 3 repeats.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing loops per benchmark in each run, the best is kept.")
+    parser.add_argument("--runs", type=int, default=None, help=f"Runs of the whole set, the median over the runs is kept. Default "
+                        f"{DEFAULT_RUNS}, {BASELINE_RUNS} with --save-baseline.")
+    parser.add_argument("--allow-dirty", action="store_true", help="Allow --save-baseline with uncommitted changes in the tree.")
+    parser.add_argument("--check", action="store_true", help="Compare with the baselines and exit with status 1 on a regression.")
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get(THRESHOLD_ENV, DEFAULT_THRESHOLD)),
+                        help=f"Slowdown factor counted as a regression. Default {DEFAULT_THRESHOLD} or the {THRESHOLD_ENV} env variable.")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baselines file.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baselines.")
+    parser.add_argument("--history", default=HISTORY_PATH, help="Benchmark history file the results are appended to, see history.py.")
+    parser.add_argument("--no-history", action="store_true", help="Don't append the results to the history.")
+    parser.add_argument("--out", default=None, help="Path of the JSON results file. Default is tests/benchmarks/results/micro_<time>.json.")
+    args = parser.parse_args(argv)
+    runs = args.runs or (BASELINE_RUNS if args.save_baseline else DEFAULT_RUNS)
+    if args.save_baseline:
+        if runs < BASELINE_RUNS:
+            parser.error(f"--save-baseline needs at least {BASELINE_RUNS} runs.")
+        if git_revision().endswith("-dirty") and not args.allow_dirty:
+            parser.error("Uncommitted changes in the tree: save baselines from a clean commit, or pass --allow-dirty.")
+    elif args.check and not os.path.isfile(args.baseline):   # Checked before the run: a check without baselines must not pass.
+        parser.error(f"No baselines at {args.baseline}, run with --save-baseline first.")
+
+    output = run(args.benchmarks, quick=args.quick, repeat=args.repeat, runs=runs)
+    failed = False
+    if args.check:
+        if not os.path.isfile(args.baseline):   # Only with --save-baseline, the results become the first baselines.
+            print(f"No baselines at {args.baseline} yet, nothing to compare with.")
+        else:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                report = compare(output, json.load(f), args.threshold)
+            output["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "report": report}
+            print(pd.DataFrame(report).to_string(index=False))
+            failed = any(r["status"] == "regression" for r in report)
+            if failed:
+                print(f"Regression: benchmarks more than {args.threshold}x slower than their baselines.")
+    if args.save_baseline:
+        save_results(output, "micro", args.baseline)
+        print(f"Baselines saved to {args.baseline}")
+    print(f"Results saved to {save_results(output, 'micro', args.out)}")
+    if not args.no_history:
+        print(f"{append_history(output, args.history)} records added to {args.history}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
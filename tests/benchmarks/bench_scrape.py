@@ -0,0 +1,210 @@
+import os
+import sys
+import time
+import argparse
+import threading
+import pandas as pd
+
+wd = os.path.dirname(__file__)
+fdel = os.path.sep
+sys.path.append(wd)
+
+from common import run_info, save_results
+from history import HISTORY_PATH, append_history
+from te_stub_server import StubServer, DATASETS, FIXTURES_DIR, HIGHCHARTS_ENV, expected_series
+
+# End to end scrape benchmarks against the local stub server (te_stub_server.py): every scrape_chart method on every dataset, in
+# headless Firefox. For each run: wall time, the stage breakdown from the scraper's 'timings', peak RSS of this process and its browser
+# and how well the scraped series matches the known data. Results are saved as JSON in tests/benchmarks/results/.
+#
+# Without a real highcharts.js (see te_stub_server.py) the path, tooltips & mixed methods can't run; they are skipped with a warning at
+# the start and end of the output, and --fail-on-skip makes that an error.
+#
+# Usage: python tests/benchmarks/bench_scrape.py [--methods highcharts_api path] [--datasets monthly-1950] [--repeat 3] [--fail-on-skip]
+
+METHODS = ["highcharts_api", "path", "tooltips", "mixed", "auto"]
+
+# Maximum error allowed for a scrape to count as correct, relative to the range of the series. 'path' reads values off the svg so
+# it can only be approximately right.
+TOLERANCES = {"path": 0.02}
+DEFAULT_TOLERANCE = 1e-4
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+class PeakRSS:
+    """Peak resident memory (MB) while the block runs. With psutil installed this process and all its children (geckodriver, Firefox)
+    are sampled every 'interval' seconds. Without it the peak of this process from getrusage is used, which can't be reset between runs
+    and doesn't include the browser; 'source' says which was used."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_mb = None
+        self.source = "psutil" if psutil is not None else ("getrusage" if resource is not None else None)
+        self._stop = threading.Event()
+
+    def _tree_rss(self) -> int:
+        proc = psutil.Process()
+        total = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    def _sample(self):
+        peak = 0
+        while True:
+            try:
+                peak = max(peak, self._tree_rss())
+            except psutil.Error:
+                pass
+            self.peak_mb = round(peak / 1024 ** 2, 1)
+            if self._stop.wait(self.interval):
+                break
+
+    def __enter__(self):
+        if self.source == "psutil":
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.source == "psutil":
+            self._stop.set()
+            self._thread.join()
+        elif self.source == "getrusage":
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak_mb = round(maxrss / 1024 ** 2 if sys.platform == "darwin" else maxrss / 1024, 1)   # bytes on macOS, kB on Linux.
+        return False
+
+def check_series(scraped: pd.Series, expected: pd.Series, tolerance: float) -> dict:
+    """Compare a scraped series with the known data: share of the expected dates found, dates that shouldn't be there and the largest
+    error relative to the range of the series."""
+    scraped = scraped.dropna()
+    scraped = scraped[~scraped.index.duplicated(keep="last")]
+    common = expected.index.intersection(scraped.index)
+    span = float(expected.max() - expected.min()) or 1.0
+    max_error = float((scraped[common] - expected[common]).abs().max() / span) if len(common) else None
+    coverage = len(common) / len(expected)
+    extra = len(scraped.index.difference(expected.index))
+    return {"points": len(scraped), "expected_points": len(expected), "coverage": round(coverage, 4), "extra_points": extra,
+            "max_error": max_error, "correct": bool(coverage >= 0.99 and extra == 0 and max_error is not None and max_error <= tolerance)}
+
+def run_case(ted, server: StubServer, dataset: str, method: str, wait_time: float, headless: bool) -> dict:
+    """Scrape one dataset with one method, in a new browser, and measure it."""
+    result = {"dataset": dataset, "method": method}
+    if not server.supports(method):
+        result.update(status="skipped", reason="needs a real highcharts.js, see te_stub_server.py")
+        return result
+
+    scraped, error = None, None
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        try:
+            scraped = ted.scrape_chart(url=server.url(dataset), method=method, headless=headless, wait_time=wait_time,
+                                       method_memory=False)   # 'auto' always starts from the same method.
+        except Exception as e:
+            error = str(e)
+        wall_time = time.perf_counter() - start
+    result.update(wall_time=round(wall_time, 3), peak_rss_mb=rss.peak_mb, rss_source=rss.source)
+
+    if scraped is None or getattr(scraped, "series", None) is None:
+        result.update(status="failed", error=error or "scrape_chart returned no series")
+    else:
+        result.update(status="ok", method_used=getattr(scraped, "method", method), timings=dict(getattr(scraped, "timings", {})))
+        result.update(check_series(scraped.series, expected_series(dataset), TOLERANCES.get(getattr(scraped, "method", method), DEFAULT_TOLERANCE)))
+    if scraped is not None:
+        try:
+            scraped.close()
+        except Exception as e:
+            print(f"Error closing scraper: {str(e)}")
+    return result
+
+def firefox_problem() -> str:
+    """Start and quit headless Firefox once. Returns None if that works, else the error (first line)."""
+    from selenium import webdriver
+    options = webdriver.FirefoxOptions()
+    options.add_argument("-headless")
+    try:
+        webdriver.Firefox(options=options).quit()
+        return None
+    except Exception as e:
+        return str(e).strip().splitlines()[0] if str(e).strip() else repr(e)
+
+def skip_warning(server: StubServer, methods: list) -> str:
+    """Warning listing the methods that will be skipped because the server has no real highcharts.js, None if every method can run."""
+    skipped = [method for method in methods if not server.supports(method)]
+    if not skipped:
+        return None
+    return (f"WARNING: no real highcharts.js found, the stub server serves a shim that only supports "
+            f"{', '.join(method for method in methods if server.supports(method)) or 'none of the methods asked for'}.\n"
+            f"WARNING: methods {', '.join(skipped)} are SKIPPED on every dataset. Put highcharts.js in {FIXTURES_DIR} or set "
+            f"{HIGHCHARTS_ENV} to its path to run them.")
+
+def summarize(results: list) -> pd.DataFrame:
+    frame = pd.DataFrame(results)
+    cols = [col for col in ["dataset", "method", "status", "wall_time", "peak_rss_mb", "points", "coverage", "max_error", "correct"]
+            if col in frame.columns]
+    return frame[cols]
+
+def main(argv: list = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark scrape_chart end to end against a local stand-in for Trading Economics.")
+    parser.add_argument("--methods", nargs="+", default=METHODS, choices=METHODS, help="scrape_chart methods to run.")
+    parser.add_argument("--datasets", nargs="+", default=list(DATASETS), choices=list(DATASETS), help="Stub datasets to scrape.")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of runs of each method on each dataset.")
+    parser.add_argument("--wait-time", type=float, default=1, help="wait_time passed to scrape_chart (seconds).")
+    parser.add_argument("--show-browser", action="store_true", help="Run Firefox with a window instead of headless.")
+    parser.add_argument("--fail-on-skip", action="store_true", help="Exit with status 1 if any method/dataset case was skipped.")
+    parser.add_argument("--history", default=HISTORY_PATH, help="Benchmark history file the results are appended to, see history.py.")
+    parser.add_argument("--no-history", action="store_true", help="Don't append the results to the history.")
+    parser.add_argument("--out", default=None, help="Path of the JSON results file. Default is tests/benchmarks/results/scrape_<time>.json.")
+    args = parser.parse_args(argv)
+
+    import tedata as ted
+
+    output = {"run": run_info(), "benchmark": "scrape", "results": []}
+    with StubServer() as server:
+        output["run"]["highcharts"] = server.highcharts
+        output["run"]["skipped_methods"] = [method for method in args.methods if not server.supports(method)]
+        warning = skip_warning(server, args.methods)
+        if warning is not None:
+            print(warning, file=sys.stderr)
+        no_firefox = firefox_problem()   # tedata.utils.check_browser_installed can't tell if Firefox is missing.
+        for dataset in args.datasets:
+            for method in args.methods:
+                for i in range(args.repeat):
+                    if no_firefox is not None:
+                        result = {"dataset": dataset, "method": method, "status": "skipped", "reason": f"Firefox not available: {no_firefox}"}
+                    else:
+                        result = run_case(ted, server, dataset, method, args.wait_time, headless=not args.show_browser)
+                    result["repeat"] = i
+                    output["results"].append(result)
+                    print(f"{dataset:>14} {method:>15} run {i}: {result['status']}"
+                          + (f", {result['wall_time']:.2f} s" if "wall_time" in result else ""))
+
+    path = save_results(output, "scrape", args.out)
+    print(summarize(output["results"]).to_string(index=False))
+    print(f"Results saved to {path}")
+    if not args.no_history:
+        print(f"{append_history(output, args.history)} records added to {args.history}")
+    skipped = [r for r in output["results"] if r["status"] == "skipped"]
+    if skipped:   # Repeated at the end so that it isn't lost above the per-case lines.
+        if warning is not None:
+            print(warning, file=sys.stderr)
+        reasons = pd.Series([r["reason"] for r in skipped]).value_counts()
+        print(f"WARNING: {len(skipped)} of {len(output['results'])} cases skipped:", *[f"  {n} x {reason}" for reason, n in reasons.items()],
+              sep="\n", file=sys.stderr)
+        if args.fail_on_skip:
+            parser.exit(1, "Cases were skipped and --fail-on-skip is set.\n")
+    return output
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import json
+import socket
+import platform
+import subprocess
+from datetime import datetime
+
+wd = os.path.dirname(__file__); tests_dir = os.path.dirname(wd); parent = os.path.dirname(tests_dir)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+
+RESULTS_DIR = wd+fdel+"results"   # Benchmark results are written here (not committed).
+
+def tedata_version() -> str:
+    """Version of the tedata source tree being benchmarked, from pyproject.toml (falls back to the installed package)."""
+    try:
+        with open(parent+fdel+"pyproject.toml", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip().startswith("version"):
+                    return line.split("=", 1)[1].strip().strip('"').strip("'")
+    except OSError:
+        pass
+    try:
+        from importlib.metadata import version
+        return version("tedata")
+    except Exception:
+        return "unknown"
+
+def git_revision() -> str:
+    """Short git revision of the source tree, with "-dirty" appended if there are uncommitted changes. "unknown" outside a git checkout."""
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=parent, capture_output=True, text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=parent, capture_output=True, text=True,
+                               timeout=30).stdout.strip()
+        return (rev + "-dirty" if dirty else rev) or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+def run_info() -> dict:
+    """Tags identifying a benchmark run: tedata version, git revision, host, python & platform and the time of the run."""
+    return {"tedata_version": tedata_version(),
+            "git_revision": git_revision(),
+            "host": socket.gethostname(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": datetime.now().isoformat(timespec="seconds")}
+
+def save_results(results: dict, name: str, out: str = None) -> str:
+    """Save benchmark results as JSON to 'out', or to RESULTS_DIR/<name>_<timestamp>.json if out is None. Returns the path."""
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = RESULTS_DIR+fdel+f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
+    return out
@@ -0,0 +1,164 @@
+import os
+import sys
+import json
+import math
+import argparse
+import pandas as pd
+
+wd = os.path.dirname(__file__)
+fdel = os.path.sep
+sys.path.append(wd)
+
+from common import RESULTS_DIR
+
+# Benchmark history: the results of every benchmark run (bench_micro.py, bench_scrape.py) appended to one JSON lines file, tagged with
+# the tedata version, git revision and host, so that trends can be followed across versions and machines. One line per run, benchmark
+# case ("method", e.g round_to_freq or highcharts_api), fixture (input size or stub dataset) and stage, holding the timing samples.
+# report.py plots the history and flags regressions between the last two runs with compare_last_runs.
+#
+# Usage: python tests/benchmarks/history.py add tests/benchmarks/results/micro_*.json   (import results saved earlier)
+
+HISTORY_PATH = RESULTS_DIR+fdel+"history.jsonl"
+TAGS = ("tedata_version", "git_revision", "host", "python", "platform", "timestamp")
+
+def records_from_results(output: dict) -> list:
+    """History records of the results of one benchmark run (the dict saved as JSON by bench_micro.py or bench_scrape.py).
+    Each record: run tags + {"run_id", "benchmark", "method", "fixture", "stage", "items", "samples"}, times in seconds."""
+    run = output["run"]
+    base = {tag: run.get(tag) for tag in TAGS}
+    base["run_id"] = f"{run.get('timestamp')}|{run.get('host')}|{run.get('git_revision')}"
+    base["benchmark"] = output["benchmark"]
+    records = []
+    if output["benchmark"] == "micro":
+        for r in output["results"]:
+            records.append({**base, "method": r["benchmark"], "fixture": str(r["size"]), "stage": "total", "items": r["size"],
+                            "samples": r.get("samples", [r["seconds"]])})
+    elif output["benchmark"] == "scrape":
+        cases = {}
+        for r in output["results"]:
+            if r.get("status") == "ok":   # Repeats of the same method on the same dataset are the samples.
+                cases.setdefault((r["method"], r["dataset"]), []).append(r)
+        for (method, dataset), runs in cases.items():
+            stages = {"wall": [r["wall_time"] for r in runs]}
+            for r in runs:
+                for stage, seconds in r.get("timings", {}).items():
+                    stages.setdefault(stage, []).append(seconds)
+            for stage, samples in stages.items():
+                records.append({**base, "method": method, "fixture": dataset, "stage": stage, "items": runs[0].get("expected_points"),
+                                "samples": samples})
+    return records
+
+def append_history(output: dict, path: str = None) -> int:
+    """Append the results of a benchmark run to the history file. Returns the number of records written."""
+    path = path or HISTORY_PATH
+    records = records_from_results(output)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + "\n")
+    return len(records)
+
+def load_history(path: str = None) -> pd.DataFrame:
+    """The history as a DataFrame, one row per record, with the median latency and the throughput (items per second) added."""
+    path = path or HISTORY_PATH
+    records = []
+    if os.path.isfile(path):
+        with open(path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    frame = pd.DataFrame(records, columns=list(TAGS) + ["run_id", "benchmark", "method", "fixture", "stage", "items", "samples"])
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"])
+    frame["latency"] = frame["samples"].map(lambda samples: float(pd.Series(samples, dtype=float).median()))
+    frame["throughput"] = pd.to_numeric(frame["items"], errors="coerce") / frame["latency"]
+    return frame
+
+######## Welch's t-test ##############################
+def _betacf(a: float, b: float, x: float, max_iter: int = 300, eps: float = 3e-14) -> float:
+    """Continued fraction of the incomplete beta function (modified Lentz's method)."""
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1, a - 1
+    c, d = 1.0, 1 - qab * x / qap
+    d = 1 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        for aa in (m * (b - m) * x / ((qam + m2) * (a + m2)), -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1 + aa * d
+            d = 1 / (d if abs(d) > tiny else tiny)
+            c = 1 + aa / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1) < eps:
+            break
+    return h
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """Regularized incomplete beta function I_x(a, b)."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1 - front * _betacf(b, a, 1 - x) / b
+
+def welch_t_test(a: list, b: list) -> tuple:
+    """Welch's unequal variances t-test of the means of samples a and b (scipy is not a tedata dependency, so it is done here).
+
+    **Returns**
+    - (t, df, p): t statistic (positive if b has the larger mean), degrees of freedom and two-sided p-value. p is NaN if either
+    sample has fewer than 2 values.
+    """
+    a, b = pd.Series(a, dtype=float), pd.Series(b, dtype=float)
+    if len(a) < 2 or len(b) < 2:
+        return float("nan"), float("nan"), float("nan")
+    va, vb = a.var() / len(a), b.var() / len(b)
+    if va + vb == 0:
+        return (0.0, float("inf"), 1.0) if a.mean() == b.mean() else (math.copysign(float("inf"), b.mean() - a.mean()), float("inf"), 0.0)
+    t = (b.mean() - a.mean()) / math.sqrt(va + vb)
+    df = (va + vb) ** 2 / (va ** 2 / (len(a) - 1) + vb ** 2 / (len(b) - 1))
+    return t, df, _betainc(df / 2, 0.5, df / (df + t * t))
+
+def compare_last_runs(history: pd.DataFrame, alpha: float = 0.05, min_change: float = 0.05) -> pd.DataFrame:
+    """Compare the last two runs of each benchmark on each host. A case is a regression if its mean latency went up by more than
+    min_change (relative) and Welch's t-test on the timing samples gives p < alpha; "improvement" likewise for a drop.
+
+    **Returns**
+    - pd.DataFrame with one row per host, benchmark, method, fixture & stage: the two runs compared, their revisions, mean latencies,
+    relative change, p-value and "status" ("regression", "improvement", "no change" or "not enough samples").
+    """
+    rows = []
+    for (host, benchmark), runs in history.groupby(["host", "benchmark"]):
+        order = runs.groupby("run_id")["timestamp"].max().sort_values()
+        if len(order) < 2:
+            continue
+        previous, last = runs[runs["run_id"] == order.index[-2]], runs[runs["run_id"] == order.index[-1]]
+        merged = previous.merge(last, on=["method", "fixture", "stage"], suffixes=("_previous", "_last"))
+        for _, row in merged.iterrows():
+            old, new = pd.Series(row["samples_previous"], dtype=float), pd.Series(row["samples_last"], dtype=float)
+            change = new.mean() / old.mean() - 1 if old.mean() else float("nan")
+            t, df, p = welch_t_test(old, new)
+            if math.isnan(p):
+                status = "not enough samples"
+            elif p < alpha and change > min_change:
+                status = "regression"
+            elif p < alpha and change < -min_change:
+                status = "improvement"
+            else:
+                status = "no change"
+            rows.append({"host": host, "benchmark": benchmark, "method": row["method"], "fixture": row["fixture"], "stage": row["stage"],
+                         "previous_revision": row["git_revision_previous"], "last_revision": row["git_revision_last"],
+                         "previous_mean": old.mean(), "last_mean": new.mean(), "change": change, "p_value": p, "status": status})
+    return pd.DataFrame(rows, columns=["host", "benchmark", "method", "fixture", "stage", "previous_revision", "last_revision",
+                                       "previous_mean", "last_mean", "change", "p_value", "status"])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark history file.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Append saved benchmark results (JSON files) to the history.")
+    add.add_argument("files", nargs="+", help="Results files written by bench_micro.py or bench_scrape.py.")
+    add.add_argument("--history", default=HISTORY_PATH, help="History file.")
+    args = parser.parse_args()
+    for file in args.files:
+        with open(file, "r", encoding="utf-8") as f:
+            print(f"{file}: {append_history(json.load(f), args.history)} records added to {args.history}")
@@ -0,0 +1,146 @@
+import os
+import sys
+import argparse
+import pandas as pd
+import plotly.graph_objects as go
+from datetime import datetime
+
+wd = os.path.dirname(__file__)
+fdel = os.path.sep
+sys.path.append(wd)
+
+from common import RESULTS_DIR
+from history import HISTORY_PATH, load_history, compare_last_runs
+
+# HTML dashboard of the benchmark history (history.py): latency and throughput of each benchmark case over time, per host, and the
+# significant changes between the last two runs. Built the same way as the report of tests/auto_tests.py (generate_html_report):
+# one plotly html file per figure, embedded in the report page with iframes.
+#
+# Usage: python tests/benchmarks/report.py [--history PATH] [--out DIR] [--alpha 0.05] [--fail-on-regression]
+
+def history_figure(history: pd.DataFrame, y: str, title: str, yaxis_title: str) -> go.Figure:
+    """One line per benchmark case (method, fixture & stage, and host if there are several) of 'y' over the runs."""
+    fig = go.Figure()
+    several_hosts = history["host"].nunique() > 1
+    for (host, method, fixture, stage), case in history.groupby(["host", "method", "fixture", "stage"]):
+        case = case.sort_values("timestamp")
+        name = f"{method} [{fixture}]" + ("" if stage in ("total", "wall") else f" {stage}") + (f" @{host}" if several_hosts else "")
+        fig.add_trace(go.Scatter(x=case["timestamp"], y=case[y], mode="lines+markers", name=name,
+                                 customdata=case[["git_revision", "tedata_version"]].values,
+                                 hovertemplate="%{y:.4g}<br>rev %{customdata[0]}, v%{customdata[1]}"))
+    fig.update_layout(title=title, xaxis_title="Run", yaxis_title=yaxis_title, yaxis_type="log", template="plotly_white", height=600)
+    return fig
+
+def figures(history: pd.DataFrame) -> dict:
+    """file name -> figure, for the latency & throughput of the micro benchmarks and the scrape benchmarks (and the scrape stages)."""
+    figs = {}
+    micro = history[history["benchmark"] == "micro"]
+    if not micro.empty:
+        figs["micro_latency.html"] = history_figure(micro, "latency", "Micro-benchmarks: time per call", "seconds")
+        figs["micro_throughput.html"] = history_figure(micro, "throughput", "Micro-benchmarks: throughput", "items per second")
+    scrape = history[history["benchmark"] == "scrape"]
+    if not scrape.empty:
+        wall = scrape[scrape["stage"] == "wall"]
+        figs["scrape_latency.html"] = history_figure(wall, "latency", "scrape_chart: wall time", "seconds")
+        figs["scrape_throughput.html"] = history_figure(wall, "throughput", "scrape_chart: throughput", "points per second")
+        stages = scrape[scrape["stage"] != "wall"]
+        if not stages.empty:
+            figs["scrape_stages.html"] = history_figure(stages, "latency", "scrape_chart: time per stage", "seconds")
+    return figs
+
+def generate_html_report(history: pd.DataFrame, comparison: pd.DataFrame, output_dir: str) -> str:
+    """
+    Write the benchmark history report: summary of the runs, the changes between the last two runs and the interactive plots.
+
+    Args:
+        history: DataFrame from history.load_history
+        comparison: DataFrame from history.compare_last_runs
+        output_dir: Directory to write the report and plot files to
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    html = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>tedata Benchmark History</title>
+        <style>
+            body { font-family: Arial, sans-serif; margin: 20px; }
+            h1, h2, h3 { color: #2c3e50; }
+            table { border-collapse: collapse; width: 100%; margin-bottom: 30px; }
+            th, td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+            th { background-color: #f2f2f2; }
+            tr:nth-child(even) { background-color: #f9f9f9; }
+            .figure-container { margin-bottom: 40px; border: 1px solid #ddd; padding: 15px; }
+            .plotly-iframe { width: 100%; height: 650px; border: none; }
+            .success { color: green; }
+            .failure { color: red; }
+            .timestamp { font-style: italic; color: #666; margin-bottom: 20px; }
+        </style>
+    </head>
+    <body>
+        <h1>tedata Benchmark History</h1>
+        <div class="timestamp">Report generated on: """ + current_time + """</div>
+    """
+
+    runs = (history.groupby(["run_id", "benchmark"])
+            .agg(timestamp=("timestamp", "max"), host=("host", "first"), version=("tedata_version", "first"),
+                 revision=("git_revision", "first"), cases=("method", "size"))
+            .reset_index().drop(columns="run_id").sort_values("timestamp", ascending=False))
+    html += "<h2>Runs</h2>"
+    html += runs.to_html(index=False)
+
+    html += "<h2>Last run compared with the previous run</h2>"
+    regressions = comparison[comparison["status"] == "regression"]
+    if comparison.empty:
+        html += "<p>Not enough runs to compare yet, each benchmark needs two runs on the same host.</p>"
+    else:
+        if regressions.empty:
+            html += "<p class='success'>&#10004; No significant regressions.</p>"
+        else:
+            html += f"<p class='failure'>&#10008; {len(regressions)} significant regressions.</p>"
+            html += regressions.to_html(index=False, float_format=lambda x: f"{x:.4g}")
+        html += "<h3>All cases</h3>"
+        html += comparison.to_html(index=False, float_format=lambda x: f"{x:.4g}")
+
+    html += "<h2>Trends</h2>"
+    for file_name, fig in figures(history).items():
+        fig.write_html(os.path.join(output_dir, file_name))
+        html += f"<div class='figure-container'><iframe src='{file_name}' class='plotly-iframe'></iframe></div>"
+
+    html += """
+    </body>
+    </html>
+    """
+
+    report_path = os.path.join(output_dir, "benchmark_report.html")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    print(f"Benchmark report saved to {report_path}")
+    return report_path
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="HTML report of the benchmark history, flags regressions between the last two runs.")
+    parser.add_argument("--history", default=HISTORY_PATH, help="History file.")
+    parser.add_argument("--out", default=RESULTS_DIR+fdel+"report", help="Directory to write the report to.")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level of the t-tests.")
+    parser.add_argument("--min-change", type=float, default=0.05, help="Smallest relative change in mean latency that counts.")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if there is a significant regression.")
+    args = parser.parse_args(argv)
+
+    history = load_history(args.history)
+    if history.empty:
+        print(f"No benchmark history at {args.history}, run bench_micro.py or bench_scrape.py first.")
+        return 0
+    comparison = compare_last_runs(history, alpha=args.alpha, min_change=args.min_change)
+    generate_html_report(history, comparison, args.out)
+    regressions = comparison[comparison["status"] == "regression"]
+    if not regressions.empty:
+        print(regressions.to_string(index=False))
+    return 1 if args.fail_on_regression and not regressions.empty else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import os
+import sys
+import json
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+wd = os.path.dirname(__file__)
+fdel = os.path.sep
+
+# Local stand-in for tradingeconomics.com chart pages, for benchmarking the scraper offline. Pages are generated from a template with the
+# parts of a Trading Economics chart page that TE_Scraper uses (#chart, the date span buttons, the calendar inputs, the chart type buttons,
+# units, title & description) and a Highcharts line chart of a deterministic series, so scraped results can be checked against known data.
+#
+# Highcharts itself is not shipped with tedata. Put highcharts.js in tests/benchmarks/fixtures/ or point the TEDATA_BENCH_HIGHCHARTS env
+# variable at a copy to get a real, rendered chart. Without it a small shim is served that exposes the data through the Highcharts API
+# (Highcharts.charts) and draws a bare svg path, which is enough for the 'highcharts_api' method but not for the methods that read the
+# rendered chart (path, tooltips & mixed).
+
+HIGHCHARTS_ENV = "TEDATA_BENCH_HIGHCHARTS"
+FIXTURES_DIR = wd+fdel+"fixtures"
+COUNTRY = "stubland"   # Pages are served at /stubland/<dataset>.
+
+# Methods that need a rendered Highcharts chart (svg axes, tooltips), these can't run against the shim.
+RENDERED_METHODS = ("path", "tooltips", "mixed")
+
+######## Datasets ##############################
+def _random_walk(index: pd.DatetimeIndex, seed: int, start: float = 100.0, scale: float = 1.0, name: str = None) -> pd.Series:
+    """Deterministic random walk, rounded to 2 decimals like the values shown in Trading Economics tooltips."""
+    steps = np.random.RandomState(seed).normal(0, scale, len(index))
+    return pd.Series(np.round(start + np.cumsum(steps), 2), index=index, name=name)
+
+def _today() -> pd.Timestamp:
+    return pd.Timestamp.today().normalize()
+
+def monthly_1950() -> list:
+    index = pd.date_range("1950-01-01", _today(), freq="MS")
+    return [_random_walk(index, seed=1950, start=50, scale=0.8, name="Stub Monthly Index")]
+
+def daily_10y() -> list:
+    index = pd.bdate_range(_today() - pd.DateOffset(years=10), _today())
+    return [_random_walk(index, seed=10, start=1000, scale=5, name="Stub Daily Price")]
+
+def multi_series() -> list:
+    index = pd.date_range("1990-01-01", _today(), freq="MS")
+    return [_random_walk(index, seed=seed, start=20 * (i + 1), scale=0.5, name=f"Stub Series {i + 1}") for i, seed in enumerate((7, 8, 9))]
+
+# dataset name -> (series generator, tooltip date format, units). The first series of each dataset is the one TE_Scraper scrapes.
+DATASETS = {"monthly-1950": (monthly_1950, "%B %Y", "points"),
+            "daily-10y": (daily_10y, "%Y-%m-%d", "USD"),
+            "multi-series": (multi_series, "%B %Y", "percent")}
+
+def dataset_series(name: str) -> list:
+    """The series of a dataset (list of pd.Series)."""
+    return DATASETS[name][0]()
+
+def expected_series(name: str) -> pd.Series:
+    """The series that scraping the page of a dataset should give."""
+    return dataset_series(name)[0]
+
+def highcharts_js_path() -> str:
+    """Path of a real highcharts.js if one is available, else None."""
+    for path in (os.environ.get(HIGHCHARTS_ENV), FIXTURES_DIR+fdel+"highcharts.js"):
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+######## Pages ##############################
+HIGHCHARTS_SHIM = """
+// Minimal stand-in for Highcharts: keeps the chart data where the Highcharts API has it and draws one svg path per series.
+(function () {
+    function Chart(container, options) {
+        var chart = this;
+        this.options = options;
+        this.xAxis = [{ options: options.xAxis || {}, setExtremes: function (min, max) { this.min = min; this.max = max; } }];
+        this.tooltip = null;
+        this.series = options.series.map(function (s, i) {
+            return { name: s.name, type: "line", visible: true,
+                     points: s.data.map(function (p) { return { x: p[0], y: p[1], series: chart }; }) };
+        });
+        var width = 800, height = 400, ns = "http://www.w3.org/2000/svg";
+        var div = document.createElement("div");
+        div.className = "highcharts-container";
+        var svg = document.createElementNS(ns, "svg");
+        svg.setAttribute("class", "highcharts-root");
+        svg.setAttribute("width", width);
+        svg.setAttribute("height", height);
+        var background = document.createElementNS(ns, "rect");
+        background.setAttribute("class", "highcharts-plot-background");
+        background.setAttribute("width", width);
+        background.setAttribute("height", height);
+        svg.appendChild(background);
+        var group = document.createElementNS(ns, "g");
+        group.setAttribute("class", "highcharts-series-group");
+        this.series.forEach(function (s, i) {
+            var xs = s.points.map(function (p) { return p.x; }), ys = s.points.map(function (p) { return p.y; });
+            var x0 = Math.min.apply(null, xs), x1 = Math.max.apply(null, xs), y0 = Math.min.apply(null, ys), y1 = Math.max.apply(null, ys);
+            var d = s.points.map(function (p, j) {
+                var x = (p.x - x0) / ((x1 - x0) || 1) * width, y = height - (p.y - y0) / ((y1 - y0) || 1) * height;
+                return (j === 0 ? "M " : "L ") + x.toFixed(2) + " " + y.toFixed(2);
+            }).join(" ");
+            var g = document.createElementNS(ns, "g");
+            g.setAttribute("class", "highcharts-series highcharts-series-" + i + " highcharts-line-series");
+            var path = document.createElementNS(ns, "path");
+            path.setAttribute("class", "highcharts-graph");
+            path.setAttribute("d", d);
+            g.appendChild(path);
+            group.appendChild(g);
+        });
+        svg.appendChild(group);
+        div.appendChild(svg);
+        document.getElementById(container).appendChild(div);
+    }
+    window.Highcharts = { charts: [], shim: true,
+        chart: function (container, options) { var c = new Chart(container, options); window.Highcharts.charts.push(c); return c; },
+        dateFormat: function (format, x) { return new Date(x).toISOString().slice(0, 10); } };
+})();
+"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head id="ctl00_Head1"><meta charset="utf-8"><title>{title}</title>
+<script src="/static/highcharts.js"></script>
+</head>
+<body>
+<div id="chart">
+<div id="dateSpansDiv"><a class="dateSpanBtn" data-years="1">1Y</a><a class="dateSpanBtn" data-years="5">5Y</a><a class="dateSpanBtn" data-years="10">10Y</a><a class="dateSpanBtn" data-years="25">25Y</a><a class="dateSpanBtn selected" data-years="0">MAX</a></div>
+<div class="chartTypesWrapper"><div title="Line" class="chartTypeLine"><button class="chartTypeBtn"></button></div><div title="Column" class="chartTypeColumn"><button class="chartTypeBtn"></button></div></div>
+<button id="dateInputsToggle" type="button">Calendar</button>
+<div id="dateInputs" style="display: none;"><input id="d1" type="text"><input id="d2" type="text"></div>
+<div id="singleIndChartUnit2">{units}</div>
+<div id="singleIndChartUnit">Stubland Bureau of Statistics</div>
+<div id="highchartsDiv" style="width: 800px; height: 400px;"></div>
+</div>
+<div id="item_definition"><div class="card-header">{title}</div><div class="card-body">Deterministic benchmark series "{name}" served by the tedata stub server.</div></div>
+<script>
+var TE_DATA = {data};
+var chart = Highcharts.chart("highchartsDiv", {{
+    chart: {{ type: "line", animation: false }},
+    title: {{ text: null }},
+    credits: {{ enabled: false }},
+    legend: {{ enabled: TE_DATA.series.length > 1 }},
+    xAxis: {{ type: "datetime" }},
+    yAxis: {{ title: {{ text: null }} }},
+    plotOptions: {{ series: {{ animation: false, marker: {{ enabled: false }}, turboThreshold: 0 }} }},
+    tooltip: {{ useHTML: true, formatter: function () {{
+        return '<span class="tooltip-date">' + Highcharts.dateFormat(TE_DATA.dateFormat, this.x) + '</span> ' +
+               '<span class="tooltip-value">' + this.y.toFixed(2) + '</span>'; }} }},
+    series: TE_DATA.series
+}});
+function setSpan(start, end) {{ chart.xAxis[0].setExtremes(start, end); }}
+document.querySelectorAll("#dateSpansDiv a").forEach(function (button) {{
+    button.addEventListener("click", function () {{
+        document.querySelectorAll("#dateSpansDiv a").forEach(function (b) {{ b.classList.remove("selected"); }});
+        button.classList.add("selected");
+        var years = parseInt(button.dataset.years), last = TE_DATA.series[0].data[TE_DATA.series[0].data.length - 1][0];
+        setSpan(years ? last - years * 365.25 * 864e5 : null, null);
+    }});
+}});
+document.getElementById("dateInputsToggle").addEventListener("click", function () {{
+    document.getElementById("dateInputs").style.display = "block";
+}});
+document.getElementById("d2").addEventListener("keydown", function (event) {{
+    if (event.key === "Enter") {{
+        setSpan(Date.parse(document.getElementById("d1").value), Date.parse(document.getElementById("d2").value));
+    }}
+}});
+</script>
+</body>
+</html>
+"""
+
+def _to_points(series: pd.Series) -> list:
+    millis = pd.DatetimeIndex(series.index).asi8 // 10 ** 6
+    return [[int(x), float(y)] for x, y in zip(millis, series.to_numpy())]
+
+def render_page(name: str) -> str:
+    """HTML of the chart page of a dataset."""
+    generator, date_format, units = DATASETS[name]
+    series = generator()
+    data = {"dateFormat": date_format, "series": [{"name": s.name, "data": _to_points(s)} for s in series]}
+    return PAGE_TEMPLATE.format(title=series[0].name, name=name, units=units, data=json.dumps(data))
+
+######## Server ##############################
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "TEStub/1.0"
+
+    def do_GET(self):
+        path = self.path.split("?")[0].strip("/")
+        if path == "static/highcharts.js":
+            self._send(self.server.highcharts_js, "application/javascript")
+            return
+        parts = path.split("/")
+        if len(parts) == 2 and parts[0] == COUNTRY and parts[1] in DATASETS:
+            page = self.server.pages.get(parts[1])
+            if page is None:   # Rendered once per server, the data only changes from one day to the next.
+                page = self.server.pages.setdefault(parts[1], render_page(parts[1]).encode("utf-8"))
+            self._send(page, "text/html; charset=utf-8")
+        else:
+            self.send_error(404, "No such page on the stub server.")
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass   # Keep benchmark output clean.
+
+class StubServer:
+    """HTTP server on localhost serving the stub chart pages, in a background thread.
+
+    **Init Parameters:**
+    - port (int): Port to listen on. Default 0 picks a free port.
+
+    **Example:**
+    ```
+    with StubServer() as server:
+        scraped = ted.scrape_chart(url=server.url("monthly-1950"), method="highcharts_api")
+    ```
+    """
+
+    def __init__(self, port: int = 0):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.pages = {}
+        js_path = highcharts_js_path()
+        if js_path is not None:
+            with open(js_path, "rb") as f:
+                self.httpd.highcharts_js = f.read()
+        else:
+            self.httpd.highcharts_js = HIGHCHARTS_SHIM.encode("utf-8")
+        self.highcharts = "real" if js_path is not None else "shim"
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def url(self, dataset: str) -> str:
+        return f"http://127.0.0.1:{self.port}/{COUNTRY}/{dataset}"
+
+    def supports(self, method: str) -> bool:
+        """Whether a scrape_chart method can run against the pages served, see RENDERED_METHODS."""
+        return self.highcharts == "real" or method not in RENDERED_METHODS
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="te-stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the stub Trading Economics chart pages used by the scrape benchmarks.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on.")
+    args = parser.parse_args()
+    server = StubServer(args.port)
+    print(f"Serving {server.highcharts} Highcharts pages, e.g:", *[server.url(name) for name in DATASETS], sep="\n  ")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+        sys.exit(0)
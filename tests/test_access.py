@@ -0,0 +1,116 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+import importlib
+import subprocess
+import concurrent.futures
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata import access
+from tedata.store import SeriesStore
+
+class TestGet(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = SeriesStore(os.path.join(self.tmpdir.name, "store.db"))
+        self.series = pd.Series(np.arange(24.0), index=pd.date_range("2020-01-31", periods=24, freq="ME"), name="GDP")
+        self.store.put("united-states/gdp", self.series, {"frequency": "ME", "units": "USD"})
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_import_does_not_load_selenium(self):
+        code = "import sys, tedata; tedata.get; print('selenium' in sys.modules, 'plotly' in sys.modules)"
+        env = dict(os.environ, PYTHONPATH=parent+fdel+"src")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True).stdout
+        self.assertEqual(output.strip(), "False False")
+
+    def test_get_from_store(self):
+        series = access.get("https://tradingeconomics.com/united-states/gdp", start="2021-01-01", store=self.store)
+        self.assertEqual(len(series), 12)
+        self.assertEqual(series.iloc[0], 12)
+        series.iloc[0] = -1   # Callers get a copy.
+        self.assertEqual(access.get("united-states/gdp", store=self.store).iloc[12], 12)
+        self.assertIsNone(access.get("japan/gdp", scrape=False, store=self.store))
+
+    def test_stale_copy_without_scraping(self):
+        self.store.conn.execute("UPDATE series SET updated_at = ?", (time.time() - 90 * 24 * 3600,))
+        access._hot.clear()
+        series = access.get("united-states/gdp", max_age=3600, scrape=False, store=self.store)
+        self.assertEqual(len(series), 24)
+        self.store.put("united-states/gdp", pd.Series([99.0], index=[pd.Timestamp("2022-01-31")]))
+        self.assertEqual(access.get("united-states/gdp", max_age=3600, scrape=False, store=self.store).iloc[-1], 99)
+
+    def patch_scrape_chart(self, calls: list):
+        """Replace scrape_chart with a stub returning a scraper with a fake browser. Calls and browser quits are recorded in calls."""
+        class FakeDriver:
+            def quit(self):
+                calls.append("quit")
+        class FakeScraper:
+            def __init__(self, driver):
+                self.driver = driver
+                self.series = pd.Series([1.0, 2.0], index=pd.date_range("2022-01-31", periods=2, freq="ME"))
+                self.series_metadata = pd.Series({"frequency": "ME"})
+        def fake_scrape_chart(**kwargs):
+            calls.append(kwargs)
+            return FakeScraper(kwargs.get("driver") or FakeDriver())
+        module = importlib.import_module("tedata.scrape_chart")
+        original, module.scrape_chart = module.scrape_chart, fake_scrape_chart
+        self.addCleanup(setattr, module, "scrape_chart", original)
+
+    def test_stale_copy_is_scraped_afresh(self):
+        calls = []
+        self.patch_scrape_chart(calls)
+        self.store.conn.execute("UPDATE series SET updated_at = ?", (time.time() - 90 * 24 * 3600,))
+        access._hot.clear()
+        series = access.get("united-states/gdp", max_age=3600, store=self.store)
+        self.assertEqual(calls[0]["id"], "united-states/gdp")
+        self.assertFalse(calls[0]["use_cache"])   # Not served back from the series cache under its own TTL.
+        self.assertEqual(calls[0]["max_age"], 3600)
+        self.assertEqual(calls[1], "quit")   # get started the browser, so it quits it.
+        self.assertEqual(series.iloc[-2:].tolist(), [1.0, 2.0])   # Merged into the stored series.
+        self.assertLess(time.time() - self.store.updated_at("united-states/gdp"), 60)
+
+    def test_supplied_driver_is_not_quit(self):
+        calls = []
+        self.patch_scrape_chart(calls)
+        class CallerDriver:
+            def quit(self):
+                calls.append("caller driver quit")
+        series = access.get("japan/gdp", store=self.store, driver=CallerDriver())
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(calls[0]["use_cache"])   # No stored copy, a cached one will do.
+        self.assertEqual(series.tolist(), [1.0, 2.0])
+
+    def test_concurrent_gets_share_one_scrape(self):
+        calls = []
+        self.patch_scrape_chart(calls)
+        module = importlib.import_module("tedata.scrape_chart")
+        fake_scrape_chart = module.scrape_chart
+        def slow_scrape_chart(**kwargs):
+            time.sleep(0.3)
+            return fake_scrape_chart(**kwargs)
+        module.scrape_chart = slow_scrape_chart
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda _: access.get("japan/gdp", store=self.store), range(4)))
+        self.assertEqual(calls.count("quit"), 1)
+        self.assertEqual(len([call for call in calls if call != "quit"]), 1)
+        self.assertTrue(all(result.tolist() == [1.0, 2.0] for result in results))
+
+    def test_get_many(self):
+        frame = access.get_many(["united-states/gdp", "japan/gdp"], end="2020-06-30", scrape=False, store=self.store)
+        self.assertEqual(list(frame.columns), ["united-states/gdp", "japan/gdp"])
+        self.assertEqual(len(frame), 6)
+        self.assertTrue(frame["japan/gdp"].isna().all())
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,53 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.archive import write_archive, load_archive
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "macro.tedarch")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip_without_copy(self):
+        gdp = pd.Series([1.0, 2.0, np.nan, 4.0], index=pd.date_range("2020-03-31", periods=4, freq="QE"), name="GDP")
+        cpi = pd.Series(np.arange(12.0), index=pd.date_range("2020-01-31", periods=12, freq="ME"))
+        results = {"united-states/cpi": {"series": cpi, "metadata": pd.Series({"units": "points"}), "error": None},
+                   "japan/cpi": {"series": None, "metadata": None, "error": "Scraping failed"}}
+        write_archive(self.path, [("https://tradingeconomics.com/united-states/gdp", gdp, {"units": "USD"})])
+        archive = load_archive(self.path)
+        pd.testing.assert_series_equal(archive["united-states/gdp"], gdp, check_freq=False, check_index_type=False)
+        write_archive(self.path, results)
+        archive = load_archive(self.path)
+        self.assertEqual(archive.ids(), ["united-states/cpi"])
+        self.assertNotIn("japan/cpi", archive)
+        read = archive["united-states/cpi"]
+        pd.testing.assert_series_equal(read, cpi, check_freq=False, check_names=False)
+        self.assertTrue(np.shares_memory(read.to_numpy(), archive.values))
+        self.assertEqual(archive.metadata("united-states/cpi"), {"units": "points"})
+
+    def test_many_series_open_fast(self):
+        index = pd.date_range("2000-01-31", periods=300, freq="ME")
+        write_archive(self.path, ((f"country-{i}/gdp", pd.Series(np.full(300, float(i)), index=index), None) for i in range(5000)))
+        timer = time.perf_counter()
+        archive = load_archive(self.path)
+        last = archive["country-4999/gdp"]
+        self.assertLess(time.perf_counter() - timer, 0.5)
+        self.assertEqual(len(archive), 5000)
+        self.assertEqual(last.iloc[-1], 4999)
+        self.assertEqual(archive.to_frame(["country-1/gdp", "country-2/gdp"]).shape, (300, 2))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,67 @@
+import unittest
+import os
+import sys
+import asyncio
+import threading
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata import async_scrape
+from tedata.async_scrape import AsyncScraper
+
+class FakeDriver:
+    """Stands in for a webdriver whose page load blocks until the driver is quit, like a hung selenium call."""
+    def __init__(self):
+        self.quit_called = threading.Event()
+
+    def quit(self):
+        self.quit_called.set()
+
+class FakeScraper:
+    def __init__(self):
+        self.driver = FakeDriver()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+def blocking_scrape_with(scraper, result: dict, **kwargs):
+    blocking_scrape_with.started.set()
+    if not scraper.driver.quit_called.wait(timeout=10):
+        result["error"] = "Not cancelled."
+        return result
+    raise ConnectionError("Driver quit.")
+
+class TestAsyncScraper(unittest.TestCase):
+    def setUp(self):
+        self.original = async_scrape._scrape_with
+        async_scrape._scrape_with = blocking_scrape_with
+        blocking_scrape_with.started = threading.Event()
+
+    def tearDown(self):
+        async_scrape._scrape_with = self.original
+
+    def test_cancel_quits_the_driver(self):
+        scraper = FakeScraper()
+
+        async def run():
+            ascraper = AsyncScraper(max_concurrency=1)
+            ascraper.pool._idle.put(scraper)   # Pre-fill the pool so that no browser is started.
+            task = asyncio.ensure_future(ascraper.scrape("united-states/gdp"))
+            await asyncio.get_running_loop().run_in_executor(None, blocking_scrape_with.started.wait, 10)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            await asyncio.get_running_loop().run_in_executor(None, ascraper.executor.shutdown, True)
+            return ascraper
+
+        ascraper = asyncio.run(run())
+        self.assertTrue(scraper.driver.quit_called.is_set())
+        self.assertTrue(scraper.closed)   # The scraper of the cancelled job is dropped from the pool, not re-used.
+        self.assertTrue(ascraper.pool._idle.empty())
+        self.assertEqual(ascraper.pool._in_use, set())
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,133 @@
+import unittest
+import os
+import sys
+import importlib
+
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata import batch
+scrape_chart_module = importlib.import_module("tedata.scrape_chart")   # tedata.scrape_chart is also the name of the function.
+
+# Series returned by the stubbed scrape_chart. Australia's has a repeated date, as spliced series can have, and its dates are not
+# aligned with the others.
+SERIES = {"united-states/business-confidence": pd.Series([1.0, 2.0, 3.0], index=pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"])),
+          "australia/business-confidence": pd.Series([5.0, 6.0, 7.0], index=pd.to_datetime(["2024-01-15", "2024-02-15", "2024-02-15"]))}
+
+class FakeScraped:
+    def __init__(self, series: pd.Series, url: str):
+        self.series = series
+        self.series_metadata = pd.Series({"id": url.split("tradingeconomics.com/")[-1], "units": "points"})
+        self.method = "highcharts_api"
+        self.timings = {"load_page": 0.1}
+
+def fake_scrape_chart(url: str = None, scraper=None, **kwargs):
+    id = url.split("tradingeconomics.com/")[-1]
+    return FakeScraped(SERIES[id], url) if id in SERIES else None
+
+def fake_scrape_one(id: str, method: str = "highcharts_api", start_date: str = None, end_date: str = None, wait_time: int = 5) -> dict:
+    """Stand-in for batch._scrape_one, at module level so that the spawned pool workers can unpickle it. japan fails the way a real scrape
+    does (error in the result), "crash" raises in the worker."""
+    if id.startswith("crash"):
+        raise RuntimeError("Worker crashed.")
+    result = batch._blank_result(id)
+    if id.startswith("japan"):
+        result["error"] = "Scraping failed, no series returned."
+    else:
+        result["series"] = pd.Series([1.0, 2.0], index=pd.to_datetime(["2024-01-31", "2024-02-29"]), name=id)
+        result["metadata"] = pd.Series({"id": id, "pid": os.getpid()})
+        result["method"] = method
+    result["timings"].update({"driver_ready": 0.0, "total": 0.01})
+    return result
+
+class TestScrapeMany(unittest.TestCase):
+    IDS = ["united-states/gdp", "https://tradingeconomics.com/japan/gdp", "australia/gdp", "united-states/gdp/"]
+
+    def setUp(self):
+        self.original = batch._scrape_one
+        batch._scrape_one = fake_scrape_one
+
+    def tearDown(self):
+        batch._scrape_one = self.original
+
+    def check_results(self, results: dict):
+        self.assertEqual(set(results), {"united-states/gdp", "japan/gdp", "australia/gdp"})   # Normalized, duplicates dropped.
+        for id, result in results.items():
+            self.assertEqual(set(result), {"id", "url", "series", "metadata", "method", "timings", "error"})
+            self.assertEqual(result["id"], id)
+            self.assertEqual(result["url"], f"https://tradingeconomics.com/{id}")
+            self.assertIsInstance(result["timings"]["total"], float)
+        failed = results["japan/gdp"]
+        self.assertEqual(failed["error"], "Scraping failed, no series returned.")
+        self.assertIsNone(failed["series"])
+        ok = results["australia/gdp"]
+        self.assertIsNone(ok["error"])
+        self.assertEqual(ok["series"].tolist(), [1.0, 2.0])
+        self.assertEqual(ok["metadata"]["id"], "australia/gdp")
+        self.assertEqual(ok["method"], "auto")
+
+    def test_in_process_all(self):
+        results = batch.scrape_many(self.IDS, workers=1, method="auto")
+        self.assertEqual(list(results), ["united-states/gdp", "japan/gdp", "australia/gdp"])
+        self.check_results(results)
+        self.assertEqual({r["metadata"]["pid"] for r in results.values() if r["error"] is None}, {os.getpid()})
+
+    def test_in_process_as_completed(self):
+        generator = batch.scrape_many(self.IDS, workers=1, method="auto", return_when="as_completed")
+        self.assertFalse(isinstance(generator, dict))
+        self.check_results(dict(generator))
+
+    def test_process_pool(self):
+        results = batch.scrape_many(self.IDS + ["crash/gdp"], workers=2, method="auto")
+        self.assertEqual(results.pop("crash/gdp")["error"], "Worker crashed.")   # A failing worker job doesn't stop the batch.
+        self.check_results(results)
+        self.assertNotIn(os.getpid(), {r["metadata"]["pid"] for r in results.values() if r["error"] is None})
+
+    def test_process_pool_as_completed(self):
+        self.check_results({id: result for id, result in batch.scrape_many(self.IDS, workers=2, method="auto", return_when="as_completed")})
+
+    def test_invalid_return_when(self):
+        with self.assertRaises(ValueError):
+            batch.scrape_many(self.IDS, return_when="first")
+
+    def test_unique_ids_keep_order(self):
+        ids = [f"country-{i % 500}/gdp" for i in range(5000)]
+        self.assertEqual(batch._unique_ids(ids), [f"country-{i}/gdp" for i in range(500)])
+
+class TestScrapePanel(unittest.TestCase):
+    def setUp(self):
+        self.originals = (batch._get_worker_scraper, scrape_chart_module.scrape_chart)
+        batch._get_worker_scraper = lambda: object()   # No browser.
+        scrape_chart_module.scrape_chart = fake_scrape_chart
+
+    def tearDown(self):
+        batch._get_worker_scraper, scrape_chart_module.scrape_chart = self.originals
+
+    def test_panel_is_aligned_on_dates(self):
+        data, meta = batch.scrape_panel(["United States", "australia", "japan"], "business-confidence", workers=1)
+        self.assertEqual(list(data.columns), ["united-states", "australia", "japan"])
+        self.assertEqual(len(data), 5)   # Union of the dates, the repeated one counted once.
+        self.assertTrue(data.index.is_monotonic_increasing)
+        self.assertEqual(data.loc["2024-02-15", "australia"], 7.0)   # Last value of a repeated date is kept.
+        self.assertTrue(pd.isna(data.loc["2024-02-01", "australia"]))
+        self.assertEqual(data.loc["2024-03-01", "united-states"], 3.0)
+        self.assertTrue(data["japan"].isna().all())
+        self.assertEqual(meta.loc["japan", "error"], "Scraping failed, no series returned.")
+        self.assertEqual(meta.loc["australia", "units"], "points")
+
+    def test_panel_resampled(self):
+        data, _ = batch.scrape_panel(["united-states", "australia"], "business-confidence", workers=1, resample="MS")
+        self.assertEqual(len(data), 3)
+        self.assertEqual(data.loc["2024-02-01"].tolist(), [2.0, 7.0])
+
+    def test_panel_with_no_series(self):
+        data, meta = batch.scrape_panel(["japan"], "business-confidence", workers=1)
+        self.assertEqual(list(data.columns), ["japan"])
+        self.assertEqual(len(data), 0)
+        self.assertIsInstance(data.index, pd.DatetimeIndex)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import unittest
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+sys.path.append(wd+fdel+"benchmarks")
+
+from history import welch_t_test, records_from_results, append_history, load_history, compare_last_runs
+from report import generate_html_report
+
+def _run(timestamp: str, revision: str) -> dict:
+    return {"tedata_version": "0.3.51", "git_revision": revision, "host": "bench-host", "python": "3.11", "platform": "linux",
+            "timestamp": timestamp}
+
+def _micro(timestamp: str, revision: str, samples: list) -> dict:
+    return {"run": _run(timestamp, revision), "benchmark": "micro",
+            "results": [{"benchmark": "round_to_freq", "size": 100, "seconds": min(samples), "samples": samples},
+                        {"benchmark": "ready_datestr", "size": 100, "seconds": 1e-4, "samples": [1e-4, 1.01e-4, 0.99e-4]}]}
+
+class TestBenchmarkHistory(unittest.TestCase):
+    def test_welch_t_test(self):
+        # Example from the Wikipedia article on Welch's t-test: t = 2.46, df = 24.99, p = 0.021.
+        a = [27.5, 21.0, 19.0, 23.6, 17.0, 17.9, 16.9, 20.1, 21.9, 22.6, 23.1, 19.6, 19.0, 21.7, 21.4]
+        b = [27.1, 22.0, 20.8, 23.4, 23.4, 23.5, 25.8, 22.0, 24.8, 20.2, 21.9, 22.1, 22.9, 20.5, 24.4]
+        t, df, p = welch_t_test(a, b)
+        self.assertAlmostEqual(t, 2.455, places=3)
+        self.assertAlmostEqual(df, 24.99, places=2)
+        self.assertAlmostEqual(p, 0.0214, places=4)
+
+    def test_scrape_records_per_stage(self):
+        results = [{"dataset": "daily-10y", "method": "highcharts_api", "status": "ok", "wall_time": w, "expected_points": 2600,
+                    "timings": {"load_page": w / 2, "scrape_chart": w}} for w in (4.0, 4.2)]
+        results.append({"dataset": "daily-10y", "method": "path", "status": "skipped"})
+        records = records_from_results({"run": _run("2026-01-01T00:00:00", "abc"), "benchmark": "scrape", "results": results})
+        stages = {r["stage"]: r["samples"] for r in records}
+        self.assertEqual(stages, {"wall": [4.0, 4.2], "load_page": [2.0, 2.1], "scrape_chart": [4.0, 4.2]})
+        self.assertTrue(all(r["method"] == "highcharts_api" and r["items"] == 2600 for r in records))
+
+    def test_regression_between_last_two_runs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = tmp+fdel+"history.jsonl"
+            append_history(_micro("2026-01-01T00:00:00", "aaa", [9e-3, 9.1e-3, 9.2e-3]), path)
+            append_history(_micro("2026-01-02T00:00:00", "bbb", [1.0e-2, 1.01e-2, 0.99e-2]), path)
+            append_history(_micro("2026-01-03T00:00:00", "ccc", [2.0e-2, 2.02e-2, 1.98e-2]), path)
+            history = load_history(path)
+            self.assertEqual(len(history), 6)
+            comparison = compare_last_runs(history)
+            status = dict(zip(comparison["method"], comparison["status"]))
+            self.assertEqual(status, {"round_to_freq": "regression", "ready_datestr": "no change"})
+            self.assertEqual(set(comparison["last_revision"]), {"ccc"})
+
+            report = generate_html_report(history, comparison, tmp+fdel+"report")
+            with open(report, "r", encoding="utf-8") as f:
+                html = f.read()
+            self.assertIn("1 significant regressions", html)
+            self.assertTrue(os.path.isfile(tmp+fdel+"report"+fdel+"micro_latency.html"))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,48 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+import contextlib
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+sys.path.append(wd+fdel+"benchmarks")
+
+import bench_micro
+from bench_micro import BENCHMARKS, compare
+
+class TestMicroBenchmarks(unittest.TestCase):
+    def test_fixtures_scale_and_parse(self):
+        self.assertEqual(len(bench_micro.tooltip_values(250)), 250)
+        self.assertEqual(len(bench_micro.svg_path(500).split(" ")), 3 * 500)
+        self.assertEqual(len(bench_micro._bench_series_from_svg_path(bench_micro.svg_path(500))), 500)
+        self.assertEqual(len(bench_micro._bench_parse_search_results(bench_micro.search_page(10))), 8)   # 2 items have no site link.
+        self.assertEqual(len(bench_micro._bench_parse_search_results(bench_micro.search_page(100))), 80)
+        chart = bench_micro._bench_update_soups(bench_micro.chart_page(50))
+        self.assertIsNotNone(chart.select_one(".highcharts-graph"))
+        self.assertEqual(bench_micro.chart_page(50).count("<tr><td>"), 50)
+
+    def test_every_benchmark_runs(self):
+        for name, (build, func, sizes) in BENCHMARKS.items():
+            self.assertIsNotNone(func(build(sizes[0])), name)
+
+    def test_compare_flags_regressions(self):
+        baseline = {"results": [{"benchmark": "a", "size": 10, "normalized": 1.0}, {"benchmark": "b", "size": 10, "normalized": 1.0}]}
+        output = {"results": [{"benchmark": "a", "size": 10, "normalized": 2.0}, {"benchmark": "b", "size": 10, "normalized": 1.1},
+                              {"benchmark": "c", "size": 10, "normalized": 1.0}]}
+        report = compare(output, baseline, threshold=1.5)
+        self.assertEqual([(r["benchmark"], r["status"]) for r in report], [("a", "regression"), ("b", "ok")])
+
+    def test_check_without_baselines_fails(self):
+        with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit) as cm:
+                bench_micro.main(["--check", "--quick", "--no-history", "--baseline", os.path.join(tmp, "missing.json"),
+                                  "--out", os.path.join(tmp, "out.json")])
+            self.assertNotEqual(cm.exception.code, 0)
+            self.assertEqual(os.listdir(tmp), [])   # Fails before running the benchmarks.
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
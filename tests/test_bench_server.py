@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import unittest
+import urllib.request
+import urllib.error
+import pandas as pd
+from bs4 import BeautifulSoup
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+sys.path.append(wd+fdel+"benchmarks")
+
+from te_stub_server import StubServer, DATASETS, dataset_series, expected_series
+from bench_scrape import check_series, skip_warning
+
+class TestStubServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubServer().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def fetch(self, url: str) -> str:
+        with urllib.request.urlopen(url, timeout=10) as response:
+            return response.read().decode("utf-8")
+
+    def test_pages_have_what_the_scraper_reads(self):
+        for name in DATASETS:
+            soup = BeautifulSoup(self.fetch(self.server.url(name)), "html.parser")
+            chart = soup.select_one("#chart")
+            # Same lookups as TE_Scraper.determine_date_span, create_chart_types_dict & scrape_metadata.
+            spans = {child.text: child["class"] for child in chart.select_one("#dateSpansDiv").children}
+            self.assertIn("MAX", spans)
+            self.assertIn("selected", spans["MAX"])
+            types = {child["title"]: child.button["class"][0] for child in chart.select_one(".chartTypesWrapper").children}
+            self.assertIn("Line", types)
+            self.assertEqual(soup.select("#ctl00_Head1")[0].title.text.strip(), expected_series(name).name)
+            self.assertIsNotNone(soup.select_one("#d1"))
+
+            script = soup.find_all("script")[-1].string
+            data = json.loads(script.split("var TE_DATA = ", 1)[1].split(";\n", 1)[0])
+            self.assertEqual(len(data["series"]), len(dataset_series(name)))
+            points = data["series"][0]["data"]
+            served = pd.Series([p[1] for p in points], index=pd.to_datetime([p[0] for p in points], unit="ms"))
+            self.assertTrue(check_series(served, expected_series(name), tolerance=0)["correct"])
+
+    def test_static_highcharts_and_missing_pages(self):
+        js = self.fetch(f"http://127.0.0.1:{self.server.port}/static/highcharts.js")
+        self.assertIn("Highcharts", js)
+        self.assertEqual(self.server.supports("highcharts_api"), True)
+        self.assertEqual(self.server.supports("path"), self.server.highcharts == "real")
+        with self.assertRaises(urllib.error.HTTPError):
+            self.fetch(f"http://127.0.0.1:{self.server.port}/stubland/no-such-indicator")
+
+    def test_skipped_methods_are_announced(self):
+        warning = skip_warning(self.server, ["highcharts_api", "path", "tooltips"])
+        if self.server.highcharts == "real":
+            self.assertIsNone(warning)
+        else:
+            self.assertIn("only supports highcharts_api", warning)
+            self.assertIn("path, tooltips are SKIPPED", warning)
+        self.assertIsNone(skip_warning(self.server, ["highcharts_api"]))
+
+    def test_datasets_are_deterministic(self):
+        for name in DATASETS:
+            pd.testing.assert_series_equal(expected_series(name), expected_series(name))
+        self.assertGreater(len(expected_series("monthly-1950")), 12 * 70)
+        self.assertGreater(len(expected_series("daily-10y")), 250 * 9)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
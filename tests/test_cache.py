@@ -0,0 +1,144 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.cache import MethodMemory, SeriesCache, MetadataCache, SearchCache, FrequencyCache, ttl_for
+
+ORDER = ["highcharts_api", "mixed", "tooltips", "path"]
+
+class TestMethodMemory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.memory = MethodMemory(os.path.join(self.tmpdir.name, "methods.db"))
+
+    def tearDown(self):
+        self.memory.close()
+        self.tmpdir.cleanup()
+
+    def test_unknown_id_keeps_default_order(self):
+        self.assertEqual(self.memory.best_order("united-states/gdp", ORDER), ORDER)
+
+    def test_fastest_known_good_method_first(self):
+        url = "https://tradingeconomics.com/united-states/gdp"
+        self.memory.record(url, "highcharts_api", ok=False, elapsed=20)
+        self.memory.record(url, "mixed", ok=True, elapsed=60)
+        self.memory.record(url, "tooltips", ok=True, elapsed=30)
+        self.assertEqual(self.memory.best_order("united-states/gdp", ORDER), ["tooltips", "mixed", "path", "highcharts_api"])
+        stats = self.memory.stats("united-states/gdp")
+        self.assertEqual(stats["highcharts_api"]["failures"], 1)
+        self.assertEqual(stats["tooltips"]["successes"], 1)
+
+def make_series(n: int = 120) -> pd.Series:
+    return pd.Series(range(n), index=pd.date_range("2000-01-01", periods=n, freq="MS"), name="gdp", dtype=float)
+
+class TestSeriesCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "series.db")
+        self.cache = SeriesCache(self.path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def test_ttl_by_frequency(self):
+        self.assertEqual(ttl_for("MS"), 24 * 3600)
+        self.assertEqual(ttl_for("W-SUN"), 6 * 3600)
+        self.assertEqual(ttl_for("BMS"), 24 * 3600)
+        self.assertEqual(ttl_for("Unknown/irregular"), 6 * 3600)
+
+    def test_put_get_and_expiry(self):
+        series = make_series()
+        self.cache.put("https://tradingeconomics.com/united-states/gdp", series, {"frequency": "MS", "title": "GDP"}, method="highcharts_api")
+        hit = self.cache.get("united-states/gdp")
+        pd.testing.assert_series_equal(hit["series"], series)
+        self.assertEqual(hit["metadata"]["title"], "GDP")
+        self.assertEqual(hit["method"], "highcharts_api")
+        self.assertFalse(hit["stale"])
+        time.sleep(0.05)
+        self.assertIsNone(self.cache.get("united-states/gdp", max_age=0.01))
+        self.assertTrue(self.cache.get("united-states/gdp", max_age=0.01, allow_stale=True)["stale"])
+
+    def test_lru_eviction(self):
+        self.cache.put("a/gdp", make_series(), {"frequency": "MS"})
+        entry_size = self.cache.info().loc["a/gdp", "size"]
+        cache = SeriesCache(self.path, max_bytes=int(entry_size * 2.5))
+        cache.put("b/gdp", make_series(), {"frequency": "MS"})
+        cache.get("a/gdp")  # a is now more recently used than b.
+        cache.put("c/gdp", make_series(), {"frequency": "MS"})
+        self.assertEqual(sorted(cache.info().index), ["a/gdp", "c/gdp"])
+        cache.close()
+
+    def test_scrape_chart_cache_hit_needs_no_browser(self):
+        from tedata.scrape_chart import scrape_chart
+        os.environ["TEDATA_CACHE_DIR"] = self.tmpdir.name
+        try:
+            SeriesCache().put("united-states/gdp", make_series(), {"frequency": "MS", "title": "GDP"}, method="mixed")
+            sel = scrape_chart(id="united-states/gdp", use_cache=True)
+        finally:
+            del os.environ["TEDATA_CACHE_DIR"]
+        self.assertIsNone(sel.driver)
+        self.assertEqual(sel.method, "mixed")
+        self.assertEqual(len(sel.series), 120)
+        self.assertEqual(sel.series_metadata["title"], "GDP")
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = MetadataCache(os.path.join(self.tmpdir.name, "metadata.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def test_only_static_fields_are_kept(self):
+        self.cache.put("https://tradingeconomics.com/united-states/gdp",
+                       pd.Series({"title": "GDP", "units": "USD Billion", "start_date": "1950-01-01", "length": 300}))
+        self.assertEqual(self.cache.get("united-states/gdp"), {"title": "GDP", "units": "USD Billion"})
+        self.assertIsNone(self.cache.get("united-states/gdp", max_age=-1))
+        self.assertIsNone(self.cache.get("australia/gdp"))
+
+class TestFrequencyCache(unittest.TestCase):
+    def test_weekly_anchor_and_start(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = FrequencyCache(os.path.join(tmpdir, "frequency.db"))
+            cache.put("https://tradingeconomics.com/united-states/initial-jobless-claims", "W-SAT", pd.Timestamp("1967-01-07"), start_value=208000)
+            self.assertEqual(cache.get("united-states/initial-jobless-claims"),
+                             {"frequency": "W-SAT", "weekly_anchor": "SAT", "start_date": "1967-01-07", "start_value": 208000.0})
+            cache.put("united-states/gdp", "QS", "1947-01-01")
+            self.assertIsNone(cache.get("united-states/gdp")["weekly_anchor"])
+            cache.close()
+
+class TestSearchCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TEDATA_CACHE_DIR"] = self.tmpdir.name
+
+    def tearDown(self):
+        del os.environ["TEDATA_CACHE_DIR"]
+        self.tmpdir.cleanup()
+
+    def test_normalized_query_and_stale_entries(self):
+        cache = SearchCache()
+        cache.put("ISM  Manufacturing", ["https://tradingeconomics.com/united-states/business-confidence"])
+        self.assertEqual(cache.get(" ism manufacturing")["results"], ["https://tradingeconomics.com/united-states/business-confidence"])
+        self.assertIsNone(cache.get("ism manufacturing", max_age=-1))
+        self.assertTrue(cache.get("ism manufacturing", max_age=-1, allow_stale=True)["stale"])
+        cache.close()
+
+    def test_search_results_served_from_cache(self):
+        from tedata.search import search_results
+        SearchCache().put("gdp", ["https://tradingeconomics.com/united-states/gdp", "https://tradingeconomics.com/euro-area/gdp"])
+        table = search_results("GDP")  # No browser is started for a cached query.
+        self.assertEqual(list(table["country"]), ["united states", "euro area"])
+        self.assertEqual(list(table["metric"]), ["gdp", "gdp"])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+
+# The CLI is run in a subprocess (it redirects the process' stdout) with scrape_many stubbed: japan fails, everything else gets a
+# small series. The arguments scrape_many was called with are written to the file in CALLS_PATH.
+RUN_CLI = """
+import os, sys, json
+import pandas as pd
+import tedata.__main__ as cli
+
+def fake_scrape_many(ids, **kwargs):
+    with open(os.environ["CALLS_PATH"], "w") as f:
+        json.dump({"ids": list(ids), **kwargs}, f)
+    for id in ids:
+        failed = id.startswith("japan")
+        series = None if failed else pd.Series([1.0, 2.0], index=pd.to_datetime(["2024-01-31", "2024-02-29"]), name=id)
+        yield id, {"id": id, "url": "https://tradingeconomics.com/" + id, "series": series,
+                   "metadata": None if failed else pd.Series({"units": "points"}), "method": kwargs["method"],
+                   "timings": {"total": 0.1}, "error": "Scraping failed, no series returned." if failed else None}
+
+cli.scrape_many = fake_scrape_many
+sys.argv = ["tedata"] + sys.argv[1:]
+cli.main()
+"""
+
+class TestCLI(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.calls_path = os.path.join(self.tmpdir.name, "calls.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def run_cli(self, *args, stdin: str = ""):
+        env = dict(os.environ, PYTHONPATH=parent+fdel+"src", CALLS_PATH=self.calls_path, TEDATA_DISABLE_LOGGING="true")
+        proc = subprocess.run([sys.executable, "-c", RUN_CLI, *args], input=stdin, capture_output=True, text=True, env=env,
+                              cwd=self.tmpdir.name, timeout=120)
+        lines = [json.loads(line) for line in proc.stdout.splitlines() if line.strip()]
+        return proc.returncode, lines, proc.stderr
+
+    def calls(self) -> dict:
+        with open(self.calls_path, "r") as f:
+            return json.load(f)
+
+    def test_arguments_and_input_file(self):
+        input_path = os.path.join(self.tmpdir.name, "ids.csv")
+        with open(input_path, "w") as f:
+            f.write("# ids to scrape\naustralia/gdp,extra column\n\nhttps://tradingeconomics.com/germany/gdp\n")
+        code, lines, _ = self.run_cli("united-states/gdp", "--input", input_path, "--method", "auto", "--workers", "3", "--head",
+                                      "--format", "csv", "--out-dir", self.tmpdir.name)
+        self.assertEqual(code, 0)
+        calls = self.calls()
+        self.assertEqual(calls["ids"], ["united-states/gdp", "australia/gdp", "https://tradingeconomics.com/germany/gdp"])
+        self.assertEqual((calls["method"], calls["workers"], calls["headless"]), ("auto", 3, False))
+        self.assertEqual([line["ok"] for line in lines], [True, True, True])
+        self.assertTrue(all(os.path.isfile(line["path"]) and line["path"].endswith(".csv") for line in lines))
+        self.assertEqual(lines[0]["length"], 2)
+
+    def test_ids_from_stdin_and_failure_exit_code(self):
+        code, lines, _ = self.run_cli("--no-plot", stdin="united-states/gdp\njapan/gdp\n")
+        self.assertEqual(code, 1)
+        self.assertEqual({line["id"]: line["ok"] for line in lines}, {"united-states/gdp": True, "japan/gdp": False})
+        self.assertEqual(self.calls()["headless"], True)
+
+    def test_usage_errors(self):
+        code, _, stderr = self.run_cli()
+        self.assertEqual(code, 2)
+        self.assertIn("No URLs or ids supplied", stderr)
+        code, _, _ = self.run_cli("united-states/gdp", "--method", "magic")
+        self.assertEqual(code, 2)
+
+    def test_workbook(self):
+        path = os.path.join(self.tmpdir.name, "book.xlsx")
+        code, lines, _ = self.run_cli("united-states/gdp", "australia/gdp", "--workbook", path)
+        self.assertEqual(code, 0)
+        self.assertEqual([(line["ok"], line["path"]) for line in lines], [(True, path), (True, path)])
+        self.assertTrue(os.path.isfile(path))
+        import openpyxl
+        book = openpyxl.load_workbook(path, read_only=True)
+        rows = list(book["Data"].values)
+        self.assertEqual(rows[0][1:], ("australia/gdp", "united-states/gdp"))
+        self.assertEqual([row[1:] for row in rows[1:]], [(1.0, 1.0), (2.0, 2.0)])
+        book.close()
+
+    def test_workbook_write_failure_is_reported(self):
+        path = os.path.join(self.tmpdir.name, "missing_dir", "book.xlsx")
+        code, lines, stderr = self.run_cli("united-states/gdp", "australia/gdp", "--workbook", path)
+        self.assertEqual(code, 1)
+        self.assertEqual([line["ok"] for line in lines], [False, False])
+        self.assertTrue(all(line["error"].startswith("Error writing workbook") for line in lines))
+        self.assertIn("Error writing workbook", stderr)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
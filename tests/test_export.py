@@ -0,0 +1,102 @@
+import unittest
+import os
+import sys
+import tempfile
+import datetime
+
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.export import write_series, read_series, write_workbook
+
+def make_series():
+    index = pd.date_range("2000-01-31", periods=120, freq="ME")
+    series = pd.Series(range(120), index=index, dtype=float, name="CPI")
+    metadata = pd.Series({"id": "united-states/consumer-price-index-cpi", "frequency": "ME", "units": "points",
+                          "start_date": "2000-01-31", "length": 120})
+    return series, metadata
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def round_trip(self, format):
+        series, metadata = make_series()
+        path = write_series(series, metadata, out_dir=self.tmpdir.name, format=format)
+        self.assertTrue(path.endswith(f"united-states_consumer-price-index-cpi.{format}"))
+        read, read_meta = read_series(path)
+        pd.testing.assert_series_equal(read, series, check_names=False, check_freq=False, check_index_type=False)
+        self.assertIsInstance(read.index, pd.DatetimeIndex)
+        self.assertEqual(read_meta["units"], "points")
+        self.assertEqual(read_meta["length"], 120)
+        return path, read
+
+    def test_parquet_embeds_metadata(self):
+        path, read = self.round_trip("parquet")
+        self.assertEqual(read.dtype, "float64")
+        self.assertEqual(read.name, "CPI")
+        self.assertFalse(os.path.exists(path.replace(".parquet", "_metadata.json")))
+
+    def test_arrow_round_trip(self):
+        path, read = self.round_trip("arrow")
+        table, metadata = read_series(path, as_table=True)
+        self.assertEqual(table.column_names[:2], ["CPI", "date"])
+        self.assertEqual(metadata["id"], "united-states/consumer-price-index-cpi")
+
+    def test_csv_and_jsonl_use_sidecar_metadata(self):
+        for format in ("csv", "jsonl"):
+            path, _ = self.round_trip(format)
+            self.assertTrue(os.path.exists(path.replace(f".{format}", "_metadata.json")))
+
+    def test_jsonl_keeps_intraday_times(self):
+        series = pd.Series([1.0, 2.0, float("nan")], index=pd.date_range("2024-03-01 09:30", periods=3, freq="15min"), name="FX")
+        path = write_series(series, {"units": "points"}, filename="fx", out_dir=self.tmpdir.name, format="jsonl")
+        with open(path, "r", encoding="utf-8") as f:
+            self.assertEqual(f.readline().strip(), '{"date": "2024-03-01T09:30:00", "value": 1.0}')
+        read, _ = read_series(path)
+        pd.testing.assert_series_equal(read, series, check_names=False, check_freq=False)
+
+    def test_workbook_is_aligned_on_dates(self):
+        import openpyxl
+        series, metadata = make_series()
+        quarterly = pd.Series([1.5, float("nan"), 3.5], index=pd.date_range("2000-03-31", periods=3, freq="QE"))
+        path = os.path.join(self.tmpdir.name, "book.xlsx")
+        write_workbook(path, {"united-states/consumer-price-index-cpi": {"series": series, "metadata": metadata, "error": None},
+                              "united-states/gdp": {"series": quarterly, "metadata": {"units": "USD", "tags": ["a", "b"]}, "error": None},
+                              "japan/gdp": {"series": None, "metadata": None, "error": "Scraping failed"}})
+        data = pd.read_excel(path, sheet_name="Data", index_col=0)
+        self.assertEqual(list(data.columns), ["united-states/consumer-price-index-cpi", "united-states/gdp"])
+        self.assertEqual(len(data), 120)
+        self.assertEqual(data.loc["2000-03-31", "united-states/gdp"], 1.5)
+        self.assertTrue(pd.isna(data.loc["2000-06-30", "united-states/gdp"]))
+        self.assertTrue(pd.isna(data.loc["2000-01-31", "united-states/gdp"]))
+        self.assertEqual(data.loc["2009-12-31", "united-states/consumer-price-index-cpi"], 119)
+        meta = pd.read_excel(path, sheet_name="Metadata", index_col=0)
+        self.assertEqual(meta.loc["united-states/gdp", "units"], "USD")
+        self.assertEqual(meta.loc["united-states/gdp", "tags"], '["a", "b"]')
+        self.assertEqual(meta.loc["united-states/consumer-price-index-cpi", "length"], 120)
+        self.assertIsInstance(openpyxl.load_workbook(path)["Data"]["A2"].value, datetime.datetime)
+
+    def test_workbook_streams_from_store(self):
+        from tedata.store import SeriesStore
+        series, metadata = make_series()
+        store = SeriesStore(os.path.join(self.tmpdir.name, "store.db"))
+        store.put("united-states/consumer-price-index-cpi", series, metadata)
+        store.put("united-states/gdp", pd.Series([1.5, 2.5], index=pd.date_range("2000-03-31", periods=2, freq="QE")), {"units": "USD"})
+        store.get = None   # Stored series must be streamed with iter_points, not loaded whole.
+        path = write_workbook(os.path.join(self.tmpdir.name, "store.xlsx"), store)
+        store.close()
+        data = pd.read_excel(path, sheet_name="Data", index_col=0)
+        self.assertEqual(list(data.columns), ["united-states/consumer-price-index-cpi", "united-states/gdp"])
+        self.assertEqual(len(data), 120)
+        self.assertEqual(data.loc["2000-06-30", "united-states/gdp"], 2.5)
+        self.assertEqual(pd.read_excel(path, sheet_name="Metadata", index_col=0).loc["united-states/gdp", "units"], "USD")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
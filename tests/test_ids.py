@@ -0,0 +1,39 @@
+import unittest
+import os
+import sys
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.ids import normalize_id, id_to_url
+from tedata.batch import _unique_ids
+
+class TestNormalizeId(unittest.TestCase):
+    def test_full_urls(self):
+        for url in ("https://tradingeconomics.com/united-states/business-confidence",
+                    "http://www.tradingeconomics.com/united-states/business-confidence",
+                    "tradingeconomics.com/united-states/business-confidence",
+                    "https://tradingeconomics.com/united-states/business-confidence?embed=true#chart"):
+            self.assertEqual(normalize_id(url), "united-states/business-confidence", url)
+
+    def test_trailing_slashes_case_and_whitespace(self):
+        self.assertEqual(normalize_id("  /United-States/GDP//  "), "united-states/gdp")
+        self.assertEqual(normalize_id("https://tradingeconomics.com/Japan/GDP-Growth/"), "japan/gdp-growth")
+
+    def test_indicator_only(self):
+        self.assertEqual(normalize_id("gdp"), "united-states/gdp")
+        self.assertEqual(normalize_id("gdp/", country=" Australia "), "australia/gdp")
+
+    def test_invalid_input_raises(self):
+        for bad in ("", "   ", "/", "https://tradingeconomics.com/", None, 42):
+            with self.assertRaises(ValueError, msg=repr(bad)):
+                normalize_id(bad)
+
+    def test_id_to_url_and_unique_ids(self):
+        self.assertEqual(id_to_url("Japan/GDP/"), "https://tradingeconomics.com/japan/gdp")
+        self.assertEqual(_unique_ids(["united-states/gdp", "https://tradingeconomics.com/united-states/gdp/", "japan/gdp", "GDP"]),
+                         ["united-states/gdp", "japan/gdp"])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,71 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.jobqueue import JobQueue
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.queue = JobQueue(os.path.join(self.tmpdir.name, "jobs.db"))
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmpdir.cleanup()
+
+    def test_journal_mode(self):
+        self.assertEqual(self.queue.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        queue = JobQueue(os.path.join(self.tmpdir.name, "network_jobs.db"), wal=False)   # For files on network filesystems.
+        self.assertEqual(queue.conn.execute("PRAGMA journal_mode").fetchone()[0], "delete")
+        queue.close()
+
+    def test_enqueue_normalizes_and_dedupes(self):
+        added = self.queue.enqueue(["https://tradingeconomics.com/united-states/gdp", "united-states/gdp", "australia/gdp"])
+        self.assertEqual(added, 2)
+        self.assertEqual(self.queue.stats()["pending"], 2)
+
+    def test_priority_order(self):
+        self.queue.enqueue(["australia/gdp"], priority=0)
+        self.queue.enqueue(["japan/gdp"], priority=5)
+        self.assertEqual(self.queue.lease(worker="w1")["id"], "japan/gdp")
+        self.assertEqual(self.queue.lease(worker="w1")["id"], "australia/gdp")
+        self.assertIsNone(self.queue.lease(worker="w1"))
+
+    def test_complete_and_fail_with_retries(self):
+        self.queue.enqueue(["australia/gdp"], max_retries=1)
+        job = self.queue.lease(worker="w1")
+        self.assertEqual(self.queue.fail(job, "boom"), "pending")
+        job = self.queue.lease(worker="w1")
+        self.assertEqual(job["attempts"], 2)
+        self.assertEqual(self.queue.fail(job, "boom again"), "failed")
+        self.assertEqual(self.queue.stats()["failed"], 1)
+        self.assertEqual(self.queue.reset_failed(), 1)
+        job = self.queue.lease(worker="w1")
+        self.assertTrue(self.queue.complete(job, result={"path": "x.xlsx"}))
+        self.assertEqual(self.queue.stats()["done"], 1)
+
+    def test_stale_lease_is_reclaimed(self):
+        self.queue.enqueue(["australia/gdp"])
+        dead_job = self.queue.lease(worker="dead", lease_timeout=0.05)
+        time.sleep(0.1)
+        job = self.queue.lease(worker="alive")
+        self.assertEqual(job["id"], "australia/gdp")
+        # The dead worker lost its lease and can no longer complete the job.
+        self.assertFalse(self.queue.complete(dead_job))
+        self.assertTrue(self.queue.complete(job))
+
+    def test_requeue_done(self):
+        self.queue.enqueue(["australia/gdp"])
+        self.queue.complete(self.queue.lease(worker="w1"))
+        self.assertEqual(self.queue.enqueue(["australia/gdp"]), 0)
+        self.assertEqual(self.queue.enqueue(["australia/gdp"], requeue_done=True), 1)
+        self.assertEqual(self.queue.stats()["pending"], 1)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
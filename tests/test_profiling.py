@@ -0,0 +1,75 @@
+import os
+import sys
+import pstats
+import tempfile
+import unittest
+import tracemalloc
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.profiling import profiled, configure_profiling, profile_path, PROFILE_ENV
+
+class FakeScraper:
+    def __init__(self):
+        self.timings = {"load_page": 0.5}
+
+@profiled
+def fake_scrape(url: str = None, id: str = None, country: str = "united-states", indicator: str = None, profile: str = None):
+    data = [list(range(1000)) for _ in range(200)]   # Something to show up in the profiles.
+    return FakeScraper() if data else None
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        configure_profiling(None, directory=self.tmp.name)
+
+    def tearDown(self):
+        configure_profiling(None)
+        self.tmp.cleanup()
+
+    def test_off_by_default(self):
+        scraped = fake_scrape(id="united-states/gdp")
+        self.assertEqual(scraped.timings, {"load_page": 0.5})
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_cprofile_file_named_after_id(self):
+        scraped = fake_scrape(url="https://tradingeconomics.com/japan/gdp-growth", profile="cprofile")
+        summary = scraped.profile
+        self.assertEqual(summary["mode"], "cprofile")
+        self.assertTrue(os.path.basename(summary["path"]).startswith("japan_gdp-growth_"))
+        self.assertTrue(summary["path"].endswith(".prof"))
+        self.assertTrue(any("fake_scrape" in row["function"] for row in summary["top"]))
+        self.assertGreater(pstats.Stats(summary["path"]).total_calls, 0)
+        self.assertEqual(scraped.timings, {"load_page": 0.5})   # Timings hold only stage durations.
+
+    def test_tracemalloc_from_env(self):
+        configure_profiling("tracemalloc", directory=self.tmp.name, top=5)
+        scraped = fake_scrape(country="euro-area", indicator="inflation-cpi")
+        summary = scraped.profile
+        self.assertEqual(os.environ[PROFILE_ENV], "tracemalloc")
+        self.assertTrue(os.path.basename(summary["path"]).startswith("euro-area_inflation-cpi_"))
+        self.assertLessEqual(len(summary["top"]), 5)
+        self.assertGreater(summary["peak_mb"], 0)
+        self.assertIsInstance(tracemalloc.Snapshot.load(summary["path"]), tracemalloc.Snapshot)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_profile_false_or_unknown_mode_scrapes_without_profiling(self):
+        configure_profiling("cprofile", directory=self.tmp.name)
+        self.assertFalse(hasattr(fake_scrape(id="gdp", profile=False), "profile"))
+        with self.assertLogs("tedata.profiling", level="WARNING") as logs:
+            self.assertFalse(hasattr(fake_scrape(id="gdp", profile="pyspy"), "profile"))
+        self.assertIn("Unknown profiling mode: pyspy", logs.output[0])
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_profiles_of_the_same_id_in_the_same_second_are_kept(self):
+        paths = {profile_path("united-states/gdp", "cprofile") for _ in range(5)}
+        self.assertEqual(len(paths), 5)
+        first = fake_scrape(id="united-states/gdp", profile="cprofile").profile["path"]
+        second = fake_scrape(id="united-states/gdp", profile="cprofile").profile["path"]
+        self.assertNotEqual(first, second)
+        self.assertEqual(len(os.listdir(self.tmp.name)), 2)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,77 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+import threading
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.ratelimit import RateLimiter, configure_rate_limit, get_rate_limiter
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.tmpdir.name, "limiter.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_requests_are_spaced_across_threads(self):
+        limiter = RateLimiter(600, state_path=self.state_path)  # One request every 0.1 s.
+        start = time.perf_counter()
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.38)
+
+    def test_state_is_shared_between_instances(self):
+        RateLimiter(60, state_path=self.state_path).acquire()
+        # A second limiter on the same state file (e.g in another process) must wait for the next token.
+        other = RateLimiter(600, state_path=self.state_path)
+        self.assertGreater(other.acquire(), 0)
+
+    def test_adaptive_backoff_and_recovery(self):
+        limiter = RateLimiter(60, state_path=self.state_path, slow_threshold=5, backoff_interval=0)
+        limiter.record(latency=1, ok=False)
+        self.assertAlmostEqual(limiter.current_rate, 30)
+        limiter.record(latency=30, ok=True)  # Slow page loads count as failures.
+        self.assertAlmostEqual(limiter.current_rate, 15)
+        for _ in range(40):
+            limiter.record(latency=1, ok=True)
+        self.assertAlmostEqual(limiter.current_rate, 60)
+
+class _FakeDriver:
+    def get(self, url):
+        pass
+
+class _TimingOutWait:
+    def until(self, condition, message=""):
+        from selenium.common.exceptions import TimeoutException
+        raise TimeoutException(message)
+
+class TestLoadPageRecordsOutcome(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        configure_rate_limit(6000, state_dir=self.tmpdir.name)
+
+    def tearDown(self):
+        configure_rate_limit(None)
+        os.environ.pop("TEDATA_RATE_LIMIT_DIR", None)
+        self.tmpdir.cleanup()
+
+    def test_timed_out_load_tightens_the_bucket(self):
+        from tedata.scraper import TE_Scraper
+        scraper = TE_Scraper.__new__(TE_Scraper)   # No browser: the driver and the wait for #chart are stand-ins.
+        scraper.driver, scraper.wait, scraper.timings = _FakeDriver(), _TimingOutWait(), {}
+        url = "https://tradingeconomics.com/united-states/gdp"
+        self.assertAlmostEqual(get_rate_limiter(url).current_rate, 6000)
+        self.assertFalse(scraper.load_page(url, extra_wait_time=0))
+        self.assertAlmostEqual(get_rate_limiter(url).current_rate, 3000)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,180 @@
+import unittest
+import os
+import sys
+import tempfile
+import importlib
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.cache import MethodMemory, SeriesCache, MetadataCache
+
+scrape_chart_module = importlib.import_module("tedata.scrape_chart")
+
+URL = "https://tradingeconomics.com/united-states/gdp"
+
+class FakeScraper:
+    """Stands in for a TE_Scraper with the chart page loaded."""
+
+class FakeChartScraper:
+    """Stands in for TE_Scraper in scrape_chart: loading the page always works and update_series splices the history with a new point
+    if update_ok. Calls are recorded in 'calls'."""
+    update_ok = True
+
+    def __init__(self, **kwargs):
+        self.calls = []
+        self.timings = {}
+        self.driver = None
+
+    def load_page(self, url, extra_wait_time=3, parse_full_page=True):
+        self.calls.append(("load_page", parse_full_page))
+        self.last_url = url
+        return True
+
+    def scrape_metadata(self):
+        self.calls.append(("scrape_metadata",))
+        self.metadata = {"units": "USD", "title": "United States GDP"}
+        self.series_metadata = pd.Series(self.metadata)
+
+    def update_series(self, history, window_years=3, method="highcharts_api"):
+        self.calls.append(("update_series", len(history), window_years))
+        if not self.update_ok:
+            return False
+        self.series = pd.concat([history, pd.Series([9.0], index=[history.index[-1] + pd.offsets.MonthEnd()])])
+        return True
+
+class TestScrapeAuto(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TEDATA_CACHE_DIR"] = self.tmpdir.name
+        self.tried = []
+        self.working = set()
+        original = scrape_chart_module.run_scrape_method
+        scrape_chart_module.run_scrape_method = self.fake_run_scrape_method
+        self.addCleanup(setattr, scrape_chart_module, "run_scrape_method", original)
+
+    def tearDown(self):
+        del os.environ["TEDATA_CACHE_DIR"]
+        self.tmpdir.cleanup()
+
+    def fake_run_scrape_method(self, sel, method, start_date, end_date, use_cache=False):
+        """Methods in self.working set a series on sel, "tooltips" raises and the others fail."""
+        self.tried.append(method)
+        if method == "tooltips":
+            raise RuntimeError("no tooltips on this chart")
+        if method in self.working:
+            sel.series = pd.Series([1.0, 2.0], index=pd.date_range("2024-01-31", periods=2, freq="ME"))
+            return True
+        return False
+
+    def test_falls_through_to_next_method(self):
+        self.working = {"path"}
+        sel = FakeScraper()
+        self.assertTrue(scrape_chart_module.scrape_auto(sel, URL, None, None, method_memory=False))
+        self.assertEqual(self.tried, ["highcharts_api", "mixed", "tooltips", "path"])
+        self.assertEqual(sel.method, "path")
+        self.assertEqual(len(sel.series), 2)
+
+    def test_all_methods_failing(self):
+        sel = FakeScraper()
+        self.assertFalse(scrape_chart_module.scrape_auto(sel, URL, None, None, auto_order=["mixed", "tooltips"], method_memory=False))
+        self.assertEqual(self.tried, ["mixed", "tooltips"])
+        self.assertFalse(hasattr(sel, "method"))
+
+    def test_successful_method_is_remembered_and_tried_first(self):
+        self.working = {"path"}
+        self.assertTrue(scrape_chart_module.scrape_auto(FakeScraper(), URL, None, None))
+        memory = MethodMemory()
+        stats = memory.stats("united-states/gdp")
+        memory.close()
+        self.assertTrue(stats["path"]["last_ok"])
+        self.assertEqual({method: stats[method]["failures"] for method in ("highcharts_api", "mixed", "tooltips")},
+                         {"highcharts_api": 1, "mixed": 1, "tooltips": 1})
+
+        self.tried = []
+        sel = FakeScraper()
+        self.assertTrue(scrape_chart_module.scrape_auto(sel, URL, None, None))
+        self.assertEqual(self.tried, ["path"])   # best_order puts the method that worked last time first.
+        self.assertEqual(sel.method, "path")
+
+        self.tried, self.working = [], {"mixed"}
+        self.assertTrue(scrape_chart_module.scrape_auto(FakeScraper(), URL, None, None))
+        self.assertEqual(self.tried, ["path", "highcharts_api", "mixed"])   # "path" failed this time, the methods that failed before follow.
+
+class TestScrapeChart(unittest.TestCase):
+    """scrape_chart with TE_Scraper and run_scrape_method stubbed."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["TEDATA_CACHE_DIR"] = self.tmpdir.name
+        self.methods_run = []
+        for name, stub in (("TE_Scraper", FakeChartScraper), ("run_scrape_method", self.fake_run_scrape_method)):
+            original = getattr(scrape_chart_module, name)
+            setattr(scrape_chart_module, name, stub)
+            self.addCleanup(setattr, scrape_chart_module, name, original)
+        self.addCleanup(setattr, FakeChartScraper, "update_ok", True)
+        self.history = pd.Series([1.0, 2.0, 3.0], index=pd.date_range("2024-01-31", periods=3, freq="ME"))
+
+    def tearDown(self):
+        del os.environ["TEDATA_CACHE_DIR"]
+        self.tmpdir.cleanup()
+
+    def fake_run_scrape_method(self, sel, method, start_date, end_date, use_cache=False):
+        self.methods_run.append(method)
+        sel.series = pd.Series([5.0], index=[pd.Timestamp("2024-01-31")])
+        return True
+
+    def seed_history(self):
+        cache = SeriesCache()
+        cache.put(URL, self.history, {"units": "USD"}, method="highcharts_api", fetched_at=0)   # Long stale.
+        cache.close()
+
+    def cached_series(self) -> pd.Series:
+        cache = SeriesCache()
+        entry = cache.get(URL, allow_stale=True)
+        cache.close()
+        return entry["series"]
+
+    def test_update_splices_cached_history(self):
+        self.seed_history()
+        sel = scrape_chart_module.scrape_chart(url=URL, update=True, update_window_years=2)
+        self.assertIn(("update_series", 3, 2), sel.calls)
+        self.assertEqual(self.methods_run, [])   # No full scrape.
+        self.assertEqual(sel.method, "highcharts_api")
+        self.assertEqual(sel.series.tolist(), [1.0, 2.0, 3.0, 9.0])
+        self.assertEqual(self.cached_series().tolist(), [1.0, 2.0, 3.0, 9.0])   # The updated series is written back to the cache.
+
+    def test_failed_update_falls_back_to_full_scrape(self):
+        self.seed_history()
+        FakeChartScraper.update_ok = False
+        sel = scrape_chart_module.scrape_chart(url=URL, update=True, method="path")
+        self.assertIn(("update_series", 3, 3), sel.calls)
+        self.assertEqual(self.methods_run, ["path"])
+        self.assertEqual(sel.method, "path")
+        self.assertEqual(self.cached_series().tolist(), [5.0])
+
+    def test_update_without_history_does_a_full_scrape(self):
+        sel = scrape_chart_module.scrape_chart(url=URL, update=True)
+        self.assertFalse(any(call[0] == "update_series" for call in sel.calls))
+        self.assertEqual(self.methods_run, ["highcharts_api"])
+        self.assertEqual(self.cached_series().tolist(), [5.0])
+    def test_metadata_cache_hit_skips_full_page_parse(self):
+        cache = MetadataCache()
+        cache.put(URL, {"units": "USD bn", "title": "GDP", "length": 3})
+        cache.close()
+        sel = scrape_chart_module.scrape_chart(url=URL, use_cache=True)
+        self.assertEqual(sel.calls, [("load_page", False)])   # Chart only parse, no scrape_metadata.
+        self.assertEqual(sel.metadata, {"units": "USD bn", "title": "GDP"})   # Only the static fields are cached.
+        self.assertEqual(sel.series_metadata["units"], "USD bn")
+
+    def test_metadata_cache_miss_parses_full_page_and_fills_cache(self):
+        sel = scrape_chart_module.scrape_chart(url=URL, use_cache=True)
+        self.assertEqual(sel.calls, [("load_page", True), ("scrape_metadata",)])
+        cache = MetadataCache()
+        self.assertEqual(cache.get(URL), {"units": "USD", "title": "United States GDP"})
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
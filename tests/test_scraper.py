@@ -0,0 +1,118 @@
+import unittest
+import os
+import sys
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.scraper import TE_Scraper
+
+URL = "https://tradingeconomics.com/united-states/gdp"
+
+class FakeTooltipScraper:
+    def initialize_tooltip_simple(self):
+        return True
+
+CHART_HTML = '<div id="chart"><svg><g class="highcharts-series-group"><path d="M 0 1 L 2 3"></path></g></svg></div>'
+
+class FakeDriver:
+    """Browser stand-in for load_page: the scripts return the chart element's html, the page source is never fetched."""
+    def __init__(self):
+        self.scripts = []
+
+    def get(self, url):
+        pass
+
+    def find_element(self, by, value):
+        return object()
+
+    def execute_script(self, script, *args):
+        self.scripts.append(script)
+        return CHART_HTML if "getElementById('chart')" in script else False
+
+class FakeWait:
+    def until(self, method, message=""):
+        return object()
+
+class TestLoadPage(unittest.TestCase):
+    def setUp(self):
+        self.sel = TE_Scraper.from_data(pd.Series(dtype=float))   # No browser: the driver and the waits are stand-ins.
+        self.sel.driver, self.sel.wait = FakeDriver(), FakeWait()
+        self.page_source_calls = 0
+        def get_page_source():
+            self.page_source_calls += 1
+            return "<html><body><h1>GDP</h1>" + CHART_HTML + "</body></html>"
+        self.sel.get_page_source = get_page_source
+        self.sel.create_chart_types_dict = lambda: True
+        self.sel.update_date_span = lambda: None
+
+    def test_chart_only_parse(self):
+        self.assertTrue(self.sel.load_page(URL, extra_wait_time=0, parse_full_page=False))
+        self.assertEqual(self.page_source_calls, 0)   # The full page is never fetched or parsed.
+        self.assertTrue(self.sel.chart_only)
+        self.assertIsNone(self.sel.page_soup.select_one("h1"))
+        self.assertIsNotNone(self.sel.chart_soup.select_one(".highcharts-series-group path"))
+
+    def test_full_page_parse(self):
+        self.assertTrue(self.sel.load_page(URL, extra_wait_time=0))
+        self.assertEqual(self.page_source_calls, 1)
+        self.assertFalse(self.sel.chart_only)
+        self.assertEqual(self.sel.page_soup.select_one("h1").text, "GDP")
+
+class TestUpdateSeries(unittest.TestCase):
+    """TE_Scraper.update_series with the browser steps (date span, Highcharts API, tooltips) stubbed on the instance."""
+
+    def setUp(self):
+        self.history = pd.Series(range(108), index=pd.date_range("2015-01-31", periods=108, freq="ME"), name="GDP", dtype=float)
+        self.sel = TE_Scraper.from_data(self.history, {"frequency": "ME", "units": "USD"}, url=URL)
+        self.spans = []
+        self.sel.custom_date_span_js = lambda start, end: self.spans.append((start, end)) or True
+
+    def window(self, dates) -> pd.Series:
+        """Freshly scraped window: same values as the history, continued past its end, with the June 2023 point revised."""
+        index = pd.DatetimeIndex(dates)
+        recent = pd.Series([float(self.history.index.get_loc(d)) if d in self.history.index else 200.0 for d in index], index=index)
+        recent[pd.Timestamp("2023-06-30")] = -1.0
+        return recent
+
+    def test_window_is_spliced_into_history(self):
+        # The Highcharts API returns more than the window asked for, points before the window start are dropped.
+        recent = self.window(pd.date_range("2019-01-31", "2024-06-30", freq="ME"))
+        self.sel.series_from_highcharts = lambda: recent
+        self.assertTrue(self.sel.update_series(self.history, window_years=3))
+        self.assertEqual(self.spans[0][0], "2020-12-31")
+        self.assertEqual(self.sel.series.index[-1], pd.Timestamp("2024-06-30"))
+        self.assertEqual(len(self.sel.series), 114)
+        self.assertEqual(self.sel.series.name, "GDP")
+        self.assertTrue(self.sel.series.loc[:"2020-11-30"].equals(self.history.loc[:"2020-11-30"]))
+        self.assertEqual(self.sel.revisions.to_dict("index"), {pd.Timestamp("2023-06-30"): {"old": 101.0, "new": -1.0}})
+        self.assertEqual(self.sel.metadata["frequency"], pd.infer_freq(self.sel.series.index))
+        self.assertEqual((self.sel.metadata["end_date"], self.sel.metadata["length"]), ("2024-06-30", 114))
+        self.assertEqual(self.sel.series_metadata["units"], "USD")
+
+    def test_irregular_result_keeps_frequency(self):
+        self.sel.metadata["frequency"] = "Monthly"
+        recent = self.window(pd.date_range("2021-01-31", "2024-06-30", freq="ME").delete(-3))   # A month missing from the window.
+        self.sel.series_from_highcharts = lambda: recent
+        self.assertTrue(self.sel.update_series(self.history))
+        self.assertIsNone(pd.infer_freq(self.sel.series.index))
+        self.assertEqual(self.sel.metadata["frequency"], "Monthly")
+
+    def test_tooltip_fallback(self):
+        recent = self.window(pd.date_range("2021-01-31", "2024-03-31", freq="ME"))
+        self.sel.series_from_highcharts = lambda: None
+        self.sel.tooltip_scraper = FakeTooltipScraper()
+        self.sel.full_series_fromTooltips = lambda: recent
+        self.assertTrue(self.sel.update_series(self.history))
+        self.assertEqual(self.sel.series.index[-1], pd.Timestamp("2024-03-31"))
+
+    def test_failed_window_leaves_series_alone(self):
+        self.sel.custom_date_span_js = lambda start, end: False
+        self.assertFalse(self.sel.update_series(self.history))
+        self.assertIs(self.sel.series, self.history)
+        self.assertFalse(hasattr(self.sel, "revisions"))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,103 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+import multiprocessing
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.sharding import HashRing, ShardedQueue
+from tedata.jobqueue import shard_key
+
+IDS = [f"country-{i}/indicator-{j}" for i in range(10) for j in range(6)]
+
+def _node_worker(path: str, node: str):
+    """Stand-in for run_shard_worker that records which node handled each job instead of scraping."""
+    queue = ShardedQueue(path, node=node)
+    time.sleep(0.5)  # Let the other nodes join before leasing.
+    while True:
+        job = queue.lease()
+        if job is None:
+            break
+        time.sleep(0.01)
+        queue.complete(job, result={"node": node})
+    queue.leave()
+    queue.close()
+
+class TestHashRing(unittest.TestCase):
+    def test_removing_a_node_only_moves_its_keys(self):
+        ring = HashRing(["a", "b", "c"])
+        smaller = HashRing(["a", "b"])
+        for id in IDS:
+            if ring.node_for(id) != "c":
+                self.assertEqual(ring.node_for(id), smaller.node_for(id))
+
+    def test_ranges_match_node_for(self):
+        ring = HashRing(["a", "b", "c"])
+        for id in IDS:
+            key = shard_key(id)
+            owners = [node for node in ring.nodes if any(low < key <= high for low, high in ring.ranges(node))]
+            self.assertEqual(owners, [ring.node_for(id)])
+
+class TestShardedQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "crawl.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_nodes_lease_their_own_shard(self):
+        a = ShardedQueue(self.path, node="a", steal=False)
+        b = ShardedQueue(self.path, node="b", steal=False)
+        a.enqueue(IDS)
+        ring = a.ring()
+        self.assertEqual(ring.nodes, ["a", "b"])
+        while True:
+            job = a.lease()
+            if job is None:
+                break
+            self.assertEqual(ring.node_for(job["id"]), "a")
+        stats = a.shard_stats()
+        self.assertEqual(stats["a"], 0)
+        self.assertGreater(stats["b"], 0)
+        # Once b leaves, its shard belongs to a.
+        b.leave()
+        self.assertIsNotNone(a.lease())
+        a.close(); b.close()
+
+    def test_dead_node_shard_is_taken_over(self):
+        a = ShardedQueue(self.path, node="a", steal=False, heartbeat_timeout=0.2)
+        ShardedQueue(self.path, node="dead", heartbeat_timeout=0.2).close()
+        a.enqueue(IDS)
+        time.sleep(0.3)
+        a.heartbeat()
+        self.assertEqual(a.live_nodes(), ["a"])
+        count = 0
+        while a.lease() is not None:
+            count += 1
+        self.assertEqual(count, len(IDS))
+        a.close()
+
+    def test_multiple_processes(self):
+        queue = ShardedQueue(self.path, node="setup")
+        queue.enqueue(IDS)
+        queue.leave()
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=_node_worker, args=(self.path, f"node-{i}")) for i in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+        self.assertEqual([process.exitcode for process in processes], [0, 0, 0])
+        self.assertEqual(queue.stats(), {"pending": 0, "leased": 0, "done": len(IDS), "failed": 0})
+        jobs = queue.jobs()
+        self.assertEqual(jobs["attempts"].max(), 1)  # Every job was handled exactly once.
+        self.assertGreater(jobs["worker"].nunique(), 1)
+        queue.close()
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
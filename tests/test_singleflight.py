@@ -0,0 +1,120 @@
+import unittest
+import os
+import sys
+import time
+import asyncio
+import threading
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.singleflight import SingleFlight, _flight_key
+
+class SlowCounter:
+    """Blocking function that counts how many times it really runs."""
+    def __init__(self, delay: float = 0.2, result="series"):
+        self.delay = delay
+        self.result = result
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+class TestSingleFlight(unittest.TestCase):
+    def run_threads(self, flight, key, fn, n=5):
+        results = []
+        def target():
+            try:
+                results.append(flight.do(key, fn))
+            except Exception as e:
+                results.append(e)
+        threads = [threading.Thread(target=target) for _ in range(n)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_threads_share_one_call(self):
+        flight, fn = SingleFlight(linger=0), SlowCounter()
+        results = self.run_threads(flight, "united-states/cpi", fn)
+        self.assertEqual(fn.calls, 1)
+        self.assertEqual(results, ["series"] * 5)
+        self.assertEqual(flight.in_flight(), [])
+
+    def test_different_keys_run_separately(self):
+        flight, fn = SingleFlight(linger=0), SlowCounter(delay=0.05)
+        flight.do("united-states/cpi", fn)
+        flight.do("united-states/gdp", fn)
+        self.assertEqual(fn.calls, 2)
+
+    def test_linger_window(self):
+        flight, fn = SingleFlight(linger=0.3), SlowCounter(delay=0)
+        flight.do("united-states/cpi", fn)
+        flight.do("united-states/cpi", fn)
+        self.assertEqual(fn.calls, 1)
+        time.sleep(0.35)
+        flight.do("united-states/cpi", fn)
+        self.assertEqual(fn.calls, 2)
+        flight.forget()
+        flight.do("united-states/cpi", fn)
+        self.assertEqual(fn.calls, 3)
+
+    def test_failures_are_shared_but_not_kept(self):
+        flight = SingleFlight(linger=10)
+        fn = SlowCounter(result=RuntimeError("page failed to load"))
+        results = self.run_threads(flight, "united-states/cpi", fn)
+        self.assertEqual(fn.calls, 1)
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        none_fn = SlowCounter(delay=0, result=None)
+        flight.do("united-states/ism", none_fn)
+        flight.do("united-states/ism", none_fn)
+        self.assertEqual(none_fn.calls, 2)
+
+    def test_asyncio_and_threads_share_one_call(self):
+        flight, fn = SingleFlight(linger=0), SlowCounter(delay=0.3)
+
+        async def main():
+            tasks = [flight.do_async("united-states/cpi", fn) for _ in range(4)]
+            thread_result = []
+            thread = threading.Thread(target=lambda: thread_result.append(flight.do("united-states/cpi", fn)))
+            gathered = asyncio.gather(*tasks)
+            await asyncio.sleep(0.05)
+            thread.start()
+            results = await gathered
+            thread.join()
+            return results + thread_result
+
+        self.assertEqual(asyncio.run(main()), ["series"] * 5)
+        self.assertEqual(fn.calls, 1)
+
+    def test_cancelled_waiter_does_not_cancel_call(self):
+        flight, fn = SingleFlight(linger=0), SlowCounter(delay=0.2)
+
+        async def main():
+            first = asyncio.ensure_future(flight.do_async("united-states/cpi", fn))
+            second = asyncio.ensure_future(flight.do_async("united-states/cpi", fn))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), "series")
+        self.assertEqual(fn.calls, 1)
+
+    def test_flight_key_normalizes_id(self):
+        key = _flight_key(url="https://tradingeconomics.com/united-states/consumer-price-index-cpi")
+        self.assertEqual(key, _flight_key(id="united-states/consumer-price-index-cpi"))
+        self.assertEqual(key, _flight_key(indicator="consumer-price-index-cpi"))
+        self.assertNotEqual(key, _flight_key(indicator="consumer-price-index-cpi", method="tooltips"))
+        self.assertNotEqual(key, _flight_key(indicator="consumer-price-index-cpi", use_cache=True))
+        self.assertNotEqual(key, _flight_key(indicator="consumer-price-index-cpi", max_age=600))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
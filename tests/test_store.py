@@ -0,0 +1,74 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.store import SeriesStore
+
+def monthly(values, start="2020-01-31", name="GDP"):
+    return pd.Series(values, index=pd.date_range(start, periods=len(values), freq="ME"), dtype=float, name=name)
+
+class TestSeriesStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = SeriesStore(os.path.join(self.tmpdir.name, "store.db"))
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_put_get_range(self):
+        series = monthly(range(24))
+        self.assertEqual(self.store.put("https://tradingeconomics.com/united-states/gdp", series, {"units": "USD"}), 24)
+        read = self.store.get("united-states/gdp")
+        pd.testing.assert_series_equal(read, series, check_freq=False, check_names=False)
+        self.assertEqual(read.name, "GDP")
+        part = self.store.get("united-states/gdp", start="2020-06-01", end="2020-12-31")
+        self.assertEqual(len(part), 7)
+        self.assertEqual(part.index[0], pd.Timestamp("2020-06-30"))
+        self.assertEqual(self.store.metadata("united-states/gdp"), {"units": "USD"})
+        self.assertIsNone(self.store.get("japan/gdp"))
+
+    def test_upsert(self):
+        self.store.put("united-states/gdp", monthly(range(12)), {"units": "USD"})
+        refreshed = monthly([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10.5, 11.5, 12, 13])   # Two revisions & two new points.
+        self.assertEqual(self.store.put("united-states/gdp", refreshed), 4)
+        pd.testing.assert_series_equal(self.store.get("united-states/gdp"), refreshed, check_freq=False, check_names=False)
+        self.assertEqual(self.store.metadata("united-states/gdp"), {"units": "USD"})  # Kept when no new metadata is given.
+        self.store.put("united-states/gdp", monthly(range(3)), replace=True)
+        self.assertEqual(len(self.store.get("united-states/gdp")), 3)
+
+    def test_get_many_wide_frame(self):
+        self.store.put("united-states/gdp", monthly(range(12)))
+        self.store.put("japan/gdp", monthly(range(6), start="2020-07-31"))
+        frame = self.store.get_many(["japan/gdp", "united-states/gdp", "china/gdp"], start="2020-03-01")
+        self.assertEqual(list(frame.columns), ["japan/gdp", "united-states/gdp", "china/gdp"])
+        self.assertEqual(len(frame), 10)
+        self.assertTrue(np.isnan(frame.loc["2020-03-31", "japan/gdp"]))
+        self.assertEqual(frame.loc["2020-12-31", "japan/gdp"], 5)
+        self.assertTrue(frame["china/gdp"].isna().all())
+        info = self.store.info()
+        self.assertEqual(info.loc["japan/gdp", "points"], 6)
+        self.store.delete("japan/gdp")
+        self.assertEqual(self.store.ids(), ["united-states/gdp"])
+
+    def test_range_read_over_many_series(self):
+        ids = [f"country-{i}/gdp" for i in range(2000)]
+        series = monthly(np.arange(120))
+        for id in ids:
+            self.store.put(id, series)
+        timer = time.perf_counter()
+        frame = self.store.get_many(ids, start="2029-01-01")
+        self.assertEqual(frame.shape, (12, 2000))
+        self.assertLess(time.perf_counter() - timer, 2)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
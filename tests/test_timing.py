@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+import json
+import time
+import tempfile
+
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.timing import span, timed, configure_timing
+
+class Stub:
+    last_url = "https://tradingeconomics.com/united-states/gdp"
+
+    def __init__(self):
+        self.timings = {}
+
+    @timed()
+    def load_page(self, ok=True):
+        time.sleep(0.01)
+        return ok
+
+    @timed("parse")
+    def broken(self):
+        raise RuntimeError("no chart")
+
+class TestTiming(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.events = os.path.join(self.tmpdir.name, "events.jsonl")
+
+    def tearDown(self):
+        configure_timing(None)
+        self.tmpdir.cleanup()
+
+    def read_events(self):
+        with open(self.events) as f:
+            return [json.loads(line) for line in f]
+
+    def test_stage_timings_without_events(self):
+        stub = Stub()
+        stub.load_page()
+        stub.load_page()
+        with span("custom", stub):
+            pass
+        self.assertEqual(set(stub.timings), {"load_page", "custom"})
+        self.assertGreaterEqual(stub.timings["load_page"], 0.02)   # Repeated stages are summed.
+        self.assertFalse(os.path.exists(self.events))
+
+    def test_events(self):
+        configure_timing(self.events)
+        stub = Stub()
+        stub.load_page(ok=False)
+        with self.assertRaises(RuntimeError):
+            stub.broken()
+        with span("highcharts", stub, method="highcharts_api"):
+            pass
+        events = self.read_events()
+        self.assertEqual([e["stage"] for e in events], ["load_page", "parse", "highcharts"])
+        self.assertEqual([e["ok"] for e in events], [False, False, True])
+        self.assertEqual(events[1]["error"], "no chart")
+        self.assertEqual(events[2]["method"], "highcharts_api")
+        self.assertTrue(all(e["url"] == Stub.last_url for e in events))
+        self.assertIn("parse", stub.timings)
+
+    def test_scrape_chart_timings(self):
+        from tedata.cache import SeriesCache
+        from tedata.scrape_chart import scrape_chart
+        configure_timing(self.events)
+        os.environ["TEDATA_CACHE_DIR"] = self.tmpdir.name
+        try:
+            series = pd.Series(range(12), index=pd.date_range("2020-01-01", periods=12, freq="MS"), dtype=float)
+            SeriesCache().put("united-states/gdp", series, {"frequency": "MS"}, method="mixed")
+            sel = scrape_chart(id="united-states/gdp", use_cache=True)
+        finally:
+            del os.environ["TEDATA_CACHE_DIR"]
+        self.assertIn("scrape_chart", sel.timings)
+        event = self.read_events()[-1]
+        self.assertEqual((event["stage"], event["method"], event["ok"]), ("scrape_chart", "mixed", True))
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,37 @@
+import unittest
+import os
+import sys
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.utils import splice_series, series_from_svg_path
+
+class TestSpliceSeries(unittest.TestCase):
+    def test_splice_with_revision_and_new_point(self):
+        history = pd.Series([1.0, 2.0, 3.0, 4.0], index=pd.date_range("2020-01-01", periods=4, freq="MS"), name="gdp")
+        recent = pd.Series([3.5, 4.0, 5.0], index=pd.date_range("2020-03-01", periods=3, freq="MS"))
+        merged, revisions = splice_series(history, recent)
+        self.assertEqual(merged.tolist(), [1.0, 2.0, 3.5, 4.0, 5.0])
+        self.assertEqual(merged.name, "gdp")
+        self.assertEqual(list(revisions.index), [pd.Timestamp("2020-03-01")])
+        self.assertEqual(revisions.loc["2020-03-01", "old"], 3.0)
+        self.assertEqual(revisions.loc["2020-03-01", "new"], 3.5)
+
+    def test_empty_window_keeps_history(self):
+        history = pd.Series([1.0, 2.0], index=pd.date_range("2020-01-01", periods=2, freq="MS"))
+        merged, revisions = splice_series(history, pd.Series([], dtype=float, index=pd.DatetimeIndex([])))
+        pd.testing.assert_series_equal(merged, history)
+        self.assertTrue(revisions.empty)
+
+class TestSeriesFromSvgPath(unittest.TestCase):
+    def test_path_commands_are_skipped(self):
+        series = series_from_svg_path("M 0 210.5 L 5.2 208 L 10.4 199.75")
+        self.assertEqual(series.index.tolist(), [0.0, 5.2, 10.4])
+        self.assertEqual(series.tolist(), [210.5, 208.0, 199.75])
+        self.assertEqual(series.name, "Extracted Series")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
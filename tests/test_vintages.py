@@ -0,0 +1,63 @@
+import unittest
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+os.environ.setdefault('TEDATA_DISABLE_LOGGING', 'true')
+wd = os.path.dirname(__file__); parent = os.path.dirname(wd)
+fdel = os.path.sep
+sys.path.append(parent+fdel+"src")
+from tedata.vintages import VintageStore
+
+def monthly(values, start="2024-01-31"):
+    return pd.Series(values, index=pd.date_range(start, periods=len(values), freq="ME"), dtype=float)
+
+class TestVintageStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = VintageStore(os.path.join(self.tmpdir.name, "vintages.db"))
+        self.id = "united-states/non-farm-payrolls"
+        self.v1 = monthly([100, 110, 120])
+        self.v2 = monthly([100, 112, 120, 130])          # One revision, one new point.
+        self.v3 = monthly([112, 121, 130], start="2024-02-29")   # First point dropped, one revision.
+        self.store.record(self.id, self.v1, {"units": "Thousand"}, scraped_at="2024-04-05")
+        self.store.record(self.id, self.v2, {"units": "Thousand"}, scraped_at="2024-05-03")
+        self.store.record(self.id, self.v3, {"units": "Thousand", "source": "BLS"}, scraped_at="2024-06-07")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmpdir.cleanup()
+
+    def test_only_changes_are_stored(self):
+        deltas = self.store.conn.execute("SELECT vintage, COUNT(*) FROM deltas GROUP BY vintage ORDER BY vintage").fetchall()
+        self.assertEqual([tuple(row) for row in deltas], [(1, 3), (2, 2), (3, 2)])
+        self.assertEqual(self.store.record(self.id, self.v3, scraped_at="2024-07-05"), 3)  # Unchanged: no new vintage.
+        self.assertEqual(list(self.store.vintages(self.id)["changed"]), [3, 2, 2])
+
+    def test_as_of(self):
+        self.assertIsNone(self.store.as_of(self.id, "2024-04-01"))
+        for when, expected in (("2024-04-05", self.v1), ("2024-05-31", self.v2), ("2024-06-07 12:00", self.v3), (None, self.v3)):
+            pd.testing.assert_series_equal(self.store.as_of(self.id, when), expected, check_names=False, check_freq=False)
+        self.assertEqual(self.store.metadata(self.id, "2024-05-31"), {"units": "Thousand"})
+        self.assertEqual(self.store.metadata(self.id)["source"], "BLS")
+
+    def test_revision_reports(self):
+        revisions = self.store.revisions(self.id)
+        self.assertEqual(list(revisions["vintage"]), [2, 3, 3])
+        first = revisions.iloc[0]
+        self.assertEqual((first["date"], first["old"], first["new"], first["change"]), (pd.Timestamp("2024-02-29"), 110, 112, 2))
+        self.assertTrue(revisions.iloc[1]["removed"])
+        diff = self.store.diff(self.id)
+        self.assertEqual(list(diff.index.strftime("%Y-%m-%d")), ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30"])
+        self.assertTrue(np.isnan(diff.loc["2024-04-30", "old"]))
+        self.assertEqual(diff.loc["2024-03-31", "change"], 1)
+
+    def test_vintages_must_be_in_order(self):
+        with self.assertRaises(ValueError):
+            self.store.record(self.id, self.v1, scraped_at="2024-01-01")
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)